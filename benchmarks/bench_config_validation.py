@@ -0,0 +1,35 @@
+# fuzz every module chain up to --length modules through the config validator and check it agrees with the
+# compatibility matrix - reports configs validated per second
+#
+#   PYTHONPATH=. python benchmarks/bench_config_validation.py --length 4
+import time
+import argparse
+import itertools
+from utilities.pipeline_config import ConfigCatalog, compile_config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = ConfigCatalog()
+    catalog.matrix
+    print(f"catalog: {len(catalog.configs)} configs, {len(catalog.modules)} modules in {time.perf_counter() - start:.4f}s")
+
+    for length in range(1, args.length + 1):
+        chains = list(itertools.product(sorted(catalog.modules), repeat=length))
+        configs = [catalog.chain_config(v) for v in chains]
+        start = time.perf_counter()
+        records = [compile_config(v) for v in configs]
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        chain_problems = [catalog.validate_chain(v) for v in chains]
+        chain_elapsed = time.perf_counter() - start
+        disagreements = sum((len(r.problems) == 0) != (len(p) == 0) for r, p in zip(records, chain_problems))
+        valid = sum(len(r.problems) == 0 for r in records)
+        print(
+            f"length {length}: {len(configs):>6} configs ({valid} valid) - full configs {len(configs) / elapsed:>10,.0f}/s, "
+            + f"chains via matrix {len(chains) / chain_elapsed:>10,.0f}/s, {disagreements} disagreements"
+        )
@@ -0,0 +1,48 @@
+# compare link / heading extraction by html rendering against the streaming tokenizer on the real docs tree
+#
+#   PYTHONPATH=. python benchmarks/bench_link_extraction.py --repeat 5
+import time
+import argparse
+from utilities import base_dir
+from utilities.converter import collect_mkdocks_toc
+from utilities.md_tokenizer import iter_markdown_tokens
+from utilities.utilities import extract_links_from_content, extract_headings_from_content, split_links
+
+
+def render_extract(path: str, markdown_content: str) -> tuple:
+    return extract_links_from_content(markdown_content, path), extract_headings_from_content(markdown_content)
+
+
+def tokenizer_extract(path: str, markdown_content: str) -> tuple:
+    tokens = list(iter_markdown_tokens(markdown_content.splitlines()))
+    links = split_links([v for k, v, _ in tokens if k == "link"], path)
+    return links, [v for k, v, _ in tokens if k == "heading"][1:]
+
+
+def time_extractor(extractor, pages: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path, markdown_content in pages:
+            extractor(path, markdown_content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = []
+    for page in collect_mkdocks_toc() + ["../README.md"]:
+        path = f"{base_dir}/docs/{page}"
+        with open(path, "r", encoding="utf-8") as file:
+            pages.append((path, file.read()))
+    total_bytes = sum(len(v[1]) for v in pages)
+
+    render_time = time_extractor(render_extract, pages, args.repeat)
+    tokenizer_time = time_extractor(tokenizer_extract, pages, args.repeat)
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.2f} MB of markdown, best of {args.repeat}")
+    print(f"html render:  {render_time * 1000:8.1f} ms")
+    print(f"tokenizer:    {tokenizer_time * 1000:8.1f} ms  ({render_time / tokenizer_time:.1f}x faster)")
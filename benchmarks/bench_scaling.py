@@ -0,0 +1,225 @@
+# time every check and the converter on synthetic docs trees of growing size (see synthetic_tree.py) - reports pages
+# checked per second at each size, also as a multiple of a fixed calibration loop's speed so that machines compare, saves
+# those as a baseline, and fails when a change drops one too far below it
+#
+#   PYTHONPATH=. python benchmarks/bench_scaling.py --pages 100 1000 10000
+#   PYTHONPATH=. python benchmarks/bench_scaling.py --save-baseline --runs 3
+#   PYTHONPATH=. python benchmarks/bench_scaling.py --compare --threshold 0.25
+import gc
+import os
+import re
+import sys
+import json
+import time
+import functools
+import statistics
+import platform
+import argparse
+from utilities import base_dir, cache_dir
+from utilities import code_analyzer
+from utilities.doc_index import DocIndex
+from utilities.converter import run_conversions
+from utilities.data_check import data_link_report
+from utilities.header_check import check_file_headers
+from utilities.link_check import check_file_links, configure_link_checker
+from utilities.name_check import duplicate_name_report
+from utilities.toc_file_check import compare_toc_to_docs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_tree import cached_tree  # noqa: E402
+
+default_baseline_path = os.path.join(base_dir, "benchmarks", "baseline.json")
+default_tree_dir = os.path.join(cache_dir, "bench_trees")
+# seconds of pairs a benchmark gets before it is cut back to fewer pairs
+pair_budget_seconds = 1.5
+calibration_pattern = re.compile(r"[a-z_]+|\d+")
+calibration_text = "\n".join(f"## Step {i} of the guide\nsee [page {i % 7}](page_{i % 7}.md#step-{i}) and `create_pipeline_{i}`" for i in range(200))
+
+
+def bench_parse(root: str) -> int:
+    # code blocks are analyzed once per process - start every repeat cold
+    code_analyzer.reset()
+    index = DocIndex(root=root)
+    return len(index.pages())
+
+
+def bench_toc(index: DocIndex) -> int:
+    compare_toc_to_docs(index)
+    return len(index.toc)
+
+
+def bench_headers(index: DocIndex) -> int:
+    for page in index.toc:
+        check_file_headers(page, index)
+    return len(index.toc)
+
+
+def bench_links(index: DocIndex) -> int:
+    # external links come from the tree's warm cache - no network
+    configure_link_checker(offline=True, cache_path=os.path.join(index.root, "link_cache.json"), ttl=float("inf"))
+    toc = index.toc
+    for page in toc:
+        check_file_links(page, index=index)
+    return len(toc)
+
+
+def bench_names(index: DocIndex) -> int:
+    duplicate_name_report(index, config_dir=os.path.join(index.root, "pipeline_config_examples"))
+    return len(index.toc)
+
+
+def bench_data(index: DocIndex) -> int:
+    data_link_report(index, directory=os.path.join(index.root, "data"))
+    return len(index.toc)
+
+
+def bench_convert(index: DocIndex, sample: int) -> int:
+    # nbconvert is per notebook and dominated by its own overhead - a sample gives notebooks per second
+    notebooks = [os.path.join(index.docs_dir, v[: -len(".md")] + ".ipynb") for v in index.toc[:sample]]
+    results = run_conversions(notebooks, remove=True, workers=1)
+    failed = [v["error"] for v in results if not v["success"]]
+    if failed:
+        raise RuntimeError(f"conversion failed: {failed[0]}")
+    return len(notebooks)
+
+
+def timed_rate(function, seconds: float) -> float:
+    # items per second of calling function until seconds have passed
+    items = 0
+    start = time.perf_counter()
+    while True:
+        items += function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return items / elapsed
+
+
+def relative_throughput(function, pairs: int, min_seconds: float = 0.05) -> tuple:
+    """items per second of function, and that as a multiple of the calibration loop's speed - medians over pairs of
+    back to back runs
+
+    function is called once untimed first, so imports and first-use caches are not timed, and that call sets how long
+    each run lasts (at least min_seconds). each pair runs the calibration loop for as long right before function, so
+    both see the same machine - cpu speed on a shared runner drifts by a quarter within seconds, which the ratio
+    cancels and the raw numbers do not. slow benchmarks get fewer pairs, at least 3. the garbage collector is paused
+    while timing, as timeit does, so a heap left by a larger tree does not slow a smaller one
+    """
+    start = time.perf_counter()
+    function()
+    seconds = max(min_seconds, time.perf_counter() - start)
+    rates = []
+    ratios = []
+    for _ in range(max(3, min(pairs, int(pair_budget_seconds / seconds)))):
+        gc.collect()
+        gc.disable()
+        try:
+            calibration = timed_rate(calibration_loop, seconds)
+            rate = timed_rate(function, seconds)
+        finally:
+            gc.enable()
+        rates.append(rate)
+        ratios.append(rate / calibration)
+    return statistics.median(rates), statistics.median(ratios)
+
+
+def calibration_loop() -> int:
+    # fixed pure python work of the kind the checks do - regex scans, string and dict operations - on text that never
+    # changes, so its speed measures the machine (and how busy it is) rather than the code under test
+    counts = {}
+    for line in calibration_text.splitlines():
+        for word in calibration_pattern.findall(line.lower()):
+            counts[word] = counts.get(word, 0) + 1
+    json.dumps(counts, sort_keys=True)
+    return 1
+
+
+def run_benchmarks(pages: int, repeat: int, convert_sample: int, tree_dir: str = default_tree_dir, names: list = None) -> tuple:
+    """pages per second of every benchmark (or those in names) on a tree of this size, and the same as a multiple of the
+    calibration loop's speed (see relative_throughput) - the relative numbers hold across machines and runner load
+    """
+    root = cached_tree(tree_dir, pages)
+    results = {}
+    relative = {}
+
+    def measure(name: str, function) -> None:
+        if names is None or name in names:
+            results[name], relative[name] = relative_throughput(function, repeat)
+
+    measure("parse", lambda: bench_parse(root))
+    # the remaining checks share one index, as in a pytest session
+    index = DocIndex(root=root)
+    index.pages()
+    for name, function in [("toc", bench_toc), ("headers", bench_headers), ("links", bench_links), ("names", bench_names), ("data", bench_data)]:
+        measure(name, functools.partial(function, index))
+    if convert_sample > 0:
+        measure("convert", lambda: bench_convert(index, convert_sample))
+    return results, relative
+
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def median_relative(runs: list) -> dict:
+    # pages -> benchmark -> the median relative throughput across whole runs of every size
+    return {pages: {name: statistics.median(v[pages][name] for v in runs) for name in runs[0][pages]} for pages in runs[0]}
+
+
+def regressions(relative: dict, baseline: dict, threshold: float) -> list:
+    # (pages, benchmark, relative throughput, baseline) wherever relative throughput fell more than threshold below
+    # the baseline's
+    slower = []
+    for pages, benchmarks in relative.items():
+        for name, value in benchmarks.items():
+            expected = baseline.get(pages, {}).get(name)
+            if expected is not None and value < expected * (1 - threshold):
+                slower.append((pages, name, value, expected))
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=12, help="pairs of calibration / benchmark runs per benchmark")
+    parser.add_argument("--convert-sample", type=int, default=20, help="notebooks converted per size (0 to skip the converter)")
+    parser.add_argument("--tree-dir", default=default_tree_dir, help="where generated trees are kept between runs")
+    parser.add_argument("--baseline", default=default_baseline_path)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 when any throughput regresses beyond --threshold")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed fractional drop in throughput")
+    parser.add_argument("--runs", type=int, default=1, help="whole runs of every size - the median of each benchmark is kept")
+    parser.add_argument("--confirm", type=int, default=2, help="times a drop beyond --threshold is measured again before it counts")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["relative"]
+
+    runs = []
+    for _ in range(args.runs):
+        runs.append({})
+        for pages in args.pages:
+            results, runs[-1][str(pages)] = run_benchmarks(pages, args.repeat, args.convert_sample, args.tree_dir)
+            row = ", ".join(f"{k} {v:>10,.0f}/s ({runs[-1][str(pages)][k]:.3g})" for k, v in results.items())
+            print(f"{pages:>6} pages: {row}")
+    relative = median_relative(runs)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"machine": machine(), "relative": relative}, file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+    if args.compare:
+        slower = regressions(relative, baseline, args.threshold)
+        # a single slow measurement on a busy machine is not a regression - a real one stays slow when measured again
+        for _ in range(args.confirm):
+            for pages in sorted({v[0] for v in slower}, key=int):
+                _, again = run_benchmarks(int(pages), args.repeat, args.convert_sample, args.tree_dir, [v[1] for v in slower if v[0] == pages])
+                for name, value in again.items():
+                    print(f"MEASURED AGAIN: {name} at {pages} pages - {value:.3g}")
+                    relative[pages][name] = max(relative[pages][name], value)
+            slower = regressions(relative, baseline, args.threshold)
+        for pages, name, value, expected in slower:
+            print(f"REGRESSION: {name} at {pages} pages - {value:.3g} calibration loops' worth of pages against a baseline of {expected:.3g}")
+        print(f"{len(slower)} regressions beyond {args.threshold:.0%}")
+        raise SystemExit(1 if slower else 0)
@@ -0,0 +1,165 @@
+# build a synthetic docs tree - mkdocs.yml, notebooks with their converted markdown, data/ and a warm link cache - with
+# link, heading, code block and data reference densities taken from the real tree, so checks can be timed as it grows
+#
+#   PYTHONPATH=. python benchmarks/synthetic_tree.py /tmp/tree --pages 1000
+import os
+import re
+import json
+import time
+import random
+import shutil
+import argparse
+
+generator_version = 2
+pages_per_section = 100
+# per page, as measured on the real tree (see DocIndex(source="notebook").pages())
+sections_per_page = 4
+intra_links_per_page = 3
+inter_links_per_page = 12
+outer_links_per_page = 4
+code_blocks_per_page = 5
+data_references_per_page = 1
+# unique external urls per page - the real tree averages about three
+outer_link_pool_per_page = 3
+outer_link_pattern = re.compile(r"\]\((https://[^)]+)\)")
+module_chains = [["parser"], ["parser", "text-embedder", "vector-db"], ["transcribe", "translate"], ["summarize"], ["sentiment"]]
+
+
+def page_path(number: int) -> str:
+    return f"section_{number // pages_per_section}/page_{number}.md"
+
+
+def section_anchor(section: int) -> str:
+    return f"#section-{section}-setup"
+
+
+def relative_link(source: int, target: int) -> str:
+    return os.path.relpath(page_path(target), os.path.dirname(page_path(source)))
+
+
+def page_cells(number: int, pages: int, data_files: int, rng: random.Random) -> list:
+    # (cell_type, source, stream output) in page order
+    cells = [("markdown", f"# Page {number}\n\nA walkthrough of pipeline {number}.", None)]
+    outer = [f"https://example.com/reference/{rng.randrange(pages * outer_link_pool_per_page)}" for _ in range(outer_links_per_page)]
+    inter = [relative_link(number, rng.randrange(pages)) for _ in range(inter_links_per_page)]
+    # a quarter of the links between pages point at a heading on the other page
+    inter = [v + section_anchor(1) if i % 4 == 0 else v for i, v in enumerate(inter)]
+    contents = [f"- [section {v}]({section_anchor(v)})" for v in range(1, intra_links_per_page + 1)]
+    cells.append(("markdown", "The document is divided into the following sections:\n\n" + "\n".join(contents), None))
+    for section in range(1, sections_per_page + 1):
+        links = inter[(section - 1) * 3 : section * 3]
+        text = f"## Section {section} Setup\n\nThis uses the [`module`]({links[0]}) described in [the method]({links[1]})"
+        text += f" and the [reference]({outer[section - 1]}) - see also [here]({links[2]})."
+        cells.append(("markdown", text, None))
+        if section == 1:
+            chain = module_chains[number % len(module_chains)]
+            code = f'# create a pipeline\npipeline = krixik.create_pipeline(name="synthetic_pipeline_{number}", module_chain={json.dumps(chain)})'
+            cells.append(("code", code, None))
+        if section <= data_references_per_page:
+            path = f"input/file_{number % data_files}.txt"
+            code = "# process a file\nprocess_output = pipeline.process(\n"
+            code += f'    local_file_path=data_dir + "{path}",  # the input file\n'
+            code += '    local_save_directory=data_dir + "output",  # where output is saved\n    expire_time=60 * 30,\n    wait_for_process=True,\n)'
+            cells.append(("code", code, None))
+    while sum(v[0] == "code" for v in cells) < code_blocks_per_page - 1:
+        lines = [f"value_{i} = {i} * {number}" for i in range(8)]
+        cells.append(("code", "# compute something\n" + "\n".join(lines) + "\nprint(value_7)", f"{7 * number}\n"))
+    # pages end by resetting their pipeline, as the real ones do
+    cells.append(("code", "# delete all processed datapoints belonging to this pipeline\nkrixik.reset_pipeline(pipeline)", None))
+    return cells
+
+
+def write_notebook(path: str, cells: list) -> None:
+    notebook_cells = []
+    for cell_type, source, output in cells:
+        cell = {"cell_type": cell_type, "metadata": {}, "source": source.splitlines(keepends=True)}
+        if cell_type == "code":
+            cell["execution_count"] = None
+            cell["outputs"] = [{"name": "stdout", "output_type": "stream", "text": [output]}] if output else []
+        notebook_cells.append(cell)
+    metadata = {"kernelspec": {"display_name": "Python 3", "language": "python", "name": "python3"}, "language_info": {"name": "python"}}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"cells": notebook_cells, "metadata": metadata, "nbformat": 4, "nbformat_minor": 2}, file, indent=1)
+
+
+def write_markdown(path: str, cells: list) -> None:
+    # laid out as nbconvert writes it - fenced code with outputs indented below
+    parts = []
+    for cell_type, source, output in cells:
+        if cell_type == "markdown":
+            parts.append(source + "\n")
+        else:
+            parts.append(f"\n```python\n{source}\n```\n")
+            if output:
+                parts.append("".join(f"    {v}\n" for v in output.splitlines()) + "\n")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(parts))
+
+
+def generate_tree(root: str, pages: int, seed: int = 0) -> dict:
+    """write a tree of the given number of pages under root - returns a summary including its outer links
+
+    every page, data file and link target exists and every pipeline name is unique, so each check passes on it
+    """
+    rng = random.Random(seed)
+    # page n reads file n % data_files, so every input is used
+    data_files = max(1, pages // 2)
+    os.makedirs(os.path.join(root, "data", "output"), exist_ok=True)
+    os.makedirs(os.path.join(root, "data", "other"), exist_ok=True)
+    os.makedirs(os.path.join(root, "pipeline_config_examples"), exist_ok=True)
+    input_dir = os.path.join(root, "data", "input")
+    os.makedirs(input_dir, exist_ok=True)
+    for number in range(data_files):
+        with open(os.path.join(input_dir, f"file_{number}.txt"), "w") as file:
+            file.write(f"synthetic input {number}\n")
+
+    nav = {}
+    outer_links = set()
+    for number in range(pages):
+        cells = page_cells(number, pages, data_files, rng)
+        path = os.path.join(root, "docs", page_path(number))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_notebook(path[: -len(".md")] + ".ipynb", cells)
+        write_markdown(path, cells)
+        nav.setdefault(f"section {number // pages_per_section}", []).append({f"page {number}": page_path(number)})
+        outer_links.update(v for _, source, _ in cells for v in outer_link_pattern.findall(source))
+
+    with open(os.path.join(root, "mkdocs.yml"), "w") as file:
+        file.write("nav:\n")
+        for section, entries in nav.items():
+            file.write(f"  - {section}:\n")
+            for entry in entries:
+                for title, path in entry.items():
+                    file.write(f'      - "{title}": {path}\n')
+    return {"root": root, "pages": pages, "seed": seed, "outer_links": sorted(outer_links)}
+
+
+def write_link_cache(path: str, outer_links: list) -> None:
+    # every external link verified just now - checks take the warm, no-network path
+    now = time.time()
+    cache = {v: {"url": v, "ok": True, "status": 200, "method": "HEAD", "error": None, "checked_at": now, "cached": False} for v in outer_links}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(cache, file)
+
+
+def cached_tree(directory: str, pages: int, seed: int = 0) -> str:
+    # generate a tree once per size / seed / generator version and reuse it
+    root = os.path.join(directory, f"tree_{pages}_{seed}_v{generator_version}")
+    if not os.path.isfile(os.path.join(root, "link_cache.json")):
+        shutil.rmtree(root, ignore_errors=True)
+        summary = generate_tree(root, pages, seed)
+        write_link_cache(os.path.join(root, "link_cache.json"), summary["outer_links"])
+    return root
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("root")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = generate_tree(args.root, args.pages, args.seed)
+    write_link_cache(os.path.join(args.root, "link_cache.json"), summary["outer_links"])
+    print(f"{args.pages} pages, {len(summary['outer_links'])} external links written to {args.root} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,83 @@
+# mkdocs hooks (see hooks: in mkdocs.yml) - responsive, recompressed images
+#
+# before each build every png / jpeg under docs/ gets webp variants at a few widths (see utilities/image_stage.py -
+# only new or changed images are encoded, the rest come from .docs_cache/images/). each page's <img> of such an image
+# becomes a <picture> offering the variants, with the original as the fallback, and the variants a build uses are
+# copied into site/img/variants/. without Pillow the stage is skipped and images are shipped as they are
+#
+#   mkdocs build
+import os
+import re
+import sys
+import shutil
+import logging
+import posixpath
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.image_check import build_image_index  # noqa: E402
+from utilities.image_stage import ImageStage  # noqa: E402
+
+log = logging.getLogger("mkdocs.hooks.images")
+
+variants_url = "img/variants"
+image_tag_pattern = re.compile(r'<img\s[^>]*?src="(?P<src>[^"]+)"[^>]*>')
+
+_state = {"stage": ImageStage(), "images": {}, "used": set()}
+
+
+def on_pre_build(config):
+    root = os.path.dirname(config.docs_dir)
+    images, report = _state["stage"].process([os.path.join(root, v) for v in build_image_index(root)])
+    # site path (docs-relative) -> entry
+    _state["images"] = {os.path.relpath(k, config.docs_dir).replace(os.sep, "/"): v for k, v in images.items()}
+    _state["used"] = set()
+    if report["skipped"]:
+        # Pillow is in docs/requirements.txt - a build without it is missing the responsive variants
+        log.warning(f"images: {report['skipped']} - shipping images as they are")
+        return
+    log.info(
+        f"images: {report['images']} images, {report['encoded']} encoded, {report['cached']} from the cache - "
+        + f"{report['original_bytes']:,} bytes as shipped, {report['smallest_bytes']:,} as webp"
+    )
+
+
+def picture(tag: str, entry: dict, page_dir: str) -> str:
+    variants = entry["variants"]
+    srcset = ", ".join(f"{posixpath.relpath(posixpath.join(variants_url, v['file']), page_dir)} {v['width']}w" for v in variants)
+    largest = max(v["width"] for v in variants)
+    img = tag
+    if " width=" not in img:
+        img = img.replace("<img ", f'<img width="{entry["width"]}" height="{entry["height"]}" ', 1)
+    if " loading=" not in img:
+        img = img.replace("<img ", '<img loading="lazy" ', 1)
+    sizes = f"(max-width: {largest}px) 100vw, {largest}px"
+    return f'<picture><source type="image/webp" srcset="{srcset}" sizes="{sizes}">{img}</picture>'
+
+
+def on_page_content(html, page, config, files):
+    if not _state["images"]:
+        return html
+    # img sources are relative to the page's url - "a/b/" with directory urls, "a/b.html" without
+    page_dir = (page.url[:-1] if page.url.endswith("/") else posixpath.dirname(page.url)) or "."
+
+    def replace(match):
+        source = match.group("src")
+        if "://" in source or source.startswith(("data:", "/")):
+            return match.group(0)
+        entry = _state["images"].get(posixpath.normpath(posixpath.join(page_dir, source)))
+        if entry is None or len(entry["variants"]) == 0:
+            return match.group(0)
+        _state["used"].update(v["file"] for v in entry["variants"])
+        return picture(match.group(0), entry, page_dir)
+
+    return image_tag_pattern.sub(replace, html)
+
+
+def on_post_build(config):
+    if not _state["used"]:
+        return
+    target_dir = os.path.join(config.site_dir, variants_url)
+    os.makedirs(target_dir, exist_ok=True)
+    for name in sorted(_state["used"]):
+        shutil.copyfile(os.path.join(_state["stage"].variants_dir, name), os.path.join(target_dir, name))
+    log.info(f"images: {len(_state['used'])} variants copied to {variants_url}/")
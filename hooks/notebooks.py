@@ -0,0 +1,147 @@
+# mkdocs hooks (see hooks: in mkdocs.yml) - build straight from the notebooks
+#
+# before each build only notebooks whose content changed since their last conversion are converted (the conversion
+# manifest in .docs_cache/), and rendered page html is served from .docs_cache/rendered/ when neither the page's
+# markdown nor the theme / config / file list changed. pages linking to a heading on a reconverted page are always
+# re-rendered, and the links of a page served from the cache are validated against the build's files and anchors after
+# the build, as mkdocs would have while rendering it.
+# without nbconvert (e.g., a host that installs only docs/requirements.txt) the markdown already in docs/ is built as is.
+# under mkdocs serve every toc notebook is watched, so saving a notebook rebuilds with one conversion and one render
+#
+#   mkdocs serve
+#   mkdocs build
+import os
+import sys
+import time
+import hashlib
+import logging
+import importlib.util
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities import base_dir  # noqa: E402
+from utilities.converter import convert_notebooks, toc_notebook_paths  # noqa: E402
+from utilities.doc_index import DocIndex  # noqa: E402
+from utilities.render_cache import RenderCache, context_hash, link_problems, linking_pages, page_key  # noqa: E402
+
+log = logging.getLogger("mkdocs.hooks.notebooks")
+
+_state = {
+    "cache": RenderCache(),
+    "config": None,
+    "context": None,
+    "stale": set(),
+    "used": set(),
+    "hits": {},
+    "files": set(),
+    "anchors": {},
+    "cached": {},
+}
+
+
+def package_versions() -> dict:
+    from importlib.metadata import version, PackageNotFoundError
+
+    versions = {}
+    for name in ["mkdocs", "mkdocs-material", "markdown", "pymdown-extensions"]:
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def toc_tokens(toc) -> list:
+    # a page's TableOfContents as the markdown toc extension's tokens, so get_toc can rebuild it from the cache
+    return [{"level": v.level, "id": v.id, "name": v.title, "children": toc_tokens(v.children)} for v in toc]
+
+
+def toc_anchors(tokens: list) -> set:
+    return {v["id"] for v in tokens} | {k for v in tokens for k in toc_anchors(v["children"])}
+
+
+def validation_level(config, name: str) -> int:
+    # mkdocs' validation.links setting for not_found / anchors - warn / info when this mkdocs has no such setting
+    try:
+        return getattr(config.validation.links, name)
+    except AttributeError:
+        return logging.WARNING if name == "not_found" else logging.INFO
+
+
+def on_config(config):
+    _state["config"] = context_hash(config.config_file_path, extra=package_versions())
+    return config
+
+
+def on_pre_build(config):
+    _state["stale"] = set()
+    _state["used"] = set()
+    _state["anchors"] = {}
+    _state["cached"] = {}
+    if importlib.util.find_spec("nbconvert") is None:
+        log.warning("nbconvert is not installed - building the markdown already in docs/ without converting notebooks")
+        return
+    start = time.perf_counter()
+    results = convert_notebooks(toc_notebook_paths(), remove=True)
+    failed = [v for v in results if not v["success"]]
+    for v in failed:
+        log.error(f"converting {os.path.relpath(v['docpath'], base_dir)} failed - {v['error']}")
+    converted = {os.path.relpath(v["markdown"], config.docs_dir) for v in results if v["success"] and not v.get("skipped")}
+    # a page linking to a heading on a reconverted one is rendered again - its links are checked against the new anchors
+    _state["stale"] = converted | linking_pages(DocIndex(root=base_dir, remove=True), converted) if converted else set()
+    log.info(f"converted {len(converted)} of {len(results)} notebooks in {time.perf_counter() - start:.2f}s")
+
+
+def on_files(files, config):
+    # a page's links resolve against every file in the build - adding or removing one renders every page again
+    _state["files"] = {v.src_uri for v in files}
+    pages = sorted(v for v in _state["files"] if v.endswith(".md"))
+    _state["context"] = hashlib.sha256("\n".join([_state["config"], *pages]).encode()).hexdigest()
+    return files
+
+
+def on_page_markdown(markdown, page, config, files):
+    page_path = page.file.src_uri
+    key = page_key(page_path, markdown, _state["context"])
+    _state["used"].add(key)
+    _state["hits"].pop(page_path, None)
+    if page_path not in _state["stale"]:
+        entry = _state["cache"].get(key)
+        if entry is not None:
+            # nothing to render - the cached html replaces the (empty) rendered content in on_page_content, and the
+            # page's links are validated in on_post_build, once every page's anchors are known
+            _state["hits"][page_path] = entry
+            _state["cached"][page_path] = markdown
+            return ""
+    page.render_cache_key = key
+    return markdown
+
+
+def on_page_content(html, page, config, files):
+    entry = _state["hits"].pop(page.file.src_uri, None)
+    if entry is not None:
+        from mkdocs.structure.toc import get_toc
+
+        page.toc = get_toc(entry["toc"])
+        page.present_anchor_ids = _state["anchors"][page.file.src_uri] = toc_anchors(entry["toc"])
+        return entry["html"]
+    tokens = toc_tokens(page.toc)
+    _state["anchors"][page.file.src_uri] = toc_anchors(tokens)
+    _state["cache"].put(page.render_cache_key, html, tokens)
+    return html
+
+
+def on_post_build(config):
+    for page_path, markdown in sorted(_state["cached"].items()):
+        for kind, message in link_problems(markdown, page_path, _state["files"], _state["anchors"]):
+            log.log(validation_level(config, kind), message)
+    cache = _state["cache"]
+    removed = cache.prune(_state["used"])
+    log.info(f"pages: {cache.hits} from the render cache, {len(_state['used']) - cache.hits} rendered, {removed} stale cache entries removed")
+    cache.hits = cache.misses = 0
+
+
+def on_serve(server, config, builder):
+    # notebooks are what gets edited - watch each one so saving it triggers a rebuild
+    for docpath in toc_notebook_paths():
+        server.watch(docpath)
+    return server
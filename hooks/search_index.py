@@ -0,0 +1,41 @@
+# mkdocs hooks (see hooks: in mkdocs.yml) - the site's search index, built once per build instead of in the browser
+#
+# pages are tokenized from their notebooks with code outputs and remove_output cells left out, and written as one
+# gzipped shard per top level nav section into site/search/ (see utilities/search_index.py). the client
+# (overrides/assets/javascripts/sharded_search.js) fetches the manifest when the search box is first used, then the
+# current page's section and the other sections after it. with mkdocs-material's search plugin in plugins: (the site's
+# search before this hook) neither the index nor the search box is added
+#
+#   mkdocs build
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.search_index import build_search_index  # noqa: E402
+
+log = logging.getLogger("mkdocs.hooks.search_index")
+
+# largest pages logged after each build
+report_top = 5
+
+
+def builtin_search(config) -> bool:
+    return any(v in config.plugins for v in ["search", "material/search"])
+
+
+def on_post_build(config):
+    if builtin_search(config):
+        log.info("search index: the search plugin is configured - the sharded index is not built")
+        return
+    start = time.perf_counter()
+    report = build_search_index(config["nav"], os.path.join(config.site_dir, "search"), config.docs_dir, config.use_directory_urls)
+    raw_bytes = sum(v["raw_bytes"] for v in report["shards"])
+    compressed_bytes = sum(v["bytes"] for v in report["shards"])
+    log.info(
+        f"search index: {len(report['pages'])} pages in {len(report['shards'])} shards, {raw_bytes:,} bytes "
+        + f"({compressed_bytes:,} gzipped) in {time.perf_counter() - start:.2f}s"
+    )
+    for v in report["pages"][:report_top]:
+        log.info(f"search index: {v['page']} - {v['sections']} sections, {v['bytes']:,} bytes")
@@ -0,0 +1,200 @@
+// search box for the prebuilt, sharded index written by hooks/search_index.py
+//
+// nothing is downloaded until the search box is first focused - then search/manifest.json, the shard of the current
+// page's nav section, and the other shards after it. shards are gzipped json, decompressed by the browser; results
+// are shown from the shards loaded so far and refreshed as the rest arrive. a shard that fails to load is skipped and
+// named under the results, and a manifest that fails to load leaves a message in place of results
+(function () {
+  const base = new URL((document.currentScript.dataset.base || ".") + "/", location.href);
+  const maxResults = 10;
+  let manifest = null;
+  let pattern = null;
+  let stopWords = null;
+  const shards = [];
+  // sections whose shard could not be loaded - searched without them, and named under the results
+  const failed = [];
+
+  function fetchJson(path) {
+    return fetch(new URL("search/" + path, base))
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error(`search index ${path}: ${response.status}`);
+        }
+        return response.arrayBuffer();
+      })
+      .then((buffer) => {
+        // a host serving .json.gz with Content-Encoding: gzip has the browser decompress it already - only a body
+        // still starting with the gzip magic bytes is decompressed here
+        const bytes = new Uint8Array(buffer);
+        if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+          return new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"))).json();
+        }
+        return JSON.parse(new TextDecoder().decode(bytes));
+      });
+  }
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(pattern) || []).filter((v) => v.length > 1 && !stopWords.has(v));
+  }
+
+  function load(onShard) {
+    if (manifest === null) {
+      manifest = fetchJson("manifest.json")
+        .then((loaded) => {
+          pattern = new RegExp(loaded.token_pattern, "gu");
+          stopWords = new Set(loaded.stop_words);
+          // the current page's section first - it is the likeliest place for what is being searched
+          const here = decodeURI(location.pathname).slice(decodeURI(base.pathname).length);
+          const ordered = loaded.shards.slice().sort((a, b) => b.pages.includes(here) - a.pages.includes(here));
+          ordered
+            .reduce(
+              (previous, shard) =>
+                previous.then(() =>
+                  fetchJson(shard.file)
+                    .then(
+                      (loadedShard) => shards.push(loadedShard),
+                      (error) => {
+                        failed.push(shard.section);
+                        console.warn(error);
+                      }
+                    )
+                    .then(onShard)
+                ),
+              Promise.resolve()
+            )
+            .catch((error) => console.warn(error));
+          return loaded;
+        })
+        .catch((error) => {
+          // tried again the next time the search box is focused
+          manifest = null;
+          throw error;
+        });
+    }
+    return manifest;
+  }
+
+  function search(query) {
+    const tokens = tokenize(query);
+    if (tokens.length === 0) {
+      return [];
+    }
+    const results = [];
+    for (const shard of shards) {
+      // doc -> [query tokens matched, score]; the last token also matches as a prefix while it is being typed
+      const scores = new Map();
+      tokens.forEach((token, position) => {
+        const last = position === tokens.length - 1;
+        const matches = last ? Object.keys(shard.terms).filter((v) => v.startsWith(token)) : [token];
+        const seen = new Set();
+        for (const term of matches) {
+          const postings = shard.terms[term] || [];
+          const weight = term === token ? 1 : 0.5;
+          for (let i = 0; i < postings.length; i += 2) {
+            const score = scores.get(postings[i]) || [0, 0];
+            if (!seen.has(postings[i])) {
+              seen.add(postings[i]);
+              score[0] += 1;
+            }
+            score[1] += postings[i + 1] * weight;
+            scores.set(postings[i], score);
+          }
+        }
+      });
+      for (const [doc, score] of scores) {
+        results.push({ doc: shard.docs[doc], matched: score[0], score: score[1] });
+      }
+    }
+    results.sort((a, b) => b.matched - a.matched || b.score - a.score);
+    return results.slice(0, maxResults);
+  }
+
+  function render(list, results, note) {
+    const items = results.map((result) => {
+      const [location, title, pageTitle] = result.doc;
+      const link = document.createElement("a");
+      link.href = new URL(location, base).href;
+      link.className = "sharded-search__result";
+      const heading = document.createElement("span");
+      heading.className = "sharded-search__title";
+      heading.textContent = title || pageTitle;
+      link.appendChild(heading);
+      if (title && title !== pageTitle) {
+        const page = document.createElement("span");
+        page.className = "sharded-search__page";
+        page.textContent = pageTitle;
+        link.appendChild(page);
+      }
+      const item = document.createElement("li");
+      item.appendChild(link);
+      return item;
+    });
+    if (note) {
+      const message = document.createElement("li");
+      message.className = "sharded-search__message";
+      message.textContent = note;
+      items.push(message);
+    }
+    list.replaceChildren(...items);
+    list.hidden = items.length === 0;
+  }
+
+  function mount() {
+    const header = document.querySelector(".md-header__inner");
+    if (header === null) {
+      return;
+    }
+    const form = document.createElement("form");
+    form.className = "sharded-search";
+    form.setAttribute("role", "search");
+    const input = document.createElement("input");
+    input.className = "sharded-search__input";
+    input.type = "search";
+    input.placeholder = "Search";
+    input.setAttribute("aria-label", "Search");
+    input.autocomplete = "off";
+    const list = document.createElement("ol");
+    list.className = "sharded-search__results";
+    list.hidden = true;
+    form.append(input, list);
+    header.appendChild(form);
+
+    let timer = null;
+    const update = () => {
+      if (pattern !== null) {
+        const note = failed.length > 0 && input.value.trim() !== "" ? `Not searched: ${failed.join(", ")} - the search index could not be loaded` : null;
+        render(list, search(input.value), note);
+      }
+    };
+    input.addEventListener("focus", () =>
+      load(update)
+        .then(update)
+        .catch((error) => {
+          console.warn(error);
+          render(list, [], "Search is unavailable - the search index could not be loaded");
+        })
+    );
+    input.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(update, 100);
+    });
+    form.addEventListener("submit", (event) => {
+      event.preventDefault();
+      const first = list.querySelector("a");
+      if (first !== null) {
+        location.href = first.href;
+      }
+    });
+    document.addEventListener("click", (event) => {
+      if (!form.contains(event.target)) {
+        list.hidden = true;
+      }
+    });
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", mount);
+  } else {
+    mount();
+  }
+})();
@@ -6,5 +6,18 @@ ruff check docs/ --fix
 
 PYTHONPATH=. python3.10 -m pytest tests/test_2_toc_file_check.py
 PYTHONPATH=. python3.10 -m pytest tests/test_3_headers.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_4_url_check.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_7_api_standin.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_7_notebook_runner.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_1_output_stage.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_1_imports.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_1_instrumentation.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_1_render_cache.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_1_affected_pages.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_1_search_index.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_2_page_pipeline.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_4_tokenizer.py -x
 PYTHONPATH=. python3.10 -m pytest tests/test_4_links.py -s -x
-PYTHONPATH=. python3.10 -m pytest tests/test_5_names.py -x
\ No newline at end of file
+PYTHONPATH=. python3.10 -m pytest tests/test_5_names.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_8_pipeline_configs.py -x
+PYTHONPATH=. python3.10 -m pytest tests/test_9_images.py -x
\ No newline at end of file
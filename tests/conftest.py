@@ -0,0 +1,102 @@
+import os
+import pytest
+from utilities.doc_index import get_doc_index, configure_doc_index
+
+# --timing-report / --timing-budgets / --timing-profile
+pytest_plugins = ["utilities.timing_plugin"]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--force-convert", action="store_true", default=False, help="reconvert every notebook, ignoring the conversion manifest")
+    parser.addoption(
+        "--from-notebooks", action="store_true", default=False, help="run checks against the .ipynb files directly - no markdown conversion needed"
+    )
+    parser.addoption("--links-offline", action="store_true", default=False, help="do not hit the network - only report cached external link results")
+    parser.addoption(
+        "--affected-since", default=None, metavar="REV", help="run per-page checks only on pages affected by changes since git revision REV"
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("from_notebooks"):
+        configure_doc_index(source="notebook")
+    if config.getoption("links_offline"):
+        from utilities.link_check import configure_link_checker
+
+        configure_link_checker(offline=True)
+    # None runs every toc page
+    config.affected_pages = None
+    since = config.getoption("affected_since")
+    if since:
+        from utilities.affected_pages import affected_since
+
+        try:
+            config.affected_pages = affected_since(since)
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+
+
+def pytest_report_header(config):
+    if config.affected_pages is not None:
+        return f"affected pages since {config.getoption('affected_since')}: {len(config.affected_pages)} of {len(get_doc_index().toc)}"
+
+
+def pytest_generate_tests(metafunc):
+    # every per-page test is parametrized from the one toc parse of this process
+    # - with --affected-since, only pages affected by the diff
+    if "docfile" in metafunc.fixturenames:
+        affected = metafunc.config.affected_pages
+        metafunc.parametrize("docfile", [v for v in get_doc_index().toc if affected is None or v in affected])
+
+
+def pytest_collection_modifyitems(config, items):
+    # checks only wait on the no-remove conversion when this session runs it - otherwise they read what is on disk
+    config.converts_no_remove = any("no_remove_conversion" in item.fixturenames for item in items)
+
+
+def convert_toc_notebooks(config, remove: bool) -> dict:
+    """convert every toc notebook once per session, whichever pytest-xdist worker gets there first
+
+    with --affected-since only the notebooks behind affected pages are converted. the conversion runs under a cache lock (across a process pool for a large batch); workers arriving later wait on the lock and find
+    every notebook fresh in the manifest - with --force-convert only the first worker of a test run reconverts
+    """
+    from utilities import base_dir, cache_dir
+    from utilities.converter import convert_notebooks, toc_notebook_paths
+    from utilities.conversion_cache import cache_lock, mode_name
+
+    mode = mode_name(remove)
+    run_id = getattr(config, "workerinput", {}).get("testrunuid")
+    forced_path = os.path.join(cache_dir, f"forced_{mode}")
+    docpaths = toc_notebook_paths()
+    if config.affected_pages is not None:
+        docpaths = [v for v in docpaths if os.path.relpath(v, os.path.join(base_dir, "docs")).replace(".ipynb", ".md") in config.affected_pages]
+    with cache_lock(f"convert_{mode}"):
+        force = config.getoption("force_convert")
+        if force and run_id is not None:
+            if os.path.isfile(forced_path):
+                with open(forced_path, "r") as file:
+                    force = file.read() != run_id
+            with open(forced_path, "w") as file:
+                file.write(run_id)
+        results = convert_notebooks(docpaths, remove=remove, force=force)
+    return {v["docpath"]: v for v in results}
+
+
+@pytest.fixture(scope="session")
+def no_remove_conversion(pytestconfig):
+    """results of converting every toc notebook with remove_cell tags ignored, keyed by notebook path"""
+    return convert_toc_notebooks(pytestconfig, remove=False)
+
+
+@pytest.fixture(scope="session")
+def remove_conversion(pytestconfig):
+    """results of the final conversion into docs/, keyed by notebook path"""
+    return convert_toc_notebooks(pytestconfig, remove=True)
+
+
+@pytest.fixture(scope="session")
+def doc_index(request):
+    """toc and parsed pages shared by every test in the session (per pytest-xdist worker)"""
+    if getattr(request.config, "converts_no_remove", False) and not request.config.getoption("from_notebooks"):
+        request.getfixturevalue("no_remove_conversion")
+    return get_doc_index()
@@ -8,15 +8,28 @@ python3.10 -m pytest tests/test_0_cleanup.py -x
 python3.10 -m pytest tests/test_1_conversion_no_remove.py -x
 python3.10 -m pytest tests/test_2_toc_file_check.py -x
 python3.10 -m pytest tests/test_3_headers.py -x
+python3.10 -m pytest tests/test_4_url_check.py -x
+python3.10 -m pytest tests/test_1_output_stage.py -x
+python3.10 -m pytest tests/test_1_imports.py -x
+python3.10 -m pytest tests/test_1_instrumentation.py -x
+python3.10 -m pytest tests/test_1_render_cache.py -x
+python3.10 -m pytest tests/test_1_affected_pages.py -x
+python3.10 -m pytest tests/test_1_search_index.py -x
+python3.10 -m pytest tests/test_2_page_pipeline.py -x
+python3.10 -m pytest tests/test_4_tokenizer.py -x
 python3.10 -m pytest tests/test_4_links.py -x
 python3.10 -m pytest tests/test_5_names.py -x
 python3.10 -m pytest tests/test_6_data.py -x
+python3.10 -m pytest tests/test_8_pipeline_configs.py -x
 python3.10 -m pytest tests/test_7_reset.py -x
+python3.10 -m pytest tests/test_7_api_standin.py -x
+python3.10 -m pytest tests/test_7_notebook_runner.py -x
 
 # run test 7 - execute notebooks
 # python3.10 -m pytest --nbmake docs/ --nbmake-timeout=1000 -n=auto -x
 
 # run test 1 again - convert to markdown for final time
 python3.10 -m pytest tests/test_9_conversion_remove.py -x
+python3.10 -m pytest tests/test_9_images.py -x
 python3.10 -m pytest tests/test_2_toc_file_check.py -x
 
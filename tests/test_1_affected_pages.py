@@ -0,0 +1,49 @@
+import pytest
+from utilities.affected_pages import affected_pages, changed_files, dependency_graph
+
+
+def test_1(tmp_path):
+    """a change affects its own page, pages reading the changed data / config, and pages linking to its headings"""
+    from utilities.doc_index import DocIndex
+
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "data" / "input").mkdir(parents=True)
+    (tmp_path / "configs").mkdir()
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\n  - b.md\n  - c.md\n  - d.md\n")
+    (tmp_path / "docs" / "a.md").write_text("# a\n\n## one\n")
+    (tmp_path / "docs" / "b.md").write_text("# b\n\nsee [one](a.md#one)\n")
+    (tmp_path / "docs" / "c.md").write_text('# c\n\nsee [a](a.md)\n\n```python\npipeline.process(local_file_path=data_dir + "input/x.txt")\n```\n')
+    (tmp_path / "docs" / "d.md").write_text('# d\n\n```python\nkrixik.create_pipeline(name="shared")\n```\n')
+    (tmp_path / "configs" / "shared.yml").write_text("pipeline:\n  name: shared\n  modules: []\n")
+    index = DocIndex(root=str(tmp_path))
+    graph = dependency_graph(index, data_directory=str(tmp_path / "data"), config_dir=str(tmp_path / "configs"))
+
+    assert affected_pages({"docs/a.ipynb": "M"}, index, graph) == {"a.md", "b.md"}
+    assert affected_pages({"docs/a.md": "D"}, index, graph) == {"a.md", "b.md", "c.md"}
+    assert affected_pages({"data/input/x.txt": "D"}, index, graph) == {"c.md"}
+    assert affected_pages({"configs/shared.yml": "M"}, index, graph) == {"d.md"}
+    assert affected_pages({"README.md": "M", "benchmarks/x.py": "A"}, index, graph) == set()
+    assert affected_pages({"utilities/link_check.py": "M"}, index, graph) == {"a.md", "b.md", "c.md", "d.md"}
+
+
+def test_2(tmp_path):
+    """changed files since a revision include renames, deletions and untracked files"""
+    import subprocess
+
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=docs", "-c", "user.email=docs@example.com", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    (tmp_path / "docs").mkdir()
+    for name in ["a.md", "b.md", "c.md"]:
+        (tmp_path / "docs" / name).write_text(f"# {name}\n\n" + "a long enough body to be detected as a rename\n" * 5)
+    git("add", ".")
+    git("commit", "-q", "-m", "pages")
+    (tmp_path / "docs" / "a.md").write_text("# a\n")
+    (tmp_path / "docs" / "b.md").unlink()
+    git("mv", "docs/c.md", "docs/e.md")
+    (tmp_path / "docs" / "f.md").write_text("# f\n")
+
+    assert changed_files("HEAD", str(tmp_path)) == {"docs/a.md": "M", "docs/b.md": "D", "docs/c.md": "D", "docs/e.md": "A", "docs/f.md": "A"}
+    with pytest.raises(ValueError, match="no-such-revision"):
+        changed_files("no-such-revision", str(tmp_path))
@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import subprocess
+from utilities import base_dir
+
+# a check module must import in under this share of the time requests - one of the packages it defers - takes on the
+# same machine, so the budget scales with the runner. about 0.15 here; IMPORT_BUDGET_RATIO overrides it
+import_budget_ratio = float(os.getenv("IMPORT_BUDGET_RATIO", "0.5"))
+baseline_module = "requests"
+# each time is the best of this many cold starts, so one slow start on a busy runner does not fail the test
+import_runs = 3
+check_modules = [
+    "utilities.header_check",
+    "utilities.link_check",
+    "utilities.name_check",
+    "utilities.data_check",
+    "utilities.reset_check",
+    "utilities.toc_file_check",
+    "utilities.pipeline_config",
+    "utilities.image_check",
+]
+# only the stage that needs one of these imports it
+deferred_modules = ["yaml", "nbconvert", "nbformat", "markdown", "requests", "sqlite3", "numpy", "multiprocessing", "concurrent.futures"]
+# what importing a check or test module must not read
+data_paths = [os.path.join(base_dir, v) for v in ["docs", "data", "pipeline_config_examples", "mkdocs.yml", ".docs_cache"]]
+
+
+def run_python(*arguments: str) -> subprocess.CompletedProcess:
+    run = subprocess.run([sys.executable, *arguments], cwd=base_dir, env=dict(os.environ, PYTHONPATH=base_dir), capture_output=True, text=True)
+    assert run.returncode == 0, run.stderr
+    return run
+
+
+def import_times(module: str) -> dict:
+    # module -> cumulative import seconds, from python -X importtime
+    times = {}
+    for line in run_python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def best_import_time(module: str) -> float:
+    return min(import_times(module)[module] for _ in range(import_runs))
+
+
+def test_1():
+    """importing a single check is fast next to requests and leaves yaml, nbconvert, requests and the process pool for
+    first use
+    """
+    budget = import_budget_ratio * best_import_time(baseline_module)
+    for module in check_modules:
+        times = import_times(module)
+        eager = [v for v in deferred_modules if v in times]
+        assert eager == [], f"importing {module} also imports {eager}"
+        if times[module] >= budget:
+            times[module] = best_import_time(module)
+        assert times[module] < budget, (
+            f"importing {module} took {times[module]:.3f}s - over {import_budget_ratio} x {baseline_module} ({budget:.3f}s)"
+        )
+
+
+def test_2():
+    """importing the checks and the test modules reads no pages, toc, data or caches"""
+    modules = check_modules + ["utilities.page_pipeline", "tests.test_3_headers", "tests.test_4_tokenizer", "tests.test_8_pipeline_configs"]
+    code = (
+        "import sys, json\n"
+        "touched = []\n"
+        "def hook(event, args):\n"
+        "    if event in ('open', 'os.listdir', 'os.scandir') and args and isinstance(args[0], str):\n"
+        "        touched.append(args[0])\n"
+        "sys.addaudithook(hook)\n"
+        f"for module in {modules!r}:\n"
+        "    __import__(module)\n"
+        "print(json.dumps(touched))\n"
+    )
+    touched = json.loads(run_python("-c", code).stdout.splitlines()[-1])
+    read = sorted({v for v in touched if any(os.path.abspath(v).startswith(p) for p in data_paths)})
+    assert read == [], f"imports read {read}"
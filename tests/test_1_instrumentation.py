@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import subprocess
+from utilities import base_dir
+from utilities import instrumentation
+
+
+def test_1(monkeypatch):
+    """stage timings add up across processes and the slowest items and blown budgets are reported"""
+    for name in ["_stages", "_items", "_counters"]:
+        monkeypatch.setattr(instrumentation, name, {})
+    instrumentation.record("link", 2.0, "https://a")
+    instrumentation.record("link", 0.5, "https://b")
+    instrumentation.count("link_cache_hits", 3)
+    worker = instrumentation.snapshot()
+    instrumentation.merge(worker)
+    with instrumentation.timed("parse", "a.md"):
+        pass
+    data = instrumentation.snapshot()
+    assert data["stages"]["link"] == {"count": 4, "total": 5.0, "max": 2.0}
+    assert data["counters"] == {"link_cache_hits": 6}
+    assert instrumentation.slowest(data, "link", 1) == [{"item": "https://a", "seconds": 4.0}]
+    assert data["stages"]["parse"]["count"] == 1
+    assert instrumentation.over_budget(data, {"link": 4.5, "parse": 60}) == [{"stage": "link", "seconds": 5.0, "budget": 4.5}]
+
+
+def test_2(tmp_path):
+    """the pytest plugin writes a json report with per-page times, and fails the session on a blown budget"""
+    (tmp_path / "test_pages.py").write_text(
+        "import time, pytest\n"
+        "from utilities.instrumentation import timed\n\n"
+        "@pytest.mark.parametrize('docfile', ['a.md', 'b.md'])\n"
+        "def test_page(docfile):\n"
+        "    with timed('check', docfile):\n"
+        "        time.sleep(0.2 if docfile == 'b.md' else 0)\n"
+    )
+    (tmp_path / "budgets.json").write_text(json.dumps({"check": 0.05}))
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "utilities.timing_plugin", "test_pages.py"]
+    command += ["--timing-report", "report.json", "--timing-budgets", "budgets.json", "--timing-profile", "tracemalloc"]
+    run = subprocess.run(command, cwd=tmp_path, env=dict(os.environ, PYTHONPATH=base_dir), capture_output=True, text=True)
+    assert run.returncode == 1, run.stdout + run.stderr
+    assert "OVER BUDGET: check" in run.stdout
+    with open(tmp_path / "report.json", "r") as file:
+        report = json.load(file)
+    assert [v["item"] for v in report["slowest"]["pages"]] == ["b.md", "a.md"]
+    assert report["stages"]["check"]["count"] == 2
+    assert report["over_budget"][0]["stage"] == "check"
+    assert report["profile"]["mode"] == "tracemalloc" and report["profile"]["peak_bytes"] > 0
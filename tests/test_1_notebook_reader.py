@@ -0,0 +1,35 @@
+import json
+import pytest
+from utilities.converter import toc_notebook_paths
+from utilities.notebook_reader import load_notebook_cells, strip_outputs
+
+
+@pytest.mark.parametrize("notebook_path", toc_notebook_paths())
+def test_1(notebook_path):
+    """cells read with outputs skipped match the fully parsed notebook"""
+    with open(notebook_path, "r", encoding="utf-8") as file:
+        notebook = json.load(file)
+    expected = [(c["cell_type"], "".join(c["source"]), tuple(c["metadata"].get("tags", []))) for c in notebook["cells"]]
+    assert load_notebook_cells(notebook_path) == expected
+    assert load_notebook_cells(notebook_path, remove=True) == [v for v in expected if "remove_cell" not in v[2]]
+
+
+def test_2():
+    """brackets and "outputs" keys inside strings do not confuse the output skipper"""
+    text = json.dumps({"cells": [{"source": ['"outputs": [', "]]"], "outputs": [{"text": ["[", "}", '"outputs": ['], "data": {"outputs": []}}]}]})
+    assert json.loads(strip_outputs(text)) == {"cells": [{"source": ['"outputs": [', "]]"], "outputs": []}]}
+
+
+def test_3(tmp_path):
+    """outputs are skipped the same wherever chunk boundaries fall - inside a key, a string or an escape"""
+    cells = [
+        {"cell_type": "code", "metadata": {}, "source": ['print("a\\"b")'], "outputs": [{"text": ['x\\"]' * 50, "{"], "data": {"outputs": [1]}}]}
+    ]
+    text = json.dumps({"cells": cells * 3 + [{"cell_type": "markdown", "metadata": {}, "source": ["# end"]}]})
+    expected = text.replace(json.dumps(cells[0]["outputs"]), "[]")
+    for chunk_size in [1, 2, 3, 5, 8, 13, len(text)]:
+        assert strip_outputs(text, chunk_size) == expected
+    with pytest.raises(ValueError):
+        strip_outputs(text[: text.index("{", text.index('"outputs"'))], 4)
+    (tmp_path / "a.ipynb").write_text(text)
+    assert load_notebook_cells(str(tmp_path / "a.ipynb"))[-1] == ("markdown", "# end", ())
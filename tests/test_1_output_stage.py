@@ -0,0 +1,52 @@
+import base64
+import pytest
+from utilities.output_stage import truncate_text, store_blob, output_stage_preprocessor, finish_output_stage
+
+
+def test_1():
+    """oversized text outputs keep their head and gain a show more marker"""
+    text = "".join(f"line {i}\n" for i in range(100))
+    truncated, was_truncated = truncate_text(text, max_lines=10)
+    assert was_truncated
+    assert truncated.splitlines()[:10] == text.splitlines()[:10]
+    assert truncated.splitlines()[-1].startswith("... [show more: 90 more lines")
+    assert truncate_text("short\n", max_lines=10) == ("short\n", False)
+    assert truncate_text("a\nb\nc\n", max_lines=1) == ("a\n... [show more: 2 more lines / 4 more characters in the notebook]\n", True)
+    assert truncate_text("abcdef", max_chars=3)[0].endswith("/ 3 more characters in the notebook]\n")
+
+
+def test_2(tmp_path):
+    """identical outputs are stored once under their content hash"""
+    first, first_new = store_blob(b"same bytes", ".png", str(tmp_path))
+    second, second_new = store_blob(b"same bytes", ".png", str(tmp_path))
+    assert first == second and first_new and not second_new
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_3(tmp_path):
+    """inline base64 media and extracted images are moved into the store and the page points at them"""
+    nbformat = pytest.importorskip("nbformat")
+    payload = base64.b64encode(b"fake audio").decode()
+    notebook = nbformat.v4.new_notebook()
+    cell = nbformat.v4.new_code_cell("print('x')")
+    cell.outputs = [
+        nbformat.v4.new_output("stream", name="stdout", text="".join(f"{i}\n" for i in range(50))),
+        nbformat.v4.new_output("display_data", data={"text/html": f'<audio><source src="data:audio/mpeg;base64,{payload}"></audio>'}),
+    ]
+    notebook.cells.append(cell)
+    markdown_path = str(tmp_path / "docs" / "page.md")
+    store_dir = str(tmp_path / "docs" / "img" / "outputs")
+    resources = {
+        "output_stage": {"options": {"max_output_lines": 5, "externalize_images": True}, "markdown_path": markdown_path, "store_dir": store_dir}
+    }
+    resources["outputs"] = {"page_files/page_1_0.png": b"fake png"}
+
+    notebook, resources = output_stage_preprocessor(notebook, resources)
+    assert "data:audio" not in notebook.cells[0].outputs[1].data["text/html"]
+    assert "img/outputs/" in notebook.cells[0].outputs[1].data["text/html"]
+    markdown = finish_output_stage("![png](page_files/page_1_0.png)", resources)
+    assert markdown.startswith("![png](img/outputs/") and resources["outputs"] == {}
+
+    report = resources["output_stage"]["report"]
+    assert report["truncated_outputs"] == 1 and len(resources["output_stage"]["stored"]) == 2
+    assert report["after"]["page_bytes"] < report["before"]["page_bytes"]
@@ -0,0 +1,54 @@
+from utilities.render_cache import RenderCache, context_hash, link_problems, linking_pages, page_key
+
+
+def test_1(tmp_path):
+    """cached html is returned for the same key and pruned once a build no longer uses it"""
+    cache = RenderCache(str(tmp_path / "rendered"))
+    first = page_key("a.md", "# a\n", "context")
+    second = page_key("b.md", "# b\n", "context")
+    assert cache.get(first) is None
+    cache.put(first, "<h1>a</h1>", [{"level": 1, "id": "a", "name": "a", "children": []}])
+    cache.put(second, "<h1>b</h1>", [])
+    assert cache.get(first)["html"] == "<h1>a</h1>"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert page_key("a.md", "# a!\n", "context") != first
+    assert cache.prune({second}) == 1
+    assert cache.get(first) is None and cache.get(second) is not None
+
+
+def test_2(tmp_path):
+    """the render context changes with mkdocs.yml, any theme override file, and extra"""
+    config = tmp_path / "mkdocs.yml"
+    config.write_text("site_name: a\n")
+    (tmp_path / "overrides" / "partials").mkdir(parents=True)
+    (tmp_path / "overrides" / "partials" / "footer.html").write_text("<footer></footer>")
+    theme_dir = str(tmp_path / "overrides")
+    context = context_hash(str(config), theme_dir)
+    assert context_hash(str(config), theme_dir) == context
+    assert context_hash(str(config), theme_dir, extra={"mkdocs": "1.6.0"}) != context
+    (tmp_path / "overrides" / "partials" / "footer.html").write_text("<footer>!</footer>")
+    assert context_hash(str(config), theme_dir) != context
+
+
+def test_3(tmp_path):
+    """only pages linking to a heading on a changed page are re-rendered with it"""
+    from utilities.doc_index import DocIndex
+
+    (tmp_path / "docs" / "b").mkdir(parents=True)
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\n  - b/b.md\n  - b/c.md\n  - d.md\n")
+    (tmp_path / "docs" / "a.md").write_text("# a\n\n## one\n")
+    (tmp_path / "docs" / "b" / "b.md").write_text("# b\n\nsee [one](../a.md#one)\n")
+    (tmp_path / "docs" / "b" / "c.md").write_text("# c\n\nsee [a](../a.md)\n")
+    (tmp_path / "docs" / "d.md").write_text("# d\n\nsee [b](b/b.md#b)\n")
+    index = DocIndex(root=str(tmp_path))
+    assert linking_pages(index, {"a.md"}) == {"b/b.md"}
+    assert linking_pages(index, {"a.md", "b/b.md"}) == {"d.md"}
+
+
+def test_4():
+    """links on a page served from the cache are checked against the build's files and anchors"""
+    markdown = "# b\n\n[one](../a.md#one) [two](../a.md#two) [gone](../gone.md) [self](#b) [out](https://a.com)\n\n![x](img/x.png)\n"
+    files = {"a.md", "b/b.md", "b/img/x.png"}
+    problems = link_problems(markdown, "b/b.md", files, {"a.md": {"one"}, "b/b.md": {"b"}})
+    assert [(v[0], v[1].split("'")[3]) for v in problems] == [("anchors", "../a.md#two"), ("not_found", "../gone.md")]
+    assert link_problems(markdown, "b/b.md", files | {"gone.md"}, {}) == []
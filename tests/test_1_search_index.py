@@ -0,0 +1,58 @@
+import gzip
+import json
+from utilities.search_index import build_search_index, nav_sections, page_url, split_sections
+
+
+def test_1():
+    """pages split into one section per heading, with text above the first heading kept on the page's first section and
+    anchors as mkdocs makes them
+    """
+    blocks = [("markdown", "[versión en español](a_español.md)\n# The `save_pipeline` Method\n\nintro\n")]
+    blocks += [("code", 'pipeline = krixik.create_pipeline(name="a")\n# not a heading\n')]
+    blocks += [("markdown", "## Using **keyword_search**\n\n```python\n# nor this\n```\n")]
+    blocks += [("markdown", "## What's new? (v1.2)\n\n## Using keyword_search\n")]
+    sections = split_sections(blocks, page_url("system/a.md"))
+    assert [(v.location, v.title) for v in sections] == [
+        ("system/a/", "The save_pipeline Method"),
+        ("system/a/#using-keyword_search", "Using keyword_search"),
+        ("system/a/#whats-new-v12", "What's new? (v1.2)"),
+        ("system/a/#using-keyword_search_1", "Using keyword_search"),
+    ]
+    assert "versión en español" in sections[0].text and "create_pipeline" in sections[0].text
+    assert nav_sections([{"Home": "index.md"}, {"Guide": [{"a": "a.md"}, {"more": [{"b": "b/b.md"}]}]}]) == {
+        "index.md": "Home",
+        "a.md": "Guide",
+        "b/b.md": "Guide",
+    }
+
+
+def test_2(tmp_path):
+    """each nav section gets a gzipped shard without code outputs or remove_output cells, and sizes are reported"""
+    docs = tmp_path / "docs"
+    (docs / "b").mkdir(parents=True)
+    cells = [
+        {"cell_type": "markdown", "metadata": {}, "source": ["# Alpha\n", "\n", "visible words"]},
+        {"cell_type": "code", "metadata": {"tags": ["remove_output"]}, "source": ["setup_only = 1"], "outputs": []},
+        {"cell_type": "code", "metadata": {"tags": ["remove_cell"]}, "source": ["hidden_cell = 1"], "outputs": []},
+        {
+            "cell_type": "code",
+            "metadata": {},
+            "source": ["print(shown_code)"],
+            "outputs": [{"output_type": "stream", "name": "stdout", "text": ["noisy transcript output"]}],
+        },
+    ]
+    (docs / "a.ipynb").write_text(json.dumps({"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}))
+    (docs / "a.md").write_text("# Alpha\n")
+    (docs / "b" / "b.md").write_text("# Beta\n\n## Details\n\nbeta words\n")
+    nav = [{"Home": "a.md"}, {"Guide pages": [{"beta": "b/b.md"}]}]
+
+    report = build_search_index(nav, str(tmp_path / "search"), str(docs))
+    manifest = json.loads((tmp_path / "search" / "manifest.json").read_text())
+    assert [(v["file"], v["pages"]) for v in manifest["shards"]] == [("shards/home.json.gz", ["a/"]), ("shards/guide-pages.json.gz", ["b/b/"])]
+    shard = json.loads(gzip.decompress((tmp_path / "search" / "shards" / "home.json.gz").read_bytes()))
+    assert shard["docs"] == [["a/", "Alpha", "Alpha"]]
+    assert {"visible", "words", "shown_code", "alpha"} <= set(shard["terms"])
+    assert {"setup_only", "hidden_cell", "noisy", "transcript"}.isdisjoint(shard["terms"])
+    assert shard["terms"]["alpha"] == [0, 5]
+    assert [v["page"] for v in report["pages"]] == ["b/b.md", "a.md"] and all(v["bytes"] > 0 for v in report["pages"])
+    assert all(0 < v["bytes"] < v["raw_bytes"] + 100 for v in report["shards"])
@@ -0,0 +1,64 @@
+import time
+import pytest
+import utilities.link_check
+from benchmarks.synthetic_tree import generate_tree, write_link_cache
+from utilities.doc_index import DocIndex
+from utilities.page_pipeline import PagePipeline, notebook_path
+from utilities.url_check import LinkChecker
+
+
+@pytest.fixture()
+def tree(tmp_path, monkeypatch):
+    summary = generate_tree(str(tmp_path), pages=20)
+    write_link_cache(str(tmp_path / "link_cache.json"), summary["outer_links"])
+    monkeypatch.setattr(utilities.link_check, "_link_checker", LinkChecker(offline=True, cache_path=str(tmp_path / "link_cache.json")))
+    return tmp_path
+
+
+def edit_page(tree, number: int, old: str, new: str) -> None:
+    path = tree / "docs" / f"section_0/page_{number}.md"
+    path.write_text(path.read_text().replace(old, new, 1))
+
+
+def run_pipeline(tree, conversions=None, report=None) -> dict:
+    pipeline = PagePipeline(DocIndex(root=str(tree)), directory=str(tree / "data"), config_dir=str(tree / "pipeline_config_examples"), report=report)
+    return pipeline.run(conversions)
+
+
+def test_1(tree):
+    """each check's problems are found page by page, and duplicate names / unused data by the reducers at the end"""
+    assert run_pipeline(tree, [])["failures"] == []
+    edit_page(tree, 2, "## Section 4 Setup", "## Section {4} Setup")
+    edit_page(tree, 4, "see also [here]", "see also [gone](missing_page.md) and [here]")
+    edit_page(tree, 5, "krixik.reset_pipeline(pipeline)", "print('done')")
+    edit_page(tree, 6, "synthetic_pipeline_6", "synthetic_pipeline_7")
+    (tree / "data" / "input" / "unused.txt").write_text("never read\n")
+    report = run_pipeline(tree, [])
+    found = sorted((v["check"], v["page"]) for v in report["failures"])
+    assert found == [
+        ("data", "input/unused.txt"),
+        ("headers", "section_0/page_2.md"),
+        ("links", "section_0/page_4.md"),
+        ("names", "section_0/page_6.md, section_0/page_7.md"),
+        ("reset", "section_0/page_5.md"),
+    ]
+    assert report["pages"] == 20 and report["warnings"] == []
+
+
+def test_2(tree):
+    """failures stream out while conversions are still landing, and failed conversions are reported against their page"""
+    edit_page(tree, 0, "## Section 4 Setup", "## Section {4} Setup")
+    index = DocIndex(root=str(tree))
+    finished = []
+
+    def slow_conversions():
+        for number, page in enumerate(index.toc):
+            time.sleep(0.02)
+            yield {"docpath": notebook_path(index, page), "success": number != 3, "error": None if number != 3 else "boom"}
+        finished.append(time.perf_counter())
+
+    streamed = []
+    report = run_pipeline(tree, slow_conversions(), report=lambda entry, warning: streamed.append((time.perf_counter(), entry)))
+    assert [v["check"] for _, v in streamed[:2]] == ["headers", "conversion"]
+    assert streamed[0][0] < finished[0]
+    assert {"check": "conversion", "page": "section_0/page_3.md", "problem": "boom"}.items() <= report["failures"][1].items()
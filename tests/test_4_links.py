@@ -1,19 +1,36 @@
-import pytest
-from utilities.converter import collect_mkdocks_toc
 from utilities.link_check import check_file_links, check_readme_links
 
 
-toc_files = collect_mkdocks_toc()
-
-
-@pytest.mark.parametrize("docfile", toc_files)
-def test_1(docfile):
+def test_1(docfile, doc_index):
     """success test that all links from each notebook are valid"""
-    dead_links = check_file_links(docfile, toc_files)
+    dead_links = check_file_links(docfile, index=doc_index)
     assert len(dead_links) == 0, f"doc {docfile} has deadlinks: {dead_links}"
 
 
-def test_2():
+def test_2(doc_index):
     """ test README links """
     dead_links = check_readme_links()
     assert len(dead_links) == 0, f"README has deadlines: {dead_links}"
+
+
+def test_3(tmp_path, monkeypatch):
+    """a generated synthetic tree (benchmarks/synthetic_tree.py) passes every check run against its own index"""
+    import utilities.link_check
+    from benchmarks.synthetic_tree import generate_tree, write_link_cache
+    from utilities.doc_index import DocIndex
+    from utilities.url_check import LinkChecker
+    from utilities.header_check import check_file_headers
+    from utilities.toc_file_check import compare_toc_to_docs
+    from utilities.name_check import duplicate_name_report
+    from utilities.data_check import data_link_report
+
+    summary = generate_tree(str(tmp_path), pages=30)
+    write_link_cache(str(tmp_path / "link_cache.json"), summary["outer_links"])
+    index = DocIndex(root=str(tmp_path))
+    assert len(index.toc) == 30
+    assert compare_toc_to_docs(index) == ([], [])
+    monkeypatch.setattr(utilities.link_check, "_link_checker", LinkChecker(offline=True, cache_path=str(tmp_path / "link_cache.json")))
+    assert [v for v in index.toc if check_file_links(v, index=index) or check_file_headers(v, index)] == []
+    assert duplicate_name_report(index, config_dir=str(tmp_path / "pipeline_config_examples"))["duplicates"] == {}
+    report = data_link_report(index, directory=str(tmp_path / "data"))
+    assert len(report["references"]) == 30 and all(len(v) == 0 for v in report["dead"].values()) and report["unused"] == []
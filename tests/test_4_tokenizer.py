@@ -0,0 +1,74 @@
+import collections
+import pytest
+from utilities import base_dir
+from utilities.doc_index import DocIndex
+from utilities.md_tokenizer import iter_markdown_tokens
+from utilities.utilities import extract_links_from_content, extract_headings_from_markdown
+
+_markdown_index = None
+
+
+def get_markdown_index() -> DocIndex:
+    # always compare against the markdown pages, whichever source the rest of the session reads from - built on first
+    # use, so importing this module reads nothing
+    global _markdown_index
+    if _markdown_index is None:
+        _markdown_index = DocIndex(source="markdown")
+    return _markdown_index
+
+
+def pytest_generate_tests(metafunc):
+    if "path" in metafunc.fixturenames:
+        metafunc.parametrize("path", [f"{base_dir}/docs/" + v for v in get_markdown_index().toc] + [f"{base_dir}/README.md"])
+
+
+@pytest.fixture(scope="module")
+def markdown_index():
+    return get_markdown_index()
+
+
+def test_1(path, markdown_index):
+    """tokenizer finds the same links as rendering the page to html"""
+    pytest.importorskip("markdown")
+    with open(markdown_index.source_path(path), "r", encoding="utf-8") as file:
+        markdown_content = file.read()
+    rendered = extract_links_from_content(markdown_content, path)
+    record = markdown_index.file(path)
+    for old, new in zip(rendered, [record.intra_links, record.inter_links, record.outer_links]):
+        assert collections.Counter(old) == collections.Counter(new), f"link mismatch in {path}"
+
+
+def test_2(path, markdown_index):
+    """anchor links resolve identically with tokenizer headings and extract_headings_from_markdown"""
+    record = markdown_index.file(path)
+    old_anchors = extract_headings_from_markdown(path)
+    for link in record.intra_links:
+        assert (link in old_anchors) == (link in record.anchors), f"{link} in {path}"
+    for link in record.inter_links:
+        if "#" not in link or link.split("#")[0][5:] not in markdown_index.toc:
+            continue
+        page, heading = link.split("#", 1)
+        target = markdown_index.file(f"{base_dir}/" + page)
+        assert ("#" + heading in extract_headings_from_markdown(target.path)) == ("#" + heading in target.anchors), f"{link} in {path}"
+
+
+def test_3():
+    """inline, reference-style and autolinks are found - fenced code, code spans and images are skipped"""
+    lines = [
+        "# Title",
+        "see [inline](a.md#x 'title'), [ref][r1], [r2] and <https://example.com>",
+        "![an image](img.png) and `[not a link](code.md)`",
+        "[![badge](badge.svg)](https://badge.example.com)",
+        "```python",
+        "# not a heading",
+        "[not a link](fenced.md)",
+        "```",
+        "## Second `heading`?",
+        "[r1]: https://r1.example.com",
+        '[r2]: <r2.md> "title"',
+    ]
+    tokens = list(iter_markdown_tokens(lines))
+    links = [v for k, v, _ in tokens if k == "link"]
+    headings = [v for k, v, _ in tokens if k == "heading"]
+    assert sorted(links) == sorted(["a.md#x", "https://r1.example.com", "r2.md", "https://example.com", "https://badge.example.com"])
+    assert headings == ["#title", "#second-heading"]
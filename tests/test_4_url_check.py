@@ -0,0 +1,86 @@
+import time
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utilities.url_check import LinkChecker, load_link_cache
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # /ok answers everything, /no-head refuses HEAD, anything else is missing
+    hits = []
+
+    def respond(self, with_body):
+        StubHandler.hits.append((self.command, self.path))
+        if self.path == "/ok" or (self.path == "/no-head" and self.command == "GET"):
+            status = 200
+        elif self.path == "/no-head":
+            status = 405
+        else:
+            status = 404
+        body = b"stub body"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def do_GET(self):
+        self.respond(True)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def hits():
+    StubHandler.hits.clear()
+    return StubHandler.hits
+
+
+def test_1(stub_url, hits, tmp_path):
+    """urls are deduplicated and checked with HEAD, falling back to GET"""
+    checker = LinkChecker(cache_path=str(tmp_path / "links.json"))
+    urls = [f"{stub_url}/ok", f"{stub_url}/no-head", f"{stub_url}/missing", f"{stub_url}/ok"]
+    results = checker.check(urls)
+    assert results[f"{stub_url}/ok"]["ok"] and results[f"{stub_url}/ok"]["method"] == "HEAD"
+    assert results[f"{stub_url}/no-head"]["ok"] and results[f"{stub_url}/no-head"]["method"] == "GET"
+    assert not results[f"{stub_url}/missing"]["ok"] and results[f"{stub_url}/missing"]["status"] == 404
+    assert sorted(hits) == sorted([("HEAD", "/ok"), ("HEAD", "/no-head"), ("GET", "/no-head"), ("HEAD", "/missing"), ("GET", "/missing")])
+
+
+def test_2(stub_url, hits, tmp_path):
+    """verified links are served from the on-disk cache until their ttl runs out"""
+    cache_path = str(tmp_path / "links.json")
+    LinkChecker(cache_path=cache_path).check([f"{stub_url}/ok", f"{stub_url}/missing"])
+    assert list(load_link_cache(cache_path).keys()) == [f"{stub_url}/ok"]
+    hits.clear()
+
+    results = LinkChecker(cache_path=cache_path).check([f"{stub_url}/ok"])
+    assert results[f"{stub_url}/ok"]["cached"] and len(hits) == 0
+
+    time.sleep(0.01)
+    results = LinkChecker(cache_path=cache_path, ttl=0.001).check([f"{stub_url}/ok"])
+    assert not results[f"{stub_url}/ok"]["cached"] and hits == [("HEAD", "/ok")]
+
+
+def test_3(stub_url, hits, tmp_path):
+    """offline mode only reports cached results"""
+    cache_path = str(tmp_path / "links.json")
+    LinkChecker(cache_path=cache_path).check([f"{stub_url}/ok"])
+    hits.clear()
+
+    results = LinkChecker(cache_path=cache_path, offline=True).check([f"{stub_url}/ok", f"{stub_url}/no-head"])
+    assert results[f"{stub_url}/ok"]["ok"] and results[f"{stub_url}/no-head"]["ok"] is None
+    assert len(hits) == 0
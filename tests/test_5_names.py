@@ -1,6 +1,53 @@
 from utilities.name_check import duplicate_name_check
 
 
-def test_1():
+def test_1(doc_index):
     """success test that pipeline names are unique per page"""
     assert duplicate_name_check()
+
+
+def test_2():
+    """create_pipeline names are found however the call is laid out, and only the call's own name argument counts"""
+    from utilities.code_analyzer import iter_pipeline_calls
+
+    block = 'pipeline = krixik.create_pipeline(\n    config=make(name="inner"),  # a ) in a comment\n    name="outer(1)",\n)\n'
+    block += '# krixik.create_pipeline(name="commented")\nkrixik.load_pipeline(config_path=data_dir + "configs/demo.yml")\n'
+    assert list(iter_pipeline_calls(block)) == [("create_pipeline", "outer(1)", 1), ("load_pipeline", "configs/demo.yml", 6)]
+
+
+def test_3(tmp_path):
+    """duplicates across pages and config examples are reported with their page, block and line"""
+    from utilities.doc_index import DocIndex
+    from utilities.name_check import duplicate_name_report
+
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "configs").mkdir()
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\n  - b.md\n")
+    (tmp_path / "docs" / "a.md").write_text('# a\n\n```python\nkrixik.create_pipeline(name="shared", module_chain=["parser"])\n```\n')
+    (tmp_path / "docs" / "b.md").write_text('# b\n\n```python\nx = 1\n```\n\n```python\npipeline = krixik.create_pipeline(\n    name="unique"\n)\n```\n')
+    (tmp_path / "configs" / "shared.yml").write_text("pipeline:\n  name: shared\n  modules: []\n")
+
+    report = duplicate_name_report(DocIndex(root=str(tmp_path)), config_dir=str(tmp_path / "configs"))
+    assert report["names"] == 2 and list(report["duplicates"]) == ["shared"]
+    sites = report["duplicates"]["shared"]
+    assert sites[0] == {"source": "a.md", "block": 0, "line": 1, "kind": "create_pipeline"}
+    assert sites[1]["kind"] == "config_example" and sites[1]["line"] == 2
+
+
+def test_4():
+    """the code analyzer reads names through variables, f-strings and single quotes, and falls back past magics"""
+    from utilities import code_analyzer
+
+    blocks = ['%pip install krixik\nsuffix = "demo"\ndata_dir = "../../data/"\nif colab:\n    data_dir = "./data/"\n']
+    blocks += ["pipeline = krixik.create_pipeline(\n    name=f'name-{suffix}',\n    module_chain=['parser'],\n)\n"]
+    blocks += ['pipeline.process(local_file_path=data_dir + "input/a.txt")\nother = krixik.create_pipeline(name=unknown + "x")\n']
+    blocks += ['x = !ls\nkrixik.create_pipeline(name="scanned")\nkrixik.reset_pipeline(pipeline)\n']
+    facts = code_analyzer.analyze_page(blocks)
+    assert [(v.argument, v.target, v.block, v.line) for v in facts.calls] == [
+        ("name-demo", "pipeline", 1, 1),
+        (None, "other", 2, 2),
+        ("scanned", None, 3, 2),
+    ]
+    assert ("input/a.txt", "local_file_path", 2, 1) in [tuple(v) for v in facts.paths]
+    assert [tuple(v) for v in facts.resets] == [("pipeline", 3, 3)] and facts.parsed is False
+    assert code_analyzer.analyze_block(blocks[1]) is code_analyzer.analyze_block(blocks[1][:9] + blocks[1][9:])
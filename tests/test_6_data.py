@@ -1,8 +1,89 @@
+import pytest
 from utilities.data_check import check_for_dead_data_links
 
 
-def test_1():
+def test_1(doc_index):
     """check for dead data links - both in pages and in /data/input/"""
     all_page_dead_links, all_data_dead_links = check_for_dead_data_links()
     assert len(all_page_dead_links) == 0, f"dead page data links found in these pages: {all_page_dead_links}"
     assert len(all_data_dead_links) == 0, f"dead /data/input/ links found: {all_data_dead_links}"
+
+
+def test_2(tmp_path):
+    """references resolve against a recursive index of data/ and unused inputs are listed largest first"""
+    from utilities.doc_index import DocIndex
+    from utilities.data_check import data_link_report
+
+    (tmp_path / "docs").mkdir()
+    for folder in ["input/nested", "output", "other"]:
+        (tmp_path / "data" / folder).mkdir(parents=True)
+    (tmp_path / "data" / "input" / "nested" / "used.txt").write_text("x")
+    (tmp_path / "data" / "input" / "big.mp3").write_bytes(b"0" * 100)
+    (tmp_path / "data" / "input" / "small.json").write_text("{}")
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\n")
+    code = 'pipeline.process(local_file_path=data_dir + "input/nested/used.txt")\n'
+    code += '# pipeline.process(local_file_path=data_dir + "input/commented.txt")\n'
+    code += 'files = ["../../data/output/missing.faiss", "input/gone.png"]\n'
+    (tmp_path / "docs" / "a.md").write_text(f"# a\n\n```python\n{code}```\n")
+
+    report = data_link_report(DocIndex(root=str(tmp_path)), directory=str(tmp_path / "data"))
+    assert [(v["path"], v["line"], v["exists"]) for v in report["references"]] == [
+        ("input/nested/used.txt", 1, True),
+        ("output/missing.faiss", 3, False),
+        ("input/gone.png", 3, False),
+    ]
+    assert [v["path"] for v in report["dead"]["output"]] == ["output/missing.faiss"]
+    assert report["unused"] == [{"path": "input/big.mp3", "bytes": 100}, {"path": "input/small.json", "bytes": 2}]
+
+
+def test_3():
+    """kept output artifacts are readable, not oversized, and hold exactly what the notebooks print"""
+    from utilities.artifact_check import build_artifact_manifest, displayed_output_report
+
+    manifest = build_artifact_manifest()
+    unreadable = {k: v["error"] for k, v in manifest.items() if v["error"]}
+    assert len(unreadable) == 0, f"unreadable artifacts in data/output/: {unreadable}"
+    report = displayed_output_report(manifest=manifest)
+    assert len(report["oversized"]) == 0, f"oversized artifacts in data/output/: {report['oversized']}"
+    assert len(report["mismatched"]) == 0, f"printed outputs not matching their artifact: {report['mismatched']}"
+
+
+def test_4(tmp_path):
+    """artifact metadata is read from headers and streams, and a printed output is checked against its artifact"""
+    import json
+    import sqlite3
+    import struct
+    from utilities.artifact_check import build_artifact_manifest, displayed_output_report
+
+    np = pytest.importorskip("numpy")
+    output = tmp_path / "output"
+    output.mkdir()
+    np.save(output / "a.npy", np.zeros((3, 4), dtype="float32"))
+    vectors = np.ones((3, 2), dtype="float32")
+    (output / "b.faiss").write_bytes(struct.pack("<4siqqqBiq", b"IxFI", 2, 3, 1 << 20, 1 << 20, 1, 0, 6) + vectors.tobytes())
+    (output / "truncated.faiss").write_bytes(struct.pack("<4siqqqBiq", b"IxFI", 2, 3, 1 << 20, 1 << 20, 1, 0, 6))
+    connection = sqlite3.connect(output / "c.db")
+    connection.execute("CREATE TABLE keyword_search (keyword TEXT)")
+    connection.executemany("INSERT INTO keyword_search VALUES (?)", [("a",), ("b",)])
+    connection.commit()
+    connection.close()
+    (output / "d.json").write_text(json.dumps([{"snippet": "one"}, {"snippet": "two"}]))
+    (output / "e.json").write_text(json.dumps([{"snippet": "one"}]))
+    (output / "big.txt").write_text("line\n" * 4000)
+
+    manifest = build_artifact_manifest(str(output), max_bytes=10000)
+    assert manifest["a.npy"]["shape"] == [3, 4] and manifest["a.npy"]["dtype"] == "float32"
+    assert (manifest["b.faiss"]["vectors"], manifest["b.faiss"]["dimension"]) == (3, 2)
+    assert manifest["truncated.faiss"]["error"] is not None
+    assert manifest["c.db"]["tables"] == {"keyword_search": 2}
+    assert (manifest["d.json"]["items"], manifest["d.json"]["keys"]) == (2, ["snippet"])
+    assert [k for k, v in manifest.items() if v["oversized"]] == ["big.txt"]
+
+    printed = {"process_output": [{"snippet": "two"}, {"snippet": "one"}], "process_output_files": ["../data/output/d.json", "../data/output/gone.json"]}
+    matching = {"process_output": [{"snippet": "one"}], "process_output_files": ["../data/output/e.json"]}
+    cells = [{"cell_type": "code", "metadata": {}, "source": [], "outputs": [{"output_type": "stream", "name": "stdout", "text": json.dumps(v, indent=2)}]} for v in [printed, matching]]
+    (tmp_path / "a.ipynb").write_text(json.dumps({"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}))
+    report = displayed_output_report([str(tmp_path / "a.ipynb")], manifest)
+    assert [v["artifact"] for v in report["mismatched"]] == ["d.json"]
+    assert [v["artifact"] for v in report["matched"]] == ["e.json"]
+    assert [v["artifact"] for v in report["missing"]] == ["gone.json"]
@@ -0,0 +1,134 @@
+import json
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utilities.api_standin import ApiStandIn, Recording, normalize_request
+
+requests = pytest.importorskip("requests")
+output_bytes = b'{"snippet": "It was a bright cold day in April"}'
+
+
+class FakeKrixikHandler(BaseHTTPRequestHandler):
+    # the krixik process flow: presigned upload, status polled until done, output fetched from a presigned url
+    status_polls = 0
+    uploads = []
+
+    def reply(self, status, body, content_type="application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        if self.path == "/krixik-core-process":
+            upload = {"url": f"{base}/s3-bucket", "fields": {"policy": "secret-policy", "x-amz-signature": "secret"}}
+            self.reply(200, {"file_id": "file-1", "request_id": "request-1", "presigned_post_url_results": upload})
+        elif self.path == "/s3-bucket":
+            FakeKrixikHandler.uploads.append(body)
+            self.reply(204, b"", "text/plain")
+        elif self.path == "/krixik-core-process-status":
+            FakeKrixikHandler.status_polls += 1
+            self.reply(200, {"process_status": "complete" if FakeKrixikHandler.status_polls >= 3 else "processing"})
+        elif self.path == "/krixik-core-fetch-output":
+            self.reply(200, {"process_output": [{"url": f"{base}/outputs/file-1.json?X-Amz-Signature=secret", "extension": ".json"}]})
+        else:
+            self.reply(404, {"message": "not found"})
+
+    def do_GET(self):
+        if self.path.startswith("/outputs/file-1.json"):
+            self.reply(200, output_bytes)
+        else:
+            self.reply(404, b"")
+
+    def log_message(self, *args):
+        pass
+
+
+def run_process_flow(api_url: str) -> list:
+    # the calls a notebook's pipeline.process(...) makes, in order
+    headers = {"Content-Type": "text/plain", "krixikApiKey": "key"}
+    seen = []
+    upload = requests.post(api_url + "/krixik-core-process", headers=headers, json={"pipeline": "p", "version": "1.1.19"}).json()
+    seen.append(upload["file_id"])
+    response = requests.post(
+        upload["presigned_post_url_results"]["url"], data=upload["presigned_post_url_results"]["fields"], files={"file": b"text"}
+    )
+    seen.append(response.status_code)
+    status = None
+    while status != "complete":
+        status = requests.post(api_url + "/krixik-core-process-status", headers=headers, json={"request_id": upload["request_id"]}).json()[
+            "process_status"
+        ]
+        seen.append(status)
+    output = requests.post(api_url + "/krixik-core-fetch-output", headers=headers, json={"file_id": upload["file_id"], "pipeline": "p"}).json()
+    seen.append(requests.get(output["process_output"][0]["url"]).content)
+    return seen
+
+
+@pytest.fixture()
+def fake_krixik():
+    FakeKrixikHandler.status_polls = 0
+    FakeKrixikHandler.uploads = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeKrixikHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_1():
+    """json key order and the client version do not change a request's hash"""
+    a = normalize_request("POST", "/krixik-core-list", b'{"pipeline": "p", "version": "1.1.0", "max_files": 5}')
+    b = normalize_request("POST", "/krixik-core-list", b'{"max_files":5,"version":"1.1.19","pipeline":"p"}')
+    c = normalize_request("POST", "/krixik-core-list", b'{"max_files": 6, "pipeline": "p"}')
+    assert a == b and a != c
+
+
+def test_2(fake_krixik, tmp_path):
+    """a recorded process flow replays offline - polls collapse, artifacts are served locally, secrets are not kept"""
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    (output_dir / "file-1.json").write_bytes(output_bytes)
+    recording_dir = str(tmp_path / "recording")
+
+    with ApiStandIn("record", upstream=fake_krixik, recording_dir=recording_dir, output_dir=str(output_dir)) as standin:
+        recorded = run_process_flow(standin.url)
+    assert recorded == ["file-1", 204, "processing", "processing", "complete", output_bytes]
+    assert len(FakeKrixikHandler.uploads) == 1 and b"secret-policy" in FakeKrixikHandler.uploads[0]
+
+    with open(f"{recording_dir}/recording.json", "r") as file:
+        saved = file.read()
+    assert "secret" not in saved and fake_krixik not in saved
+    recording = Recording(recording_dir, str(output_dir))
+    # the downloaded output is identical to the one already in data/output, so it is referenced rather than copied
+    assert [v["path"].endswith("output/file-1.json") for v in recording.artifacts.values()] == [True]
+    assert recording.latency_report()["/krixik-core-process-status"]["count"] == 3
+
+    FakeKrixikHandler.status_polls = 0
+    with ApiStandIn("replay", recording_dir=recording_dir, output_dir=str(output_dir)) as standin:
+        replayed = run_process_flow(standin.url)
+        assert requests.post(standin.url + "/krixik-core-delete", json={"file_ids": ["x"]}).status_code == 501
+    assert replayed == ["file-1", 204, "complete", output_bytes]
+    assert FakeKrixikHandler.status_polls == 0
+    assert standin.misses == ["POST /krixik-core-delete"]
+
+
+def test_3(fake_krixik, tmp_path):
+    """while recording, an unknown artifact id is answered 404 and an unreachable upstream 502 - neither is recorded"""
+    with ApiStandIn("record", upstream=fake_krixik, recording_dir=str(tmp_path)) as standin:
+        unknown = requests.get(standin.url + "/artifacts/0123456789abcdef01234567")
+    assert unknown.status_code == 404 and "unknown artifact" in unknown.json()["message"]
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeKrixikHandler)
+    closed_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.server_close()
+    with ApiStandIn("record", upstream=closed_url, recording_dir=str(tmp_path)) as standin:
+        failed = requests.post(standin.url + "/krixik-core-list", json={"pipeline": "p"})
+    assert failed.status_code == 502 and "upstream request failed" in failed.json()["message"]
+    assert standin.misses == ["POST /krixik-core-list"]
+    assert Recording(str(tmp_path)).exchanges == {}
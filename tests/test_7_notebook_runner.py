@@ -0,0 +1,129 @@
+import os
+import json
+import functools
+import threading
+import multiprocessing
+import pytest
+from utilities import notebook_runner
+from utilities.notebook_runner import run_notebooks, timing_report
+
+
+def fake_runner(docpath: str, timeout: float, retries: int, events=None, barrier=None, meet=()) -> dict:
+    # stands in for a kernel - appends its start and end to events, a list shared across the pool's processes, and
+    # notebooks in meet wait for each other on barrier, which only passes when they run at the same time
+    if events is not None:
+        events.append(("start", docpath))
+    error = None
+    if docpath in meet:
+        try:
+            barrier.wait(timeout=30)
+        except threading.BrokenBarrierError:
+            error = "never ran alongside the other notebooks in meet"
+    if "failing" in docpath:
+        error = "boom"
+    if "raising" in docpath:
+        raise RuntimeError("kernel died")
+    if "dying" in docpath:
+        os._exit(1)
+    with open(docpath + ".ran", "a") as file:
+        file.write("ran\n")
+    if events is not None:
+        events.append(("end", docpath))
+    return {"docpath": docpath, "success": error is None, "error": error, "elapsed": 0.3, "attempts": 1, "cell_times": [[0, 0.3]], "cached": False}
+
+
+def write_notebook(path, pipeline_name: str) -> str:
+    cells = [
+        {
+            "cell_type": "code",
+            "metadata": {},
+            "source": [f'pipeline = krixik.create_pipeline(name="{pipeline_name}", module_chain=["parser"])'],
+            "outputs": [],
+        }
+    ]
+    path.write_text(json.dumps({"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}))
+    return str(path)
+
+
+def runs(docpath: str) -> list:
+    with open(docpath + ".ran", "r") as file:
+        return file.read().splitlines()
+
+
+@pytest.fixture()
+def execution_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(notebook_runner, "execution_cache_path", str(tmp_path / "execution_cache.json"))
+
+
+def test_1(tmp_path, execution_cache):
+    """notebooks sharing a pipeline name never overlap, the rest run side by side"""
+    a = write_notebook(tmp_path / "a.ipynb", "shared-name")
+    b = write_notebook(tmp_path / "b.ipynb", "shared-name")
+    c = write_notebook(tmp_path / "c.ipynb", "own-name")
+    with multiprocessing.Manager() as manager:
+        # a is started first, b waits for it, and c runs alongside a - both must reach the barrier together
+        events = manager.list()
+        runner = functools.partial(fake_runner, events=events, barrier=manager.Barrier(2), meet={a, c})
+        results = run_notebooks([a, b, c], workers=3, runner=runner)
+        events = list(events)
+    assert [v["error"] for v in results] == [None, None, None]
+    assert results[0]["pipelines"] == ["shared-name"]
+    position = {v: i for i, v in enumerate(events)}
+    assert position[("end", a)] < position[("start", b)] or position[("end", b)] < position[("start", a)]
+    assert position[("start", c)] < position[("end", a)] and position[("start", a)] < position[("end", c)]
+
+
+def test_2(tmp_path, execution_cache):
+    """unchanged notebooks are served from the cache, failures and edited notebooks are re-run"""
+    passing = write_notebook(tmp_path / "passing.ipynb", "passing-name")
+    failing = write_notebook(tmp_path / "failing.ipynb", "failing-name")
+    run_notebooks([passing, failing], workers=2, runner=fake_runner)
+    results = run_notebooks([passing, failing], workers=2, runner=fake_runner)
+    assert [v["cached"] for v in results] == [True, False]
+    assert len(runs(passing)) == 1 and len(runs(failing)) == 2
+
+    report = timing_report(results, 0.3)
+    assert report["cached"] == 1 and report["executed"] == 1
+    assert report["failed"] == [v["notebook"] for v in report["notebooks"] if not v["success"]]
+
+    write_notebook(tmp_path / "passing.ipynb", "renamed-name")
+    assert run_notebooks([passing], runner=fake_runner)[0]["cached"] is False
+    assert run_notebooks([passing], runner=fake_runner, force=True)[0]["cached"] is False
+    assert len(runs(passing)) == 3
+
+
+def test_3(tmp_path, monkeypatch):
+    """every environment variable the docs notebooks read, and the .env they load, is part of the environment key"""
+    import re
+    import glob
+    from utilities import base_dir
+    from utilities.notebook_reader import load_notebook_cells
+
+    pattern = re.compile(r"os\.(?:getenv\(|environ\.get\(|environ\[)\s*[\"']([^\"']+)")
+    used = set()
+    for path in glob.glob(f"{base_dir}/docs/**/*.ipynb", recursive=True):
+        used |= {v for _, source, _ in load_notebook_cells(path) for v in pattern.findall(source)}
+    assert used <= set(notebook_runner.environment_variables), f"not in environment_variables: {used - set(notebook_runner.environment_variables)}"
+
+    monkeypatch.setattr(notebook_runner, "env_file_path", str(tmp_path / ".env"))
+    monkeypatch.delenv("DEMO_API_KEY", raising=False)
+    key = notebook_runner.environment_key(str(tmp_path))
+    monkeypatch.setenv("DEMO_API_KEY", "other")
+    assert notebook_runner.environment_key(str(tmp_path)) != key
+    monkeypatch.delenv("DEMO_API_KEY")
+    (tmp_path / ".env").write_text("MY_API_KEY=a\n")
+    assert notebook_runner.environment_key(str(tmp_path)) != key
+
+
+def test_4(tmp_path, execution_cache):
+    """a runner that raises or a worker that dies fails its notebook without aborting the run or losing the cache"""
+    passing = write_notebook(tmp_path / "passing.ipynb", "passing-name")
+    raising = write_notebook(tmp_path / "raising.ipynb", "raising-name")
+    results = run_notebooks([passing, raising], workers=1, runner=fake_runner)
+    assert [v["success"] for v in results] == [True, False] and "kernel died" in results[1]["error"]
+    assert run_notebooks([passing], runner=fake_runner)[0]["cached"] is True
+
+    dying = write_notebook(tmp_path / "dying.ipynb", "dying-name")
+    results = run_notebooks([dying, raising], workers=1, runner=fake_runner)
+    assert [v["success"] for v in results] == [False, False]
+    assert all("BrokenProcessPool" in v["error"] for v in results)
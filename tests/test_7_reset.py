@@ -1,22 +1,24 @@
 import pytest
-from utilities import base_dir
-from utilities.name_check import get_code_from_markdown, load_md_doc
-from utilities.converter import collect_mkdocks_toc
+from utilities.reset_check import check_reset_pipeline
 
-toc_paths = collect_mkdocks_toc()
-success_data = [base_dir + "/docs/" + path for path in toc_paths if path if "index.md" not in path]
 
-
-@pytest.mark.parametrize("docpath", success_data)
-def test_1(docpath):
+def test_1(docfile, doc_index):
     """test that reset_pipeline is in final code block of input docfile markdown path"""
-    markdown_content = load_md_doc(docpath)
-    code_blocks = get_code_from_markdown(markdown_content)
-    create_exist = False
-    for block in code_blocks:
-        if "krixik.create_pipeline" in block:
-            create_exist = True
-            break
-    if create_exist:
-        print(code_blocks[-1])
-        assert "krixik.reset_pipeline(pipeline)" in code_blocks[-1], f".reset_pipeline not found in final code block of {docpath}"
+    if "index.md" in docfile:
+        pytest.skip(f"index page {docfile}")
+    problems = check_reset_pipeline(docfile, doc_index)
+    assert len(problems) == 0, f"{docfile}: {problems}"
+
+
+def test_2(tmp_path):
+    """every pipeline a page creates must be reset in its final code block"""
+    from utilities.doc_index import DocIndex
+
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\n  - b.md\n")
+    code = '```python\nfirst = krixik.create_pipeline(name="a-1")\nsecond = krixik.create_pipeline(\n    name="a-2"\n)\n```\n\n'
+    (tmp_path / "docs" / "a.md").write_text(f"# a\n\n{code}```python\nkrixik.reset_pipeline(pipeline=first)\n```\n")
+    (tmp_path / "docs" / "b.md").write_text(f"# b\n\n{code}```python\n# krixik.reset_pipeline(first)\n```\n")
+    index = DocIndex(root=str(tmp_path))
+    assert check_reset_pipeline("a.md", index) == ["pipeline second (created in code block 0, line 2) is not reset in final code block"]
+    assert check_reset_pipeline("b.md", index) == ["no reset_pipeline call found in final code block"]
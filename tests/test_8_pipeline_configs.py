@@ -0,0 +1,106 @@
+import pytest
+from utilities.pipeline_config import ConfigCatalog, compile_config, docs_module_aliases, page_config_problems
+
+_catalog = None
+# pipelines the docs create to show the error krixik raises for an invalid module chain
+invalid_chain_examples = ["create_pipeline_3_parser_caption"]
+
+
+def get_catalog() -> ConfigCatalog:
+    # compiled on first use - importing this module reads nothing
+    global _catalog
+    if _catalog is None:
+        _catalog = ConfigCatalog()
+    return _catalog
+
+
+def pytest_generate_tests(metafunc):
+    if "path" in metafunc.fixturenames:
+        metafunc.parametrize("path", list(get_catalog().configs))
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return get_catalog()
+
+
+def test_1(path, catalog):
+    """every example pipeline config chains module outputs into inputs and defaults to one of its own models"""
+    problems = catalog.configs[path].problems
+    assert len(problems) == 0, f"{path} has problems: {problems}"
+
+
+def test_2(catalog):
+    """every adjacent pair of modules in a multi-module example is allowed by the compatibility matrix"""
+    for path, record in catalog.configs.items():
+        names = [v.name for v in record.modules]
+        assert catalog.validate_chain(names) == [], f"{path} chain {names} is not in the compatibility matrix"
+
+
+def test_3(catalog):
+    """broken chains and default models are reported"""
+    config = catalog.chain_config(["parser", "vector-search"])
+    config["pipeline"]["modules"][0]["defaults"]["model"] = "not-a-model"
+    problems = compile_config(config).problems
+    assert len(problems) == 2
+    assert "default model not-a-model" in problems[0]
+    assert problems[1] == "parser outputs json but vector-search takes npy"
+    assert catalog.validate_chain(["parser", "vector-search"]) == [problems[1]]
+
+    config = catalog.chain_config(["transcribe", "json-to-txt"])
+    config["pipeline"]["modules"][1]["input"]["permitted_extensions"] = [".txt"]
+    assert compile_config(config).problems == ("json-to-txt does not permit .json files output by transcribe",)
+    assert catalog.validate_chain(["parser", "no-such-module"]) == ["unknown module no-such-module"]
+    assert catalog.validate_chain(["parser", "text-embedder", "vector-db"]) == ["unknown module vector-db"]
+    assert catalog.validate_chain(["parser", "text-embedder", "vector-db"], docs_module_aliases) == []
+
+
+def test_4(tmp_path, monkeypatch):
+    """records are cached on disk by content hash and edited files are recompiled"""
+    (tmp_path / "configs").mkdir()
+    config_path = tmp_path / "configs" / "a.yml"
+    config_path.write_text("pipeline:\n  name: a\n  modules: []\n")
+    cache_path = str(tmp_path / "cache.json")
+    assert ConfigCatalog(str(tmp_path / "configs"), cache_path).configs["a.yml"].problems == ("pipeline has no modules",)
+
+    with monkeypatch.context() as patch:
+        patch.setattr("utilities.pipeline_config.compile_config", None)
+        assert ConfigCatalog(str(tmp_path / "configs"), cache_path).configs["a.yml"].name == "a"
+
+    config_path.write_text("pipeline: [unclosed\n")
+    assert ConfigCatalog(str(tmp_path / "configs"), cache_path).configs["a.yml"].problems[0].startswith("invalid yaml")
+
+
+def test_5(catalog):
+    """every module_chain in the docs, and every config file a page loads, is a valid pipeline"""
+    from utilities.doc_index import get_doc_index
+
+    index = get_doc_index()
+    for page in index.toc:
+        problems = [v for v in page_config_problems(catalog, index, page) if v["source"] not in invalid_chain_examples]
+        assert len(problems) == 0, f"{page} builds invalid pipelines: {problems}"
+
+
+def test_6(tmp_path, catalog):
+    """docs module names are mapped to the catalog's, and config files read by load_pipeline are validated"""
+    import yaml
+    from utilities.doc_index import DocIndex
+
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\n")
+    (tmp_path / "docs" / "broken.yml").write_text(yaml.safe_dump(catalog.chain_config(["parser", "vector-search"])))
+    code = [
+        'pipeline = krixik.create_pipeline(name="a", module_chain=["parser", "text-embedder", "vector-db"])',
+        'pipeline.save_pipeline(config_path=data_dir + "saved.yml")',
+        'krixik.load_pipeline(config_path=data_dir + "saved.yml")',
+        'krixik.load_pipeline(config_path="broken.yml")',
+        'krixik.load_pipeline(config_path="gone.yml")',
+        'krixik.create_pipeline(name="b", module_chain=["parser", "caption"])',
+    ]
+    (tmp_path / "docs" / "a.md").write_text("# a\n\n```python\n" + "\n".join(code) + "\n```\n")
+    problems = page_config_problems(catalog, DocIndex(root=str(tmp_path)), "a.md")
+    assert [(v["source"], v["line"], v["problems"]) for v in problems] == [
+        ("broken.yml", 4, ["parser outputs json but vector-search takes npy"]),
+        ("gone.yml", 5, ["config file gone.yml not found"]),
+        ("b", 6, ["parser outputs json but caption takes image"]),
+    ]
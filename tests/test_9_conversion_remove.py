@@ -1,11 +1,12 @@
+import os
 import pytest
 from utilities import base_dir
-from utilities.converter import convert_notebook_remove, collect_mkdocks_toc
 
-toc_files = collect_mkdocks_toc()
-    
-@pytest.mark.parametrize("docfile", toc_files)
-def test_1(docfile):
+
+def test_1(docfile, remove_conversion):
     """success test that notebook to markdown conversion"""
     docpath = f"{base_dir}/docs/" + docfile.replace(".md", ".ipynb")
-    assert convert_notebook_remove(docpath) is None
\ No newline at end of file
+    if not os.path.isfile(docpath):
+        pytest.skip(f"no notebook for page {docfile}")
+    result = remove_conversion[docpath]
+    assert result["success"], f"conversion of {docpath} failed with error: {result['error']}"
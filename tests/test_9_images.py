@@ -0,0 +1,65 @@
+from utilities.image_check import check_images, image_report
+
+
+def test_1():
+    """every local image referenced by the published pages and README exists"""
+    missing = check_images()
+    assert len(missing) == 0, f"missing images found in these pages: {missing}"
+
+
+def test_2(tmp_path):
+    """image references are read from markdown, badges inside links, html and reference definitions"""
+    from utilities.doc_index import DocIndex
+
+    docs = tmp_path / "docs"
+    (docs / "a_files").mkdir(parents=True)
+    (docs / "img").mkdir()
+    (docs / "assets").mkdir()
+    (tmp_path / "mkdocs.yml").write_text("nav:\n  - a.md\ntheme:\n  logo: assets/logo.png\n")
+    page = "# a\n\n![png](a_files/a_1_0.png)\n[![badge](img/badge.svg)](https://example.com)\n"
+    page += '<img src="img/gone.png" alt="gone"/> and ![remote](https://example.com/x.png)\n\n![ref][r]\n\n[r]: img/ref.jpg\n'
+    page += "```python\n![not an image](img/code.png)\n```\n"
+    (docs / "a.md").write_text(page)
+    (tmp_path / "README.md").write_text("![logo](docs/assets/logo.png)\n")
+    for path in ["a_files/a_1_0.png", "a_files/a_2_0.png", "img/badge.svg", "img/ref.jpg", "assets/logo.png"]:
+        (docs / path).write_bytes(b"0" * 10)
+    (docs / "img" / "big.png").write_bytes(b"0" * 100)
+
+    report = image_report(DocIndex(root=str(tmp_path), remove=True))
+    assert [(v["page"], v["path"]) for v in report["references"]] == [
+        ("a.md", "docs/a_files/a_1_0.png"),
+        ("a.md", "docs/img/badge.svg"),
+        ("a.md", "docs/img/gone.png"),
+        ("a.md", "docs/img/ref.jpg"),
+        ("README.md", "docs/assets/logo.png"),
+    ]
+    assert [v["source"] for v in report["missing"]] == ["img/gone.png"]
+    assert report["unused"] == [{"path": "docs/img/big.png", "bytes": 100}, {"path": "docs/a_files/a_2_0.png", "bytes": 10}]
+
+
+def test_3(tmp_path, monkeypatch):
+    """variants are encoded once per image content, and the stage is skipped without Pillow - which requirements.test
+    installs, so the encoding is always tested
+    """
+    import sys
+    from utilities.image_stage import ImageStage
+
+    with monkeypatch.context() as patch:
+        patch.setitem(sys.modules, "PIL", None)
+        assert ImageStage(str(tmp_path / "cache")).process([])[1]["skipped"] == "Pillow is not installed"
+
+    from PIL import Image
+
+    for name in ["a.png", "copy.png"]:
+        Image.new("RGB", (1200, 600), (200, 40, 40)).save(tmp_path / name)
+    stage = ImageStage(str(tmp_path / "cache"), widths=(480, 960))
+    images, report = stage.process([str(tmp_path / "a.png"), str(tmp_path / "copy.png")])
+    assert (report["encoded"], report["cached"]) == (1, 1)
+    entry = images[str(tmp_path / "a.png")]
+    assert [v["width"] for v in entry["variants"]] == [480, 960, 1200] and (entry["width"], entry["height"]) == (1200, 600)
+    with Image.open(tmp_path / "cache" / "variants" / entry["variants"][0]["file"]) as variant:
+        assert variant.format == "WEBP" and variant.size == (480, 240)
+
+    Image.new("RGB", (1200, 600), (40, 40, 200)).save(tmp_path / "a.png")
+    _, report = ImageStage(str(tmp_path / "cache"), widths=(480, 960)).process([str(tmp_path / "a.png"), str(tmp_path / "copy.png")])
+    assert (report["encoded"], report["cached"]) == (1, 1)
@@ -3,3 +3,4 @@ from pathlib import Path
 
 utilities_dir = os.path.dirname(os.path.abspath(__file__))
 base_dir = str(Path(os.path.abspath(__file__)).parent.parent)
+cache_dir = os.path.join(base_dir, ".docs_cache")
@@ -0,0 +1,41 @@
+# every docs check in one run, page by page as the notebooks convert - see page_pipeline.py
+#
+#   python -m utilities
+#   python -m utilities --from-notebooks --links-offline
+import json
+import argparse
+from utilities.converter import convert_all_notebooks_remove, min_pool_notebooks
+from utilities.doc_index import configure_doc_index
+from utilities.link_check import configure_link_checker
+from utilities.page_pipeline import PagePipeline, default_queue_size
+
+parser = argparse.ArgumentParser(prog="python -m utilities", description="convert the docs notebooks and check every page as it lands")
+parser.add_argument(
+    "--workers", type=int, default=None, help=f"notebooks converted at once (default: 1 below {min_pool_notebooks} notebooks, else cpu count)"
+)
+parser.add_argument("--check-threads", type=int, default=None, help="threads running page checks")
+parser.add_argument("--queue-size", type=int, default=default_queue_size, help="converted pages waiting on or in checks at once")
+parser.add_argument("--force-convert", action="store_true", help="convert every notebook, ignoring the conversion manifest")
+parser.add_argument("--from-notebooks", action="store_true", help="check pages straight from their notebooks - no conversion")
+parser.add_argument("--links-offline", action="store_true", help="check external links from the link cache only")
+parser.add_argument("--final-conversion", action="store_true", help="once checks pass, convert for publishing (remove_cell tags applied)")
+parser.add_argument("--json", default=None, help="write the report to this path")
+args = parser.parse_args()
+
+if args.from_notebooks:
+    configure_doc_index(source="notebook")
+if args.links_offline:
+    configure_link_checker(offline=True)
+
+pipeline = PagePipeline(workers=args.workers, force=args.force_convert, check_threads=args.check_threads, queue_size=args.queue_size)
+report = pipeline.run()
+if args.final_conversion and len(report["failures"]) == 0:
+    failed = [v for v in convert_all_notebooks_remove(workers=args.workers) if not v["success"]]
+    for v in failed:
+        print(f"FAILURE: [conversion] {v['docpath']} - {v['error']}")
+        report["failures"].append({"check": "conversion", "page": v["docpath"], "problem": v["error"], "elapsed": None})
+if args.json:
+    with open(args.json, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+print(f"checked {report['pages']} pages in {report['wall_time']:.1f}s - {len(report['failures'])} failures, {len(report['warnings'])} warnings")
+raise SystemExit(1 if report["failures"] else 0)
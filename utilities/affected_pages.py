@@ -0,0 +1,133 @@
+import os
+from typing import NamedTuple
+from utilities import base_dir
+from utilities.doc_index import get_doc_index
+from utilities.data_check import data_dir, iter_data_references
+from utilities.code_analyzer import analyze_page
+from utilities.name_check import config_example_paths, config_examples_dir, read_config_name, resolve_config_path
+
+# a change under any of these (repo-relative) can change every page's checks - the toc, the checks themselves or what
+# they run with
+global_paths = ("mkdocs.yml", "pytest.ini", "requirements", "utilities/", "tests/")
+
+
+class Dependency(NamedTuple):
+    page: str
+    # "source" (the page's markdown or notebook), "link" / "anchor" (a link to another page, without / with a heading),
+    # "data" (a data/ file its code references) or "config" (a pipeline config it loads, or that shares one of its names)
+    kind: str
+
+
+def changed_files(since: str, root: str = base_dir) -> dict:
+    """repo-relative path -> A / M / D for every file changed between revision since and the working tree
+
+    untracked files count as added, and a rename as its old path deleted plus its new path added
+    """
+    import subprocess
+
+    def git(*args) -> list:
+        result = subprocess.run(["git", *args], cwd=root, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ValueError(f"git {args[0]} against {since} failed - {result.stderr.strip()}")
+        return [v for v in result.stdout.split("\0") if v]
+
+    changes = {}
+    fields = git("diff", "--name-status", "--relative", "-M", "-z", since, "--")
+    while fields:
+        status = fields.pop(0)
+        if status[0] in "RC":
+            old_path, new_path = fields.pop(0), fields.pop(0)
+            if status[0] == "R":
+                changes[old_path] = "D"
+            changes[new_path] = "A"
+        else:
+            changes[fields.pop(0)] = "M" if status[0] == "T" else status[0]
+    for path in git("ls-files", "--others", "--exclude-standard", "-z"):
+        changes[path] = "A"
+    return changes
+
+
+def dependency_graph(index=None, data_directory: str = data_dir, config_dir: str = config_examples_dir) -> dict:
+    """repo-relative path -> the Dependency of each toc page on that file, from one pass over the index
+
+    edges are read by the same extractors the checks use - the page's inter links, its data references (see
+    data_check) and its pipeline names / load_pipeline configs (see name_check)
+    """
+    index = index or get_doc_index()
+
+    def relative(path: str) -> str:
+        return os.path.relpath(path, index.root).replace(os.sep, "/")
+
+    config_names = {}
+    for config_path in config_example_paths(config_dir):
+        name, _ = read_config_name(config_path)
+        config_names.setdefault(name, []).append(relative(config_path))
+
+    graph = {}
+
+    def add(path: str, page: str, kind: str) -> None:
+        graph.setdefault(path, set()).add(Dependency(page, kind))
+
+    for page in index.toc:
+        add(f"docs/{page}", page, "source")
+        add("docs/" + page.replace(".md", ".ipynb"), page, "source")
+        try:
+            record = index.page(page)
+        except OSError:
+            continue
+        for link in record.inter_links:
+            target, _, anchor = link.partition("#")
+            add(target, page, "anchor" if anchor else "link")
+        for _, _, _, path in iter_data_references(record.code_blocks):
+            add(relative(os.path.join(data_directory, path)), page, "data")
+        for name in record.pipeline_names:
+            for config_path in config_names.get(name, []):
+                add(config_path, page, "config")
+        for call in analyze_page(record.code_blocks).calls:
+            if call.method == "load_pipeline" and call.argument:
+                config_path = resolve_config_path(call.argument, os.path.join(index.docs_dir, page))
+                if config_path is not None:
+                    add(relative(config_path), page, "config")
+    return graph
+
+
+def affected_pages(changes: dict, index=None, graph: dict = None) -> set:
+    """toc pages whose per-page checks can come out differently after changes (see changed_files)
+
+    a notebook change counts as a change to its page; a page linking to a changed page is affected when the link
+    targets a heading, or when the changed page was added or deleted - a plain link only checks that the page exists
+    """
+    index = index or get_doc_index()
+    if any(path.startswith(global_paths) for path in changes):
+        return set(index.toc)
+    graph = graph if graph is not None else dependency_graph(index)
+    affected = set()
+    for path, status in changes.items():
+        paths = [path]
+        if path.startswith("docs/") and path.endswith(".ipynb"):
+            paths.append(path[: -len(".ipynb")] + ".md")
+        for dependency in [v for p in paths for v in graph.get(p, ())]:
+            if dependency.kind == "link" and status == "M":
+                continue
+            affected.add(dependency.page)
+    return affected
+
+
+def affected_since(since: str, index=None) -> set:
+    # toc pages affected by everything changed since git revision since
+    index = index or get_doc_index()
+    return affected_pages(changed_files(since, index.root), index)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="list the toc pages affected by changes since a git revision")
+    parser.add_argument("since", help="git revision to diff the working tree against, e.g., origin/main")
+    args = parser.parse_args()
+
+    index = get_doc_index()
+    pages = affected_since(args.since, index)
+    for page in sorted(pages):
+        print(page)
+    print(f"{len(pages)} of {len(index.toc)} pages affected since {args.since}")
@@ -0,0 +1,324 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utilities import base_dir
+
+default_recording_dir = os.path.join(base_dir, "tests", "api_recordings")
+default_output_dir = os.path.join(base_dir, "data", "output")
+recording_version = 1
+# status checks are polled until processing finishes - replay answers them with the final recorded status at once
+poll_endpoints = ["/krixik-core-process-status"]
+# payload fields that change between client releases without changing the answer
+volatile_fields = ["version"]
+# presigned s3 / output urls in responses are swapped for stand-in artifact urls - the host is filled in when served
+artifact_placeholder = "{{standin}}"
+presigned_url_pattern = re.compile(r'"(https?://[^"]+)"')
+skipped_headers = ["host", "content-length", "connection", "accept-encoding", "transfer-encoding"]
+
+
+def normalize_request(method: str, path: str, body: bytes) -> str:
+    # requests asking for the same thing hash the same - json key order and volatile fields are ignored
+    if path.startswith("/artifacts/"):
+        # uploads to / downloads from presigned urls - the artifact id already says which
+        return hashlib.sha256(f"{method} {path}".encode()).hexdigest()
+    try:
+        payload = json.loads(body or b"null")
+        if isinstance(payload, dict):
+            payload = {k: v for k, v in payload.items() if k not in volatile_fields}
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        canonical = body
+    return hashlib.sha256(f"{method} {path} ".encode() + canonical).hexdigest()
+
+
+def output_hashes(output_dir: str) -> dict:
+    # sha256 -> path relative to the repo for every artifact already kept in data/output
+    hashes = {}
+    if os.path.isdir(output_dir):
+        for name in sorted(os.listdir(output_dir)):
+            path = os.path.join(output_dir, name)
+            if os.path.isfile(path):
+                with open(path, "rb") as file:
+                    hashes[hashlib.sha256(file.read()).hexdigest()] = os.path.relpath(path, base_dir)
+    return hashes
+
+
+def redact_upload_fields(text: str) -> str:
+    # presigned post fields (policy, signature, access key) are never written to the recording
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return text
+    upload = payload.get("presigned_post_url_results") if isinstance(payload, dict) else None
+    if not isinstance(upload, dict) or not isinstance(upload.get("fields"), dict):
+        return text
+    upload["fields"] = {k: "redacted" for k in upload["fields"]}
+    return json.dumps(payload)
+
+
+class Recording:
+    """recorded exchanges keyed by normalized request hash, plus the artifacts served at presigned urls
+
+    exchanges keep every response to the same request in order (e.g., list_files before and after a process), each
+    with its upstream latency; artifact bytes are stored once under their hash, or point at the identical file already
+    in data/output
+    """
+
+    def __init__(self, recording_dir: str = default_recording_dir, output_dir: str = default_output_dir):
+        self.recording_dir = recording_dir
+        self.output_dir = output_dir
+        self.path = os.path.join(recording_dir, "recording.json")
+        self.exchanges = {}
+        self.artifacts = {}
+        self._output_hashes = None
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                recording = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return
+        if recording.get("version") == recording_version:
+            self.exchanges = recording.get("exchanges", {})
+            self.artifacts = recording.get("artifacts", {})
+
+    def save(self) -> None:
+        os.makedirs(self.recording_dir, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": recording_version, "exchanges": self.exchanges, "artifacts": self.artifacts}, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def store_artifact(self, artifact_id: str, data: bytes, content_type: str) -> None:
+        digest = hashlib.sha256(data).hexdigest()
+        if self._output_hashes is None:
+            self._output_hashes = output_hashes(self.output_dir)
+        entry = {"sha256": digest, "content_type": content_type}
+        if digest in self._output_hashes:
+            entry["path"] = self._output_hashes[digest]
+        else:
+            path = os.path.join(self.recording_dir, "artifacts", digest)
+            if not os.path.isfile(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as file:
+                    file.write(data)
+            entry["path"] = os.path.relpath(path, base_dir)
+        self.artifacts[artifact_id] = entry
+
+    def artifact_bytes(self, artifact_id: str) -> tuple:
+        entry = self.artifacts.get(artifact_id)
+        if entry is None:
+            return None, None
+        with open(os.path.join(base_dir, entry["path"]), "rb") as file:
+            return file.read(), entry["content_type"]
+
+    def latency_report(self) -> dict:
+        # endpoint -> count / total / max upstream seconds across every recorded exchange
+        report = {}
+        for responses in self.exchanges.values():
+            for response in responses:
+                stats = report.setdefault(response["path"], {"count": 0, "total": 0.0, "max": 0.0})
+                stats["count"] += 1
+                stats["total"] += response["latency"]
+                stats["max"] = max(stats["max"], response["latency"])
+        return dict(sorted(report.items(), key=lambda v: -v[1]["total"]))
+
+
+class ApiStandIn:
+    """local http stand-in for the krixik api - point MY_API_URL at .url before executing notebooks
+
+    mode="record" forwards each request to upstream (the real api url) and records the response; mode="replay" answers
+    from the recording alone, with no network. requests replay has no answer for are answered 501, and while recording
+    an unknown artifact id is answered 404 and an upstream that cannot be reached 502 - each listed in misses and
+    never recorded
+    """
+
+    def __init__(
+        self,
+        mode: str = "replay",
+        upstream: str = None,
+        recording_dir: str = default_recording_dir,
+        output_dir: str = default_output_dir,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        if mode not in ["record", "replay"]:
+            raise ValueError(f"unknown stand-in mode {mode}")
+        if mode == "record" and not upstream:
+            raise ValueError("record mode needs the upstream api url")
+        self.mode = mode
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recording = Recording(recording_dir, output_dir)
+        self.misses = []
+        self._seen = {}
+        self._presigned = {}
+        self._lock = threading.Lock()
+        self._session = None
+        self._server = ThreadingHTTPServer((host, port), self.handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def start(self) -> "ApiStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self.mode == "record":
+            self.recording.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                standin.handle(self)
+
+            def do_POST(self):
+                standin.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request) -> None:
+        body = request.rfile.read(int(request.headers.get("Content-Length") or 0))
+        path = urlsplit(request.path).path
+        key = normalize_request(request.command, path, body)
+        with self._lock:
+            occurrence = self._seen.get(key, 0)
+            self._seen[key] = occurrence + 1
+        if self.mode == "record":
+            response = self.forward(request, path, key, occurrence, body)
+        else:
+            response = self.replay(request.command, path, key, occurrence)
+        status = response["status"]
+        if path.startswith("/artifacts/") and request.command == "GET" and status == 200:
+            payload, content_type = self.recording.artifact_bytes(path.rsplit("/", 1)[-1])
+            if payload is None:
+                status, payload, content_type = 501, b"", None
+        else:
+            payload = response.get("client_body", response["body"]).replace(artifact_placeholder, self.url).encode()
+            content_type = response["content_type"]
+        request.send_response(status)
+        request.send_header("Content-Type", content_type or "application/octet-stream")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def miss(self, method: str, path: str, status: int, message: str) -> dict:
+        # a json error answer for a request the stand-in cannot serve, listed in misses
+        with self._lock:
+            self.misses.append(f"{method} {path}")
+        return {"status": status, "content_type": "application/json", "body": json.dumps({"message": message})}
+
+    def replay(self, method: str, path: str, key: str, occurrence: int) -> dict:
+        responses = self.recording.exchanges.get(key)
+        if not responses:
+            return self.miss(method, path, 501, f"no recording for {method} {path}")
+        if path in poll_endpoints:
+            return responses[-1]
+        return responses[min(occurrence, len(responses) - 1)]
+
+    def forward(self, request, path: str, key: str, occurrence: int, body: bytes) -> dict:
+        # send the request upstream (or to the presigned url it stands for), record the answer and its latency
+        import requests
+
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in skipped_headers}
+        artifact_id = path.rsplit("/", 1)[-1] if path.startswith("/artifacts/") else None
+        url = self._presigned.get(artifact_id) if artifact_id else self.upstream + path
+        if url is None:
+            # presigned urls are only kept by the process that rewrote them, e.g., not for a response recorded earlier
+            return self.miss(request.command, path, 404, f"unknown artifact {artifact_id} - its presigned url was not seen while recording")
+        start = time.perf_counter()
+        try:
+            upstream_response = self.session.request(request.command, url, headers=headers, data=body, timeout=120)
+        except requests.RequestException as e:
+            return self.miss(request.command, path, 502, f"upstream request failed: {e!r}")
+        latency = time.perf_counter() - start
+        content_type = upstream_response.headers.get("Content-Type", "")
+        if artifact_id and request.command == "GET":
+            if upstream_response.status_code == 200:
+                self.recording.store_artifact(artifact_id, upstream_response.content, content_type)
+            text = ""
+        else:
+            text = self.rewrite_presigned(upstream_response.text, key)
+        response = {
+            "path": path,
+            "status": upstream_response.status_code,
+            "content_type": content_type,
+            "body": redact_upload_fields(text),
+            "latency": latency,
+        }
+        with self._lock:
+            if occurrence == 0:
+                # a fresh recording of this request replaces whatever was recorded before
+                self.recording.exchanges[key] = []
+            self.recording.exchanges[key].append(response)
+        # the client itself still needs the real upload fields to reach s3 while recording
+        return dict(response, client_body=text)
+
+    def rewrite_presigned(self, text: str, key: str) -> str:
+        # presigned urls expire and carry credentials - they are kept in memory only, the recording gets artifact ids
+        def replace(match):
+            url = match.group(1).replace("\\/", "/")
+            artifact_id = hashlib.sha256(f"{key} {urlsplit(url).path}".encode()).hexdigest()[:24]
+            self._presigned[artifact_id] = url
+            return f'"{artifact_placeholder}/artifacts/{artifact_id}"'
+
+        return presigned_url_pattern.sub(replace, text)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="local record / replay stand-in for the krixik api")
+    parser.add_argument("mode", choices=["record", "replay", "report"])
+    parser.add_argument("--upstream", default=os.getenv("MY_API_URL"), help="real api url to record from (default: MY_API_URL)")
+    parser.add_argument("--recording-dir", default=default_recording_dir)
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    if args.mode == "report":
+        recording = Recording(args.recording_dir)
+        print(f"{'endpoint':<40} {'calls':>6} {'total s':>9} {'max s':>8}")
+        for path, stats in recording.latency_report().items():
+            print(f"{path:<40} {stats['count']:>6} {stats['total']:>9.2f} {stats['max']:>8.2f}")
+        raise SystemExit(0)
+
+    standin = ApiStandIn(args.mode, upstream=args.upstream, recording_dir=args.recording_dir, port=args.port).start()
+    print(f"{args.mode}ing krixik api on {standin.url} - run notebooks with MY_API_URL={standin.url}, ctrl-c to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        standin.stop()
+        if standin.misses:
+            print(f"{len(standin.misses)} requests had no recording: {sorted(set(standin.misses))}")
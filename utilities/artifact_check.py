@@ -0,0 +1,248 @@
+import os
+import json
+import struct
+import sqlite3
+import hashlib
+from utilities import base_dir
+from utilities.instrumentation import timed
+
+output_data_dir = os.path.join(base_dir, "data", "output")
+# artifacts above this are flagged before they bloat the repo
+oversized_bytes = 1_000_000
+json_chunk_size = 1 << 16
+# fourcc, dimension, vector count, two unused int64s, is_trained, metric type - the header every faiss index starts with
+faiss_header = struct.Struct("<4siqqqBi")
+# flat indexes follow the header with the vector storage size and then the float32 vectors themselves
+flat_faiss_types = {b"IxFI": "flat_ip", b"IxF2": "flat_l2"}
+faiss_metrics = {0: "inner_product", 1: "l2"}
+
+
+def inspect_npy(path: str) -> dict:
+    import numpy as np
+
+    array = np.load(path, mmap_mode="r", allow_pickle=False)
+    return {"shape": list(array.shape), "dtype": str(array.dtype)}
+
+
+def inspect_faiss(path: str) -> dict:
+    # header only - the vectors are never read
+    with open(path, "rb") as file:
+        header = file.read(faiss_header.size + 8)
+    if len(header) < faiss_header.size:
+        raise ValueError("file too short for a faiss index header")
+    fourcc, dimension, vectors, _, _, is_trained, metric = faiss_header.unpack_from(header)
+    if fourcc not in flat_faiss_types:
+        return {"index_type": fourcc.decode("latin-1"), "dimension": dimension, "vectors": vectors}
+    stored = struct.unpack_from("<q", header, faiss_header.size)[0] if len(header) == faiss_header.size + 8 else None
+    if stored != dimension * vectors or os.path.getsize(path) != len(header) + 4 * dimension * vectors:
+        raise ValueError(f"faiss header says {vectors} vectors of dimension {dimension} but the file does not hold them")
+    return {"index_type": flat_faiss_types[fourcc], "dimension": dimension, "vectors": vectors, "metric": faiss_metrics.get(metric, metric)}
+
+
+def inspect_db(path: str) -> dict:
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tables = [v[0] for v in connection.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")]
+        return {"tables": {v: connection.execute(f'SELECT COUNT(*) FROM "{v}"').fetchone()[0] for v in tables}}
+    finally:
+        connection.close()
+
+
+def iter_json_items(path: str, chunk_size: int = json_chunk_size):
+    """yield the elements of the top-level json array in a file one at a time, holding one chunk and one element
+
+    raises ValueError when the file is not a json array or is malformed
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as file:
+        buffer = ""
+        position = 0
+        exhausted = False
+
+        def fill() -> bool:
+            nonlocal buffer, position, exhausted
+            more = file.read(chunk_size)
+            exhausted = more == ""
+            buffer = buffer[position:] + more
+            position = 0
+            return not exhausted
+
+        def next_character() -> str:
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return buffer[position] if position < len(buffer) else ""
+
+        if next_character() != "[":
+            raise ValueError("not a json array")
+        position += 1
+        if next_character() == "]":
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # a number ending the buffer may continue in the next chunk
+                complete = end < len(buffer) or exhausted
+            except json.JSONDecodeError:
+                complete = False
+                if exhausted:
+                    raise
+            if not complete:
+                fill()
+                continue
+            yield item
+            position = end
+            character = next_character()
+            if character == "]":
+                return
+            if character != ",":
+                raise ValueError(f"malformed json array near character {position}")
+            position += 1
+            next_character()
+
+
+def json_item_hash(items) -> str:
+    # order sensitive hash of canonically dumped elements - the same for an artifact and the output a page printed
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(json.dumps(item, sort_keys=True, separators=(",", ":")).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def inspect_json(path: str) -> dict:
+    items = 0
+    keys = set()
+    digest = hashlib.sha256()
+    try:
+        for item in iter_json_items(path):
+            items += 1
+            if isinstance(item, dict):
+                keys.update(item)
+            digest.update(json.dumps(item, sort_keys=True, separators=(",", ":")).encode())
+            digest.update(b"\n")
+    except ValueError as e:
+        if items > 0 or str(e) != "not a json array":
+            raise
+        # objects and scalars are not streamed - krixik outputs are arrays
+        with open(path, "r", encoding="utf-8") as file:
+            value = json.load(file)
+        return {"type": type(value).__name__, "keys": sorted(value) if isinstance(value, dict) else []}
+    return {"type": "list", "items": items, "keys": sorted(keys), "content_hash": digest.hexdigest()}
+
+
+def inspect_text(path: str) -> dict:
+    lines = 0
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(json_chunk_size), b""):
+            lines += chunk.count(b"\n")
+    return {"lines": lines}
+
+
+inspectors = {".npy": inspect_npy, ".faiss": inspect_faiss, ".db": inspect_db, ".json": inspect_json, ".txt": inspect_text}
+
+
+def inspect_artifact(path: str, max_bytes: int = oversized_bytes) -> dict:
+    # metadata for one artifact - payloads are memory mapped, streamed or never read
+    size = os.path.getsize(path)
+    extension = os.path.splitext(path)[1].lower()
+    entry = {"bytes": size, "kind": extension.lstrip("."), "oversized": size > max_bytes, "error": None}
+    inspector = inspectors.get(extension)
+    if inspector is not None:
+        try:
+            entry.update(inspector(path))
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+
+def build_artifact_manifest(directory: str = output_data_dir, max_bytes: int = oversized_bytes) -> dict:
+    # file name -> inspect_artifact entry for every file in the directory, in one pass
+    manifest = {}
+    if os.path.isdir(directory):
+        for entry in sorted(os.scandir(directory), key=lambda v: v.name):
+            if entry.is_file():
+                with timed("artifact", entry.name):
+                    manifest[entry.name] = inspect_artifact(entry.path, max_bytes)
+    return manifest
+
+
+def iter_displayed_outputs(notebook_path: str):
+    # yield (cell, printed process output) for each code cell output showing a krixik process result with its files
+    with open(notebook_path, "r", encoding="utf-8") as file:
+        notebook = json.load(file)
+    for cell_number, cell in enumerate(notebook["cells"]):
+        for output in cell.get("outputs", []) if cell["cell_type"] == "code" else []:
+            text = output.get("text") if output.get("output_type") == "stream" else None
+            if not text:
+                continue
+            text = "".join(text) if isinstance(text, list) else text
+            if "process_output_files" not in text:
+                continue
+            try:
+                printed = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(printed, dict) and printed.get("process_output_files"):
+                yield cell_number, printed
+
+
+def displayed_output_report(notebook_paths: list = None, manifest: dict = None) -> dict:
+    """compare the process outputs notebooks print against the artifacts kept in data/output
+
+    matched / mismatched list printed outputs whose artifact is kept - a printed json output must hold the same
+    elements as its artifact, and any kept artifact must be readable; missing lists printed files that are not kept
+    """
+    if notebook_paths is None:
+        from utilities.converter import toc_notebook_paths
+
+        notebook_paths = toc_notebook_paths()
+    manifest = build_artifact_manifest() if manifest is None else manifest
+    report = {"matched": [], "mismatched": [], "missing": [], "oversized": [k for k, v in manifest.items() if v["oversized"]]}
+    for notebook_path in notebook_paths:
+        notebook = os.path.relpath(notebook_path, base_dir)
+        for cell, printed in iter_displayed_outputs(notebook_path):
+            for output_path in printed["process_output_files"]:
+                name = os.path.basename(output_path)
+                site = {"notebook": notebook, "cell": cell, "artifact": name}
+                entry = manifest.get(name)
+                if entry is None:
+                    report["missing"].append(site)
+                    continue
+                problem = entry["error"]
+                displayed = printed.get("process_output")
+                if problem is None and entry["kind"] == "json" and isinstance(displayed, list):
+                    if entry.get("content_hash") != json_item_hash(displayed):
+                        problem = f"printed {len(displayed)} output items do not match the {entry.get('items')} kept in the artifact"
+                report["mismatched" if problem else "matched"].append(dict(site, problem=problem) if problem else site)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="inspect data/output artifacts and check them against the outputs notebooks print")
+    parser.add_argument("--directory", default=output_data_dir)
+    parser.add_argument("--max-bytes", type=int, default=oversized_bytes, help="flag artifacts larger than this")
+    parser.add_argument("--manifest", default=None, help="write the artifact manifest as json to this path")
+    args = parser.parse_args()
+
+    manifest = build_artifact_manifest(args.directory, args.max_bytes)
+    for name, entry in manifest.items():
+        if entry["error"]:
+            print(f"UNREADABLE: {name} - {entry['error']}")
+        if entry["oversized"]:
+            print(f"OVERSIZED: {name} ({entry['bytes']:,} bytes)")
+    report = displayed_output_report(manifest=manifest)
+    for v in report["mismatched"]:
+        print(f"MISMATCH: {v['notebook']} (cell {v['cell']}) -> {v['artifact']} - {v['problem']}")
+    if args.manifest:
+        with open(args.manifest, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+    print(
+        f"{len(manifest)} artifacts ({sum(v['bytes'] for v in manifest.values()):,} bytes), {len(report['oversized'])} oversized - "
+        + f"{len(report['matched'])} printed outputs match their artifact, {len(report['mismatched'])} do not, "
+        + f"{len(report['missing'])} are not kept"
+    )
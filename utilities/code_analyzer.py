@@ -0,0 +1,383 @@
+import re
+import ast
+import hashlib
+from typing import NamedTuple
+
+pipeline_methods = ("create_pipeline", "load_pipeline", "save_pipeline")
+# notebook magics and shell escapes - blanked before parsing so the rest of the block still parses
+magic_pattern = re.compile(r"^(\s*)(%|!)")
+# the regex fallback for blocks that do not parse even with their magics blanked - see scan_block
+pipeline_call_pattern = re.compile(r"\.(create_pipeline|load_pipeline|save_pipeline)\(")
+python_token_pattern = re.compile(r"\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*'|#[^\n]*|[()\[\]{}]")
+string_literal_pattern = re.compile(r"\"((?:[^\"\\\n]|\\.)*)\"|'((?:[^'\\\n]|\\.)*)'")
+name_argument_pattern = re.compile(r"(?<![\w.])name\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+config_argument_pattern = re.compile(r"(?<![\w.])config_path\s*=\s*([^,]+)")
+reset_pattern = re.compile(r"\.reset_pipeline\(\s*(?:pipeline\s*=\s*)?([\w.]*)")
+
+# block hash -> BlockFacts, and a page's code blocks -> PageFacts, for the life of the process
+_block_facts = {}
+_page_facts = {}
+
+
+class Variable(NamedTuple):
+    # a variable read inside a string value - name is None for an expression that cannot be read statically
+    name: str
+
+
+class PipelineCall(NamedTuple):
+    method: str
+    # create_pipeline's name / load_pipeline and save_pipeline's config_path, as a value (see string_value)
+    argument: tuple
+    # variable the pipeline is assigned to (create / load), or the pipeline saved - None when there is none
+    target: str
+    line: int
+    # create_pipeline's module_chain when it is a literal list of module names - None otherwise
+    module_chain: tuple = None
+
+
+class PathLiteral(NamedTuple):
+    value: tuple
+    # keyword the string is passed as (e.g., local_file_path) - None for any other string
+    role: str
+    line: int
+
+
+class ResetCall(NamedTuple):
+    # the pipeline reset, as written - e.g., "pipeline" for krixik.reset_pipeline(pipeline)
+    target: str
+    line: int
+
+
+class BlockFacts(NamedTuple):
+    """what one code block does, read once - string values are tuples of literal parts and Variables, resolved
+    against the page's earlier blocks by analyze_page
+
+    parsed is False when the block is not python even with its magics blanked; its facts then come from the regex
+    scanners and hold literals only
+    """
+
+    parsed: bool
+    # (name, value, line) for each string assigned to a variable - value None when it is not a static string
+    assignments: tuple
+    calls: tuple
+    paths: tuple
+    resets: tuple
+
+
+class PageCall(NamedTuple):
+    method: str
+    # the name / config path as a string - None when it is not static (for a name, when any part of it is unknown)
+    argument: str
+    target: str
+    block: int
+    line: int
+    module_chain: tuple = None
+
+
+class PagePath(NamedTuple):
+    path: str
+    role: str
+    block: int
+    line: int
+
+
+class PageReset(NamedTuple):
+    target: str
+    block: int
+    line: int
+
+
+class PageFacts(NamedTuple):
+    calls: tuple
+    paths: tuple
+    resets: tuple
+    # False when a block fell back to the regex scanners
+    parsed: bool
+
+
+def string_value(node) -> tuple:
+    # parts of a string expression - literals, "a" + b concatenations and f-strings; None for anything else
+    if isinstance(node, ast.Constant):
+        return (node.value,) if isinstance(node.value, str) else None
+    if isinstance(node, ast.Name):
+        return (Variable(node.id),)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = string_value(node.left), string_value(node.right)
+        if left is None or right is None:
+            return None
+        return left + right
+    if isinstance(node, ast.JoinedStr):
+        parts = ()
+        for value in node.values:
+            if isinstance(value, ast.FormattedValue):
+                inner = value.value if value.conversion == -1 and value.format_spec is None else None
+                parts += (Variable(inner.id),) if isinstance(inner, ast.Name) else (Variable(None),)
+            else:
+                parts += string_value(value)
+        return parts
+    return None
+
+
+def is_string_expression(node) -> bool:
+    value = string_value(node)
+    return value is not None and any(isinstance(v, str) for v in value)
+
+
+def call_method(node) -> str:
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def keyword_argument(call, name: str, position: int = None):
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    if position is not None and len(call.args) > position:
+        return call.args[position]
+    return None
+
+
+def literal_names(node) -> tuple:
+    # a list / tuple of string literals, e.g., module_chain=["parser", "text-embedder"] - None for anything else
+    if isinstance(node, (ast.List, ast.Tuple)) and all(isinstance(v, ast.Constant) and isinstance(v.value, str) for v in node.elts):
+        return tuple(v.value for v in node.elts)
+    return None
+
+
+def assigned_name(node) -> str:
+    if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+        return node.targets[0].id
+    if isinstance(node, (ast.AnnAssign, ast.AugAssign)) and isinstance(node.target, ast.Name):
+        return node.target.id
+    return None
+
+
+def strip_magics(code: str) -> str:
+    # %pip / !ls lines become pass at the same indent, keeping line numbers
+    return "\n".join(magic_pattern.sub(r"\1pass  # ", v) if magic_pattern.match(v) else v for v in code.split("\n"))
+
+
+class BlockVisitor:
+    # one walk over a parsed block collecting every fact - see BlockFacts
+
+    def __init__(self):
+        self.assignments = []
+        self.calls = []
+        self.paths = []
+        self.resets = []
+
+    def facts(self, tree) -> BlockFacts:
+        for statement in tree.body:
+            self.visit(statement, statement)
+        order = lambda v: v.line  # noqa: E731
+        return BlockFacts(
+            True, tuple(self.assignments), tuple(sorted(self.calls, key=order)), tuple(self.paths), tuple(sorted(self.resets, key=order))
+        )
+
+    def visit(self, node, statement, role: str = None, target: str = None) -> None:
+        # each whole string expression is recorded once, in source order, with the keyword it is passed as - the
+        # parts of "a" + b or of an f-string are not strings of their own
+        if not isinstance(node, ast.Name) and is_string_expression(node):
+            self.paths.append(PathLiteral(string_value(node), role, node.lineno))
+            return
+        name = assigned_name(node)
+        if name is not None:
+            # strings assigned at the top level hold for the rest of the page - anywhere else (if / for / def) the
+            # variable may or may not hold them, so it becomes unknown
+            top_level = node is statement and isinstance(node, ast.Assign)
+            self.assignments.append((name, string_value(node.value) if top_level else None, node.lineno))
+            for child in ast.iter_child_nodes(node):
+                self.visit(child, statement, target=name if child is node.value else None)
+            return
+        if isinstance(node, ast.Call):
+            self.visit_call(node, target)
+            for child in [node.func, *node.args]:
+                self.visit(child, statement)
+            for keyword in node.keywords:
+                self.visit(keyword.value, statement, role=keyword.arg)
+            return
+        for child in ast.iter_child_nodes(node):
+            self.visit(child, statement)
+
+    def visit_call(self, node, target: str) -> None:
+        method = call_method(node)
+        if method in pipeline_methods:
+            argument = keyword_argument(node, "name" if method == "create_pipeline" else "config_path", 0)
+            if method == "save_pipeline":
+                target = node.func.value.id if isinstance(node.func.value, ast.Name) else None
+            module_chain = literal_names(keyword_argument(node, "module_chain", 1)) if method == "create_pipeline" else None
+            self.calls.append(PipelineCall(method, string_value(argument) if argument is not None else None, target, node.lineno, module_chain))
+        elif method == "reset_pipeline":
+            argument = keyword_argument(node, "pipeline", 0)
+            self.resets.append(ResetCall(ast.unparse(argument) if argument is not None else "", node.lineno))
+
+
+def call_arguments(code: str, start: int) -> str:
+    # text between the parenthesis at code[start] and its match - strings and comments may hold parentheses
+    depth = 0
+    for match in python_token_pattern.finditer(code, start):
+        token = match.group(0)
+        if token in "([{":
+            depth += 1
+        elif token in ")]}":
+            depth -= 1
+            if depth == 0:
+                return code[start + 1 : match.start()]
+    return code[start + 1 :]
+
+
+def top_level(arguments: str) -> str:
+    # arguments with everything nested in brackets blanked, so keywords of inner calls are never mistaken for the call's own
+    pieces = []
+    depth = 0
+    position = 0
+    for match in python_token_pattern.finditer(arguments):
+        token = match.group(0)
+        if depth > 0:
+            pieces.append(" " * (match.start() - position))
+        else:
+            pieces.append(arguments[position : match.start()])
+        if token in "([{":
+            depth += 1
+        elif token in ")]}":
+            depth -= 1
+        pieces.append(token if depth == 0 or (depth == 1 and token in "([{") else " " * len(token))
+        position = match.end()
+    pieces.append(arguments[position:] if depth == 0 else " " * (len(arguments) - position))
+    return "".join(pieces)
+
+
+def literal_value(match) -> str:
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def iter_pipeline_calls(code: str):
+    """yield (method, argument, line) for each create_pipeline / load_pipeline / save_pipeline call in a code block
+
+    argument is the pipeline name for create_pipeline and the last string literal of config_path for load_pipeline /
+    save_pipeline (e.g., the file name in data_dir + "configs/my.yml") - None when it cannot be read statically
+    """
+    for match in pipeline_call_pattern.finditer(code):
+        line_start = code.rfind("\n", 0, match.start()) + 1
+        if code[line_start : match.start()].lstrip().startswith("#"):
+            continue
+        arguments = top_level(call_arguments(code, match.end() - 1))
+        argument = None
+        if match.group(1) == "create_pipeline":
+            name = name_argument_pattern.search(arguments)
+            positional = string_literal_pattern.match(arguments.lstrip())
+            if name is not None:
+                argument = literal_value(name)
+            elif positional is not None:
+                argument = literal_value(positional)
+        else:
+            config = config_argument_pattern.search(arguments)
+            literals = string_literal_pattern.findall(config.group(1) if config else arguments)
+            if len(literals) > 0:
+                argument = "".join(literals[-1])
+        yield match.group(1), argument, code.count("\n", 0, match.start()) + 1
+
+
+def scan_block(code: str) -> BlockFacts:
+    # regex fallback for blocks that are not python - literals only, nothing assigned
+    calls = [PipelineCall(method, (argument,) if argument is not None else None, None, line) for method, argument, line in iter_pipeline_calls(code)]
+    paths = []
+    resets = []
+    for line_number, line in enumerate(code.split("\n"), start=1):
+        if line.lstrip().startswith("#"):
+            continue
+        for match in string_literal_pattern.finditer(line):
+            paths.append(PathLiteral((literal_value(match),), None, line_number))
+        for match in reset_pattern.finditer(line):
+            resets.append(ResetCall(match.group(1), line_number))
+    return BlockFacts(False, (), tuple(calls), tuple(paths), tuple(resets))
+
+
+def analyze_block(code: str) -> BlockFacts:
+    """facts for one code block, parsed with ast once per distinct block (keyed on its hash)"""
+    key = hashlib.sha1(code.encode()).hexdigest()
+    facts = _block_facts.get(key)
+    if facts is None:
+        try:
+            facts = BlockVisitor().facts(ast.parse(strip_magics(code)))
+        except (SyntaxError, ValueError):
+            facts = scan_block(code)
+        _block_facts[key] = facts
+    return facts
+
+
+def reset() -> None:
+    # forget every analyzed block and page - e.g., to time a cold parse
+    _block_facts.clear()
+    _page_facts.clear()
+
+
+def resolve(value: tuple, env: dict, strict: bool) -> str:
+    # a value as a string - unknown variables fail a strict resolve and read as "" otherwise (e.g., data_dir + "x",
+    # where data_dir depends on where the notebook runs)
+    if value is None:
+        return None
+    parts = []
+    for part in value:
+        if isinstance(part, Variable):
+            known = env.get(part.name)
+            if known is None:
+                if strict:
+                    return None
+                continue
+            part = known
+        parts.append(part)
+    return "".join(parts)
+
+
+def analyze_page(code_blocks: list) -> PageFacts:
+    """every block of a page analyzed in order, with string variables carried from block to block as the notebook
+    kernel would carry them - create_pipeline names resolve only when every part is known
+    """
+    key = tuple(code_blocks)
+    facts = _page_facts.get(key)
+    if facts is not None:
+        return facts
+    env = {}
+    calls = []
+    paths = []
+    resets = []
+    parsed = True
+    for block_number, block in enumerate(code_blocks):
+        block_facts = analyze_block(block)
+        parsed = parsed and block_facts.parsed
+        assignments = list(block_facts.assignments)
+
+        def env_at(line: int) -> dict:
+            # apply the block's assignments made before this line
+            while assignments and assignments[0][2] < line:
+                name, value, _ = assignments.pop(0)
+                resolved = resolve(value, env, strict=True)
+                if resolved is None:
+                    env.pop(name, None)
+                else:
+                    env[name] = resolved
+            return env
+
+        uses = (
+            [(v.line, 0, v) for v in block_facts.calls] + [(v.line, 1, v) for v in block_facts.paths] + [(v.line, 2, v) for v in block_facts.resets]
+        )
+        for line, kind, use in sorted(uses, key=lambda v: (v[0], v[1])):
+            known = env_at(line)
+            if kind == 0:
+                argument = resolve(use.argument, known, strict=use.method == "create_pipeline")
+                calls.append(PageCall(use.method, argument, use.target, block_number, line, use.module_chain))
+            elif kind == 1:
+                paths.append(PagePath(resolve(use.value, known, strict=False), use.role, block_number, line))
+            else:
+                resets.append(PageReset(use.target, block_number, line))
+        env_at(float("inf"))
+    facts = PageFacts(tuple(calls), tuple(paths), tuple(resets), parsed)
+    _page_facts[key] = facts
+    return facts
+
+
+def pipeline_names(code_blocks: list) -> list:
+    # every create_pipeline name a page uses, in order of first use
+    return list(dict.fromkeys(v.argument for v in analyze_page(code_blocks).calls if v.method == "create_pipeline" and v.argument is not None))
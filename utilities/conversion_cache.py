@@ -0,0 +1,181 @@
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+from utilities import base_dir, cache_dir
+from utilities.output_stage import stage_key
+
+manifest_path = os.path.join(cache_dir, "conversion_manifest.json")
+manifest_version = 2
+docs_dir = os.path.join(base_dir, "docs")
+# the no-remove conversion only feeds the checks - it is built here so it never clobbers the published pages in docs/
+no_remove_dir = os.path.join(cache_dir, "converted", "no_remove")
+_converter_version = None
+
+
+def converter_version() -> str:
+    # looked up once per process - importlib.metadata is only imported when a conversion needs it
+    global _converter_version
+    if _converter_version is None:
+        from importlib.metadata import version, PackageNotFoundError
+
+        try:
+            _converter_version = version("nbconvert")
+        except PackageNotFoundError:
+            _converter_version = "unknown"
+    return _converter_version
+
+
+def mode_name(remove: bool, options: dict = None) -> str:
+    # conversion mode - tag handling plus any output stage settings
+    mode = "remove" if remove else "no_remove"
+    key = stage_key(options)
+    return f"{mode}[{key}]" if key else mode
+
+
+def output_dir(remove: bool) -> str:
+    # root of the tree a conversion mode writes to, mirroring docs/
+    return docs_dir if remove else no_remove_dir
+
+
+def markdown_target(docpath: str, remove: bool) -> str:
+    # where the markdown for a notebook lands in a conversion mode
+    relative = os.path.relpath(os.path.splitext(os.path.abspath(docpath))[0] + ".md", docs_dir)
+    return os.path.join(output_dir(remove), relative)
+
+
+@contextmanager
+def cache_lock(name: str):
+    # exclusive lock shared by every process using the cache (e.g., pytest-xdist workers) - a no-op where fcntl is unavailable
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, f"{name}.lock"), "w") as file:
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def load_manifest() -> dict:
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("version") != manifest_version:
+        return {}
+    return manifest.get("entries", {})
+
+
+def save_manifest(entries: dict) -> None:
+    # write atomically so an interrupted run never leaves a half-written manifest
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"version": manifest_version, "entries": entries}, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def update_manifest(updates: dict, dropped: list = None) -> None:
+    # merge into the manifest as it is on disk now, under a lock so concurrent runs never drop each other's entries
+    with cache_lock("manifest"):
+        entries = load_manifest()
+        entries.update(updates)
+        for markdown in dropped or []:
+            entries.pop(markdown, None)
+        save_manifest(entries)
+
+
+def notebook_key(docpath: str, mode: str) -> str:
+    # content hash of the notebook plus everything else that changes its markdown
+    digest = hashlib.sha256()
+    with open(docpath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(f"|{mode}|nbconvert-{converter_version()}".encode())
+    return digest.hexdigest()
+
+
+def relative_path(path: str) -> str:
+    return os.path.relpath(path, base_dir)
+
+
+def file_stamp(path: str) -> list:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_fresh(docpath: str, mode: str, entry: dict) -> bool:
+    # an entry is fresh if the notebook and mode are unchanged and every output is still on disk untouched
+    if not entry or entry.get("mode") != mode:
+        return False
+    try:
+        if file_stamp(docpath) != entry["notebook_stamp"]:
+            # stat changed (e.g., git checkout) - fall back to the content hash
+            if notebook_key(docpath, mode) != entry["key"]:
+                return False
+            entry["notebook_stamp"] = file_stamp(docpath)
+        elif entry.get("converter") != converter_version():
+            return False
+        if file_stamp(os.path.join(base_dir, entry["markdown"])) != entry["markdown_stamp"]:
+            return False
+    except (OSError, KeyError):
+        return False
+    return all(os.path.isfile(os.path.join(base_dir, v)) for v in entry.get("outputs", []))
+
+
+def make_entry(docpath: str, mode: str, markdown_path: str, outputs: list, size_report: dict = None) -> dict:
+    return {
+        "notebook": relative_path(docpath),
+        "key": notebook_key(docpath, mode),
+        "mode": mode,
+        "converter": converter_version(),
+        "notebook_stamp": file_stamp(docpath),
+        "markdown": relative_path(markdown_path),
+        "markdown_stamp": file_stamp(markdown_path),
+        "outputs": sorted(relative_path(v) for v in outputs),
+        "size_report": size_report,
+    }
+
+
+def clean_stale_outputs(markdown_path: str, outputs: list) -> list:
+    # remove files in the page's _files/ directory that the latest conversion did not write
+    files_dir = os.path.splitext(markdown_path)[0] + "_files"
+    if not os.path.isdir(files_dir):
+        return []
+    keep = {os.path.abspath(v) for v in outputs}
+    removed = []
+    for file_name in os.listdir(files_dir):
+        file_path = os.path.abspath(os.path.join(files_dir, file_name))
+        if file_path not in keep and os.path.isfile(file_path):
+            os.remove(file_path)
+            removed.append(file_path)
+    if len(os.listdir(files_dir)) == 0:
+        os.rmdir(files_dir)
+    return removed
+
+
+def prune_manifest() -> list:
+    # drop entries - and their markdown / _files artifacts - whose notebook no longer exists
+    entries = load_manifest()
+    dropped = []
+    removed = []
+    for markdown, entry in entries.items():
+        if os.path.isfile(os.path.join(base_dir, entry["notebook"])):
+            continue
+        dropped.append(markdown)
+        for path in [markdown] + entry.get("outputs", []):
+            if os.path.isfile(os.path.join(base_dir, path)):
+                os.remove(os.path.join(base_dir, path))
+                removed.append(path)
+        files_dir = os.path.join(base_dir, os.path.splitext(markdown)[0] + "_files")
+        if os.path.isdir(files_dir) and len(os.listdir(files_dir)) == 0:
+            os.rmdir(files_dir)
+    if len(dropped) > 0:
+        update_manifest({}, dropped)
+    return removed
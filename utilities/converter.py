@@ -1,85 +1,255 @@
-import yaml
-import subprocess
+import os
+import time
 from utilities import base_dir
-
-
-def get_all_values(nested_dict: dict) -> list:
-    values = []
-
-    def extract_values(d):
-        if isinstance(d, dict):
-            for key, value in d.items():
-                if isinstance(value, dict):
-                    extract_values(value)
-                elif isinstance(value, list):
-                    for item in value:
-                        extract_values(item)
-                else:
-                    values.append(value)
-        elif isinstance(d, list):
-            for item in d:
-                extract_values(item)
-        else:
-            values.append(d)
-
-    extract_values(nested_dict)
-    return values
+from utilities.conversion_cache import (
+    load_manifest,
+    update_manifest,
+    prune_manifest,
+    is_fresh,
+    make_entry,
+    clean_stale_outputs,
+    relative_path,
+    mode_name,
+    markdown_target,
+)
+from utilities.output_stage import output_stage_preprocessor, finish_output_stage, stage_enabled, output_store_dir
+from utilities.instrumentation import count, item_name, record
+
+# exporter / writer pairs built once per process and conversion mode
+_exporters = {}
+# a notebook converts in about 15ms once nbconvert is loaded, while a pool worker takes 0.5 - 0.8s to start and import
+# it - below this many notebooks to convert the pool costs more than it saves, so workers=None converts serially
+min_pool_notebooks = 100
 
 
 def collect_mkdocks_toc():
-    # open mkdocs toc and collect all entries
-    file_path = f"{base_dir}/mkdocs.yml"
-    with open(file_path, "r") as file:
-        mkdocks_toc = yaml.safe_load(file)
-    return get_all_values(mkdocks_toc["nav"])
-
-
-def convert_notebook_remove(docpath: str) -> None:
+    # every entry of the mkdocs toc - parsed once per process by the doc index
+    from utilities.doc_index import get_doc_index
+
+    return get_doc_index().toc
+
+
+def toc_notebook_paths() -> list:
+    # absolute path to the notebook behind each toc entry - hand-written pages (e.g., index.md) have none
+    docpaths = [f"{base_dir}/docs/" + v.replace(".md", ".ipynb") for v in collect_mkdocks_toc()]
+    return [v for v in docpaths if os.path.isfile(v)]
+
+
+def get_exporter(remove: bool) -> tuple:
+    if remove not in _exporters:
+        # nbconvert is imported here so that only conversion pays for it
+        from traitlets.config import Config
+        from nbconvert import MarkdownExporter
+        from nbconvert.writers import FilesWriter
+
+        config = Config()
+        config.TagRemovePreprocessor.enabled = True
+        if remove:
+            config.TagRemovePreprocessor.remove_cell_tags = ["remove_cell"]
+            config.TagRemovePreprocessor.remove_all_outputs_tags = ["remove_output"]
+        exporter = MarkdownExporter(config=config)
+        # runs after nbconvert's own preprocessors - a no-op unless resources carry output stage options
+        exporter.register_preprocessor(output_stage_preprocessor, enabled=True)
+        _exporters[remove] = (exporter, FilesWriter())
+    return _exporters[remove]
+
+
+def convert_notebook(docpath: str, remove: bool = True, options: dict = None) -> dict:
+    # convert a single notebook to markdown, mirroring `jupyter nbconvert --to markdown`
+    # the remove conversion writes next to the notebook in docs/, the no-remove one into its own tree (see markdown_target)
+    # options switch on the output stage (see utilities.output_stage) - trimming text outputs / externalizing media
+    result = {
+        "docpath": docpath,
+        "success": True,
+        "error": None,
+        "elapsed": 0.0,
+        "skipped": False,
+        "markdown": None,
+        "outputs": [],
+        "size_report": None,
+    }
+    start = time.perf_counter()
     try:
-        command = [
-            "jupyter",
-            "nbconvert",
-            f"{docpath}",
-            "--TagRemovePreprocessor.enabled=True",
-            "--TagRemovePreprocessor.remove_cell_tags=['remove_cell']",
-            "--TagRemovePreprocessor.remove_all_outputs_tags=['remove_output']",
-            "--to",
-            "markdown",
-        ]
-        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        if process.returncode != 0:
-            print(f"FAILURE: notebook to markdown conversion failed with error: {process.stderr.decode().strip()}")
+        exporter, writer = get_exporter(remove)
+        notebook_name = os.path.splitext(os.path.basename(docpath))[0]
+        markdown_path = markdown_target(docpath, remove)
+        writer.build_directory = os.path.dirname(markdown_path)
+        os.makedirs(writer.build_directory, exist_ok=True)
+        resources = {"unique_key": notebook_name, "output_files_dir": f"{notebook_name}_files"}
+        if stage_enabled(options):
+            resources["output_stage"] = {"options": options, "markdown_path": markdown_path, "store_dir": output_store_dir}
+        output, resources = exporter.from_filename(docpath, resources=resources)
+        if "output_stage" in resources:
+            output = finish_output_stage(output, resources)
+            result["size_report"] = resources["output_stage"]["report"]
+            result["outputs"] += resources["output_stage"]["stored"]
+        result["markdown"] = writer.write(output, resources, notebook_name=notebook_name)
+        result["outputs"] += [os.path.join(writer.build_directory, v) for v in resources.get("outputs", {})]
     except Exception as e:
-        print(f"FAILURE: notebook to markdown conversion failed with exception {e}")
-
-
-def convert_all_notebooks_remove():
-    # collect all toc entries from mkdocs yaml
-    all_toc_files = collect_mkdocks_toc()
-
-    # convert files
-    for i in range(len(all_toc_files)):
-        docpath = f"{base_dir}/docs/" + all_toc_files[i].replace(".md", ".ipynb")
-        convert_notebook_remove(docpath)
-
-
-def convert_notebook_no_remove(docpath: str) -> None:
+        result["success"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def default_workers(docpaths: list) -> int:
+    # one per cpu for a large batch, else serial - see min_pool_notebooks
+    return (os.cpu_count() or 1) if len(docpaths) >= min_pool_notebooks else 1
+
+
+def run_conversions(docpaths: list, remove: bool, workers: int = None, options: dict = None) -> list:
+    # convert notebooks across a process pool - each worker loads nbconvert once
+    if workers is None:
+        workers = default_workers(docpaths)
+    workers = min(workers, len(docpaths))
+    if workers <= 1:
+        return [convert_notebook(docpath, remove, options) for docpath in docpaths]
+    # multiprocessing is imported here so that serial runs (and every check that imports this module) skip it
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(convert_notebook, docpaths, [remove] * len(docpaths), [options] * len(docpaths)))
+
+
+def iter_run_conversions(docpaths: list, remove: bool, workers: int = None, options: dict = None):
+    # as run_conversions, but yield each result as soon as its notebook is converted
+    if workers is None:
+        workers = default_workers(docpaths)
+    workers = min(workers, len(docpaths))
+    if workers <= 1:
+        for docpath in docpaths:
+            yield convert_notebook(docpath, remove, options)
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(convert_notebook, docpath, remove, options) for docpath in docpaths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def iter_conversions(docpaths: list, remove: bool = True, workers: int = None, force: bool = False, options: dict = None):
+    """yield a conversion result per notebook as soon as it is known - unchanged notebooks at once, then the rest as
+    they finish converting
+
+    only notebooks whose content / mode changed since their last conversion are converted, unless forced; the manifest
+    is updated once the results have been consumed (or the consumer stops early)
+    """
+    mode = mode_name(remove, options)
+    entries = load_manifest()
+    updates = {}
+    stale = []
+    failed = []
     try:
-        command = ["jupyter", "nbconvert", f"{docpath}", "--TagRemovePreprocessor.enabled=True", "--to", "markdown"]
-        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        if process.returncode != 0:
-            print(f"FAILURE: notebook to markdown conversion failed with error: {process.stderr.decode().strip()}")
-    except Exception as e:
-        print(f"FAILURE: notebook to markdown conversion failed with exception {e}")
-
-
-def convert_all_notebooks_no_remove():
-    # collect all toc entries from mkdocs yaml
-    all_toc_files = collect_mkdocks_toc()
-
-    # convert files
-    for i in range(len(all_toc_files)):
-        docpath = f"{base_dir}/docs/" + all_toc_files[i].replace(".md", ".ipynb")
-        convert_notebook_no_remove(docpath)
+        for docpath in docpaths:
+            markdown = relative_path(markdown_target(docpath, remove))
+            entry = entries.get(markdown)
+            if not force and is_fresh(docpath, mode, entry):
+                count("convert_skipped")
+                updates[markdown] = entry
+                yield {
+                    "docpath": docpath,
+                    "success": True,
+                    "error": None,
+                    "elapsed": 0.0,
+                    "skipped": True,
+                    "markdown": os.path.join(base_dir, entry["markdown"]),
+                    "outputs": [os.path.join(base_dir, v) for v in entry["outputs"]],
+                }
+            else:
+                stale.append(docpath)
+
+        for result in iter_run_conversions(stale, remove, workers, options):
+            docpath = result["docpath"]
+            # conversions may run in pool workers - their time is recorded here, from the result
+            record("convert", result["elapsed"], item_name(docpath))
+            if result["success"]:
+                clean_stale_outputs(result["markdown"], result["outputs"])
+                updates[relative_path(result["markdown"])] = make_entry(docpath, mode, result["markdown"], result["outputs"], result["size_report"])
+            else:
+                # failed notebooks lose their entry so they are retried next time
+                failed.append(relative_path(markdown_target(docpath, remove)))
+            yield result
+    finally:
+        update_manifest(updates, failed)
+
+
+def convert_notebooks(docpaths: list, remove: bool = True, workers: int = None, force: bool = False, options: dict = None) -> list:
+    # convert only notebooks whose content / mode changed since their last conversion, unless forced
+    results = {v["docpath"]: v for v in iter_conversions(docpaths, remove, workers, force, options)}
+    return [results[v] for v in docpaths]
+
+
+def convert_notebook_remove(docpath: str, force: bool = False) -> dict:
+    return convert_notebooks([docpath], remove=True, workers=1, force=force)[0]
+
+
+def convert_all_notebooks_remove(workers: int = None, force: bool = False, options: dict = None) -> list:
+    prune_manifest()
+    return convert_notebooks(toc_notebook_paths(), remove=True, workers=workers, force=force, options=options)
+
+
+def convert_notebook_no_remove(docpath: str, force: bool = False) -> dict:
+    return convert_notebooks([docpath], remove=False, workers=1, force=force)[0]
+
+
+def convert_all_notebooks_no_remove(workers: int = None, force: bool = False, options: dict = None) -> list:
+    prune_manifest()
+    return convert_notebooks(toc_notebook_paths(), remove=False, workers=workers, force=force, options=options)
+
+
+def print_size_report(results: list) -> None:
+    # page weight per notebook before / after the output stage
+    rows = [v for v in results if v.get("size_report")]
+    print(f"{'notebook':<90} {'before':>12} {'after':>12} {'truncated':>10}")
+    for v in sorted(rows, key=lambda r: -r["size_report"]["before"]["page_bytes"]):
+        report = v["size_report"]
+        print(
+            f"{relative_path(v['docpath']):<90} {report['before']['page_bytes']:>12,} {report['after']['page_bytes']:>12,} {report['truncated_outputs']:>10}"
+        )
+    print(
+        f"{'total':<90} {sum(v['size_report']['before']['page_bytes'] for v in rows):>12,} {sum(v['size_report']['after']['page_bytes'] for v in rows):>12,}"
+    )
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="convert all notebooks in the mkdocs toc to markdown")
+    parser.add_argument(
+        "--no-remove",
+        action="store_true",
+        help="ignore remove_cell / remove_output tags - written under .docs_cache/converted/no_remove/ for the checks",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"number of conversion processes (default: cpu count from {min_pool_notebooks} notebooks to convert, else 1)",
+    )
+    parser.add_argument("--force", action="store_true", help="reconvert every notebook, ignoring the conversion manifest")
+    parser.add_argument("--max-output-lines", type=int, default=None, help="truncate text outputs longer than this many lines")
+    parser.add_argument("--max-output-chars", type=int, default=None, help="truncate text outputs longer than this many characters")
+    parser.add_argument("--externalize-images", action="store_true", help="move image / base64 media outputs into docs/img/outputs/")
+    parser.add_argument("--size-report", default=None, help="print page weight before / after the output stage and write it as json to this path")
+    args = parser.parse_args()
+
+    options = {"max_output_lines": args.max_output_lines, "max_output_chars": args.max_output_chars, "externalize_images": args.externalize_images}
+    start = time.perf_counter()
+    if args.no_remove:
+        results = convert_all_notebooks_no_remove(workers=args.workers, force=args.force, options=options)
+    else:
+        results = convert_all_notebooks_remove(workers=args.workers, force=args.force, options=options)
+    failures = [v for v in results if not v["success"]]
+    skipped = [v for v in results if v["skipped"]]
+    for v in failures:
+        print(f"FAILURE: {v['docpath']} - {v['error']}")
+    if args.size_report:
+        print_size_report(results)
+        with open(args.size_report, "w", encoding="utf-8") as file:
+            json.dump({relative_path(v["docpath"]): v["size_report"] for v in results}, file, indent=2)
+    print(
+        f"converted {len(results) - len(failures) - len(skipped)}/{len(results)} notebooks ({len(skipped)} unchanged) in {time.perf_counter() - start:.2f}s"
+    )
+    raise SystemExit(1 if failures else 0)
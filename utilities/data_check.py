@@ -1,85 +1,124 @@
 import os
 import re
-from utilities.converter import collect_mkdocks_toc
 from utilities import base_dir
-from utilities.utilities import get_code_from_markdown, load_md_doc, list_files_in_directory
+from utilities.doc_index import get_doc_index
+from utilities.code_analyzer import analyze_page
+from utilities.instrumentation import timed
 
+data_dir = os.path.join(base_dir, "data")
+data_areas = ["input", "output", "other"]
 acceptable_extensions = ["txt", "docx", "pptx", "png", "jpg", "jpeg", "mp3", "npy", "json"]
-all_input_data_links = list_files_in_directory(base_dir + "/data/input/")
-
-
-def is_attempted_data_path(input_string: str) -> bool:
-    pattern = r"^(?!#)\w+\s*=\s*(['\"]).*?\1"
-    return bool(re.match(pattern, input_string))
-
-
-def is_data_input_path(input_string: str) -> bool:
-    pattern = r".*input/.*"
-    return bool(re.match(pattern, input_string))
-
-
-def is_data_output_path(input_string: str) -> bool:
-    pattern = r".*output/.*"
-    return bool(re.match(pattern, input_string))
-
-
-def extract_quoted_portion(input_string: str) -> list:
-    # Check if the string does not start with #
-    if input_string.startswith("#"):
-        return []
-
-    # Regex pattern to find all quoted portions in the string
-    pattern = r"['\"](.*?)['\"]"
-
-    # Find all matches
-    matches = re.findall(pattern, input_string)
-
-    return matches
-
-
-def check_all_page_data_links() -> tuple:
-    # get all doc links from toc
-    all_docs = collect_mkdocks_toc()
-
-    # loop over docs, examine data links
+# krixik outputs that pages point at in data/output/
+output_extensions = ["faiss", "db"]
+# a path running through input/, output/ or other/ and ending in a data extension - group "path" starts at the area
+data_path_pattern = re.compile(
+    r"(?:[^'\"\n]*/)?(?P<path>(?P<area>%s)/[^'\"\n]*\.(?:%s))" % ("|".join(data_areas), "|".join(acceptable_extensions + output_extensions))
+)
+
+
+def build_data_index(directory: str = data_dir) -> dict:
+    # every file under data/input, data/output and data/other (subfolders included) -> size, keyed like "input/x.txt"
+    files = {}
+    for area in data_areas:
+        for root, _, names in os.walk(os.path.join(directory, area)):
+            for name in names:
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, directory).replace(os.sep, "/")] = os.path.getsize(path)
+    return files
+
+
+def iter_data_references(code_blocks: list):
+    # yield (block, line, area, path) for each data path in code - every string the code builds (literals, data_dir
+    # concatenations, f-strings) as read by the code analyzer, so comments never count
+    for string in analyze_page(code_blocks).paths:
+        match = data_path_pattern.fullmatch(string.path)
+        if match is not None:
+            yield string.block, string.line, match.group("area"), match.group("path")
+
+
+def data_link_report(index=None, directory: str = data_dir) -> dict:
+    """every data path referenced by a page, checked against one index of data/ built up front
+
+    references carry page / block / line; dead lists references to files that do not exist, by area; unused lists
+    data/input files no page references - largest first, with their sizes
+    """
+    index = index or get_doc_index()
+    with timed("data_index"):
+        files = build_data_index(directory)
+    references = []
+    with timed("data_references"):
+        for page in index.toc:
+            for block, line, area, path in iter_data_references(index.page(page).code_blocks):
+                references.append({"page": page, "block": block, "line": line, "area": area, "path": path, "exists": path in files})
+    referenced = {v["path"] for v in references}
+    unused = [{"path": k, "bytes": v} for k, v in files.items() if k.startswith("input/") and k not in referenced]
+    return {
+        "references": references,
+        "dead": {area: [v for v in references if v["area"] == area and not v["exists"]] for area in data_areas},
+        "unused": sorted(unused, key=lambda v: (-v["bytes"], v["path"])),
+        "area_bytes": {area: sum(v for k, v in files.items() if k.startswith(area + "/")) for area in data_areas},
+    }
+
+
+def check_all_page_data_links(report: dict = None) -> tuple:
+    # absolute paths of every input / other file referenced by pages, plus per-page dead references
+    report = report or data_link_report()
     all_page_data_links = []
-    all_page_dead_links = []
-    for i, page in enumerate(all_docs):
-        # get md code blocks for next doc
-        md_filepath = base_dir + "/docs/" + all_docs[i]
-        markdown_content = load_md_doc(md_filepath)
-        code_blocks = get_code_from_markdown([markdown_content])
-
-        # loop over code blocks and extract data links
-        page_data_links = []
-        for block in code_blocks:
-            lines = block.split("\n")
-            lines = [v for v in lines if len(v) > 0]
-            for line in lines:
-                extraction = extract_quoted_portion(line)
-                if len(extraction) > 0:
-                    for element in extraction:
-                        if is_data_input_path(element):
-                            for ext in acceptable_extensions:
-                                if element.endswith(ext):
-                                    absolute_link = os.path.abspath(os.path.join(os.path.dirname(md_filepath), "../../../data", element))
-                                    page_data_links.append(absolute_link)
-
-        page_data_links = list(set(page_data_links))
-        all_page_data_links += page_data_links
-        dead_page_links = [v for v in page_data_links if v not in all_input_data_links]
-        if len(dead_page_links) > 0:
-            page_entry = {}
-            page_entry["page"] = md_filepath
-            page_entry["dead_page_links"] = dead_page_links
-            all_page_dead_links.append(page_entry)
-    return list(set(all_page_data_links)), all_page_dead_links
+    dead_by_page = {}
+    for reference in report["references"]:
+        if reference["area"] == "output":
+            continue
+        absolute_link = os.path.join(data_dir, reference["path"])
+        all_page_data_links.append(absolute_link)
+        if not reference["exists"]:
+            dead_by_page.setdefault(os.path.join(base_dir, "docs", reference["page"]), set()).add(absolute_link)
+    all_page_dead_links = [{"page": k, "dead_page_links": sorted(v)} for k, v in dead_by_page.items()]
+    return sorted(set(all_page_data_links)), all_page_dead_links
 
 
 def check_for_dead_data_links() -> tuple:
     # collect all data links from page, and dead links not present in data/input/
-    all_page_data_links, all_page_dead_links = check_all_page_data_links()
+    report = data_link_report()
+    all_page_data_links, all_page_dead_links = check_all_page_data_links(report)
 
     # collect all links in data/input not present in all data links collected from pages
-    all_data_dead_links = list(set(all_input_data_links) - set(all_page_data_links))
+    all_data_dead_links = [os.path.join(data_dir, v["path"]) for v in report["unused"]]
+
+    # output files are written by running the notebooks - missing ones are reported, not failed on
+    for v in report["dead"]["output"]:
+        print(f"WARNING: {v['page']} (code block {v['block']}, line {v['line']}) references {v['path']} - not found in data/output/")
+
+    # kept output artifacts must be readable, reasonably sized and hold what the notebooks print - sqlite / numpy
+    # readers are only imported when this runs
+    from utilities.artifact_check import displayed_output_report, oversized_bytes
+
+    outputs = displayed_output_report()
+    for name in outputs["oversized"]:
+        print(f"WARNING: data/output/{name} is larger than {oversized_bytes:,} bytes")
+    for v in outputs["mismatched"]:
+        print(f"WARNING: {v['notebook']} (cell {v['cell']}) prints output that does not match data/output/{v['artifact']} - {v['problem']}")
     return all_page_dead_links, all_data_dead_links
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="report data/ references made by pages - dead references and unused inputs")
+    parser.add_argument("--json", default=None, help="also write the full report as json to this path")
+    args = parser.parse_args()
+
+    report = data_link_report()
+    for area in data_areas:
+        for v in report["dead"][area]:
+            print(f"DEAD: {v['page']} (code block {v['block']}, line {v['line']}) -> {v['path']}")
+    for v in report["unused"]:
+        print(f"UNUSED: {v['path']} ({v['bytes']:,} bytes)")
+    print(
+        f"{len(report['references'])} references, {sum(len(v) for v in report['dead'].values())} dead, "
+        + f"{len(report['unused'])} unused inputs ({sum(v['bytes'] for v in report['unused']):,} bytes) - "
+        + ", ".join(f"data/{k}: {v:,} bytes" for k, v in report["area_bytes"].items())
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
@@ -0,0 +1,168 @@
+import os
+from typing import NamedTuple
+from utilities import base_dir
+from utilities.conversion_cache import markdown_target
+from utilities.instrumentation import count, item_name, timed
+from utilities.md_tokenizer import iter_markdown_tokens
+from utilities.notebook_reader import load_notebook_cells
+from utilities.utilities import split_links, get_code_from_markdown, get_all_values
+from utilities.code_analyzer import pipeline_names
+
+
+class PageRecord(NamedTuple):
+    path: str
+    anchors: tuple
+    intra_links: tuple
+    inter_links: tuple
+    outer_links: tuple
+    # image sources as written - ![](...) and <img src="...">
+    images: tuple
+    code_blocks: tuple
+    pipeline_names: tuple
+
+
+def build_record(path: str, markdown_lines: list, code_blocks: list, link_base: str) -> PageRecord:
+    anchors = []
+    links = []
+    images = []
+    for kind, value, _ in iter_markdown_tokens(markdown_lines):
+        if kind == "heading":
+            anchors.append(value)
+        elif kind == "image":
+            images.append(value)
+        else:
+            links.append(value)
+    intra_links, inter_links, outer_links = split_links(links, link_base)
+    return PageRecord(
+        path=path,
+        # the first heading is the page title
+        anchors=tuple(anchors[1:]),
+        intra_links=tuple(intra_links),
+        inter_links=tuple(inter_links),
+        outer_links=tuple(outer_links),
+        images=tuple(images),
+        code_blocks=tuple(code_blocks),
+        pipeline_names=tuple(pipeline_names(code_blocks)),
+    )
+
+
+def parse_markdown_file(path: str, link_base: str = None) -> PageRecord:
+    # read and parse a markdown page exactly once - links resolve against link_base (the page's place in docs/) when given
+    with open(path, "r", encoding="utf-8") as file:
+        markdown_content = file.read()
+    return build_record(path, markdown_content.splitlines(), get_code_from_markdown([markdown_content]), link_base or path)
+
+
+def parse_notebook_file(notebook_path: str, remove: bool = False) -> PageRecord:
+    # markdown cells give headings / links and code cells give code blocks - no conversion, outputs never loaded
+    markdown_lines = []
+    code_blocks = []
+    for cell_type, source, _ in load_notebook_cells(notebook_path, remove=remove):
+        if cell_type == "markdown":
+            # nbconvert separates cells with a blank line
+            markdown_lines += source.splitlines() + [""]
+            code_blocks += get_code_from_markdown([source + "\n"])
+        elif cell_type == "code":
+            code_blocks.append(source + "\n")
+    markdown_path = notebook_path[: -len(".ipynb")] + ".md"
+    return build_record(notebook_path, markdown_lines, code_blocks, markdown_path)
+
+
+class DocIndex:
+    """mkdocs toc and per-page parse results, each computed once and reused by every check
+
+    page records are keyed on the file's size / mtime so a page rewritten by conversion is re-parsed on next lookup
+
+    with source="markdown" and remove=False a page is read from the no-remove conversion (see markdown_target) when
+    one has been built, and from docs/ otherwise
+
+    with source="notebook" pages are read from the .ipynb behind each .md (when there is one) so checks can run
+    before - or without - nbconvert; remove decides whether cells tagged remove_cell are dropped
+    """
+
+    def __init__(self, root: str = base_dir, source: str = "markdown", remove: bool = False):
+        if source not in ["markdown", "notebook"]:
+            raise ValueError(f"unknown DocIndex source {source}")
+        self.root = root
+        self.docs_dir = os.path.join(root, "docs")
+        self.source = source
+        self.remove = remove
+        self._toc = None
+        self._toc_links = None
+        self._records = {}
+
+    @property
+    def toc(self) -> list:
+        if self._toc is None:
+            # yaml is imported on first use - collecting or importing a check does not pay for it
+            import yaml
+
+            with open(os.path.join(self.root, "mkdocs.yml"), "r") as file:
+                mkdocks_toc = yaml.safe_load(file)
+            self._toc = get_all_values(mkdocks_toc["nav"])
+        return list(self._toc)
+
+    @property
+    def toc_links(self) -> frozenset:
+        # toc pages as inter-page links resolve - "docs/<page>"
+        if self._toc_links is None:
+            self._toc_links = frozenset("docs/" + v for v in self.toc)
+        return self._toc_links
+
+    def source_path(self, path: str) -> str:
+        # the file a page is actually read from
+        path = os.path.abspath(path)
+        if not path.endswith(".md") or not path.startswith(self.docs_dir + os.sep):
+            return path
+        if self.source == "notebook":
+            notebook_path = path[: -len(".md")] + ".ipynb"
+            if os.path.isfile(notebook_path):
+                return notebook_path
+        elif not self.remove and self.root == base_dir:
+            converted_path = markdown_target(path, remove=False)
+            if os.path.isfile(converted_path):
+                return converted_path
+        return path
+
+    def file(self, path: str) -> PageRecord:
+        # record for any page by absolute path (e.g., README.md)
+        page_path = os.path.abspath(path)
+        path = self.source_path(page_path)
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        cached = self._records.get(path)
+        if cached is not None and cached[0] == stamp:
+            count("parse_cache_hits")
+            return cached[1]
+        with timed("parse", item_name(path)):
+            if path.endswith(".ipynb"):
+                record = parse_notebook_file(path, remove=self.remove)
+            else:
+                record = parse_markdown_file(path, link_base=page_path)
+        self._records[path] = (stamp, record)
+        return record
+
+    def page(self, page: str) -> PageRecord:
+        # record for a toc entry - a path relative to docs/
+        return self.file(os.path.join(self.docs_dir, page))
+
+    def pages(self) -> list:
+        return [self.page(v) for v in self.toc]
+
+
+_indexes = {}
+_index_options = {"source": "markdown", "remove": False}
+
+
+def configure_doc_index(source: str = "markdown", remove: bool = False) -> None:
+    # choose where every check reads pages from - e.g., configure_doc_index(source="notebook")
+    _index_options["source"] = source
+    _index_options["remove"] = remove
+    _indexes.clear()
+
+
+def get_doc_index(root: str = base_dir) -> DocIndex:
+    # one index per docs tree for the life of the process (i.e., the pytest session / xdist worker)
+    if root not in _indexes:
+        _indexes[root] = DocIndex(root, **_index_options)
+    return _indexes[root]
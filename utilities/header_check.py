@@ -1,9 +1,9 @@
-from utilities.utilities import extract_headings_from_markdown, nono_chars
-from utilities import base_dir
+from utilities.utilities import nono_chars
+from utilities.doc_index import get_doc_index
 
 
-def check_file_headers(markdown_file: str) -> list:
-    headers = extract_headings_from_markdown(f"{base_dir}/docs/" + markdown_file)
+def check_file_headers(markdown_file: str, index=None) -> list:
+    headers = (index or get_doc_index()).page(markdown_file).anchors
     dead_headers = []
     for h in headers:
         for no in nono_chars:
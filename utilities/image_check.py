@@ -0,0 +1,103 @@
+import os
+from utilities import base_dir
+from utilities.doc_index import DocIndex
+from utilities.instrumentation import timed
+
+image_extensions = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico")
+# theme images set in mkdocs.yml - referenced by every page without appearing in any of them
+theme_image_keys = ["logo", "favicon"]
+
+
+def build_image_index(root: str = base_dir) -> dict:
+    # every image file under docs/ (img/, assets/images/, nbconvert's *_files/ and the output store) -> size, keyed
+    # repo-relative like "docs/img/x.png"
+    files = {}
+    for directory, _, names in os.walk(os.path.join(root, "docs")):
+        for name in names:
+            if name.lower().endswith(image_extensions):
+                path = os.path.join(directory, name)
+                files[os.path.relpath(path, root).replace(os.sep, "/")] = os.path.getsize(path)
+    return files
+
+
+def resolve_image(source: str, page_path: str, root: str = base_dir) -> str:
+    # repo-relative path of a local image source as written on the page at page_path - None for remote / inline images
+    source = source.split("#", 1)[0].split("?", 1)[0]
+    if source == "" or "://" in source or source.startswith(("data:", "//")):
+        return None
+    if source.startswith("/"):
+        path = os.path.join(root, "docs", source.lstrip("/"))
+    else:
+        path = os.path.join(os.path.dirname(page_path), source)
+    return os.path.relpath(os.path.normpath(path), root).replace(os.sep, "/")
+
+
+def theme_images(root: str = base_dir) -> list:
+    import yaml
+
+    with open(os.path.join(root, "mkdocs.yml"), "r") as file:
+        theme = (yaml.safe_load(file) or {}).get("theme", {})
+    return [f"docs/{theme[v]}" for v in theme_image_keys if isinstance(theme.get(v), str)]
+
+
+def image_report(index=None) -> dict:
+    """every local image referenced by the published pages and README, checked against one index of docs/ images
+
+    pages are read as the final conversion writes them to docs/ (remove_cell tags applied), since nbconvert's
+    *_files/ images are only referenced from there. references carry page / source / path; missing lists references
+    to files that do not exist, and unused lists images nothing references - largest first, with their sizes
+    """
+    index = index or DocIndex(remove=True)
+    with timed("image_index"):
+        files = build_image_index(index.root)
+    references = []
+    pages = [(v, os.path.join(index.docs_dir, v)) for v in index.toc] + [("README.md", os.path.join(index.root, "README.md"))]
+    with timed("image_references"):
+        for page, page_path in pages:
+            if not os.path.isfile(page_path):
+                continue
+            for source in dict.fromkeys(index.file(page_path).images):
+                path = resolve_image(source, page_path, index.root)
+                if path is not None:
+                    references.append({"page": page, "source": source, "path": path, "exists": path in files})
+    referenced = {v["path"] for v in references} | set(theme_images(index.root))
+    unused = [{"path": k, "bytes": v} for k, v in files.items() if k not in referenced]
+    return {
+        "references": references,
+        "missing": [v for v in references if not v["exists"]],
+        "unused": sorted(unused, key=lambda v: (-v["bytes"], v["path"])),
+        "referenced_bytes": sum(files[v] for v in referenced if v in files),
+    }
+
+
+def check_images(report: dict = None) -> list:
+    # missing images by page - unused images are printed as warnings, e.g., stale nbconvert outputs of a removed cell
+    report = report or image_report()
+    for v in report["unused"]:
+        print(f"WARNING: {v['path']} ({v['bytes']:,} bytes) is not referenced by any page")
+    missing = {}
+    for v in report["missing"]:
+        missing.setdefault(v["page"], []).append(v["source"])
+    return [{"page": k, "missing_images": v} for k, v in missing.items()]
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="report images referenced by pages - missing images and unreferenced files")
+    parser.add_argument("--json", default=None, help="also write the full report as json to this path")
+    args = parser.parse_args()
+
+    report = image_report()
+    for v in report["missing"]:
+        print(f"MISSING: {v['page']} -> {v['source']}")
+    for v in report["unused"]:
+        print(f"UNUSED: {v['path']} ({v['bytes']:,} bytes)")
+    print(
+        f"{len(report['references'])} references, {len(report['missing'])} missing, {len(report['unused'])} unused images "
+        + f"({sum(v['bytes'] for v in report['unused']):,} bytes) - {report['referenced_bytes']:,} bytes of referenced images"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
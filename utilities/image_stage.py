@@ -0,0 +1,141 @@
+import io
+import os
+import json
+import hashlib
+from utilities import cache_dir
+from utilities.conversion_cache import cache_lock
+from utilities.instrumentation import count, item_name, timed
+
+image_cache_dir = os.path.join(cache_dir, "images")
+image_stage_version = 1
+# responsive widths (css px) - an image also gets a variant at its own width when re-encoding it saves bytes
+variant_widths = (480, 960, 1440)
+variant_quality = 80
+# gifs may be animated, and svg / ico are not worth re-encoding
+raster_extensions = (".png", ".jpg", ".jpeg")
+
+
+def content_hash(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:20]
+
+
+def encode_variants(path: str, key: str, directory: str, widths: tuple, quality: int) -> dict:
+    """webp variants of one image at each width below its own, plus its own width when that is smaller than the
+    original file - written content-addressed into directory as <key>-<width>.webp
+    """
+    from PIL import Image
+
+    original_bytes = os.path.getsize(path)
+    with Image.open(path) as image:
+        image.load()
+        width, height = image.size
+        if image.mode not in ["RGB", "RGBA"]:
+            image = image.convert("RGBA" if image.mode in ["LA", "P", "PA"] or "transparency" in image.info else "RGB")
+        variants = []
+        for variant_width in [v for v in widths if v < width] + [width]:
+            resized = image if variant_width == width else image.resize((variant_width, max(1, round(height * variant_width / width))), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, "WEBP", quality=quality, method=6)
+            data = buffer.getvalue()
+            if variant_width == width and len(data) >= original_bytes:
+                continue
+            name = f"{key}-{variant_width}.webp"
+            tmp_path = os.path.join(directory, f"{name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, os.path.join(directory, name))
+            variants.append({"width": variant_width, "file": name, "bytes": len(data)})
+    return {"width": width, "height": height, "bytes": original_bytes, "variants": variants}
+
+
+class ImageStage:
+    """responsive webp variants of the docs images, made once per image content
+
+    the manifest maps an image's content hash (with the widths / quality used) to its size and variants, so only new
+    or changed images are encoded; variants are stored under their content hash and shared by identical images.
+    Pillow is optional - without it process reports the stage as skipped and images are shipped as they are
+    """
+
+    def __init__(self, directory: str = image_cache_dir, widths: tuple = variant_widths, quality: int = variant_quality):
+        self.directory = directory
+        self.variants_dir = os.path.join(directory, "variants")
+        self.widths = tuple(widths)
+        self.quality = quality
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.options_key = hashlib.sha256(f"v{image_stage_version}-{self.widths}-{quality}".encode()).hexdigest()[:8]
+        self.entries = {}
+
+    def load(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        return self.entries
+
+    def save(self) -> None:
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def fresh(self, entry: dict) -> bool:
+        return entry is not None and all(os.path.isfile(os.path.join(self.variants_dir, v["file"])) for v in entry["variants"])
+
+    def process(self, paths: list) -> tuple:
+        """encode variants for every raster image in paths not already in the manifest - returns the entry of each
+        image (keyed by path) and the stage report
+        """
+        report = {"images": 0, "encoded": 0, "cached": 0, "original_bytes": 0, "smallest_bytes": 0, "skipped": None}
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            report["skipped"] = "Pillow is not installed"
+            return {}, report
+        os.makedirs(self.variants_dir, exist_ok=True)
+        images = {}
+        with cache_lock("images"):
+            self.load()
+            for path in [v for v in paths if v.lower().endswith(raster_extensions)]:
+                key = f"{content_hash(path)}-{self.options_key}"
+                entry = self.entries.get(key)
+                if self.fresh(entry):
+                    count("image_cache_hits")
+                    report["cached"] += 1
+                else:
+                    with timed("image", item_name(path)):
+                        entry = encode_variants(path, key, self.variants_dir, self.widths, self.quality)
+                    self.entries[key] = entry
+                    report["encoded"] += 1
+                images[path] = entry
+                report["images"] += 1
+                report["original_bytes"] += entry["bytes"]
+                report["smallest_bytes"] += min([v["bytes"] for v in entry["variants"] if v["width"] == entry["width"]] + [entry["bytes"]])
+            self.save()
+        return images, report
+
+
+if __name__ == "__main__":
+    import argparse
+    from utilities.image_check import build_image_index
+    from utilities import base_dir
+
+    parser = argparse.ArgumentParser(description="encode responsive webp variants of every docs image - unchanged images come from the cache")
+    parser.add_argument("--quality", type=int, default=variant_quality, help="webp quality (0 - 100)")
+    args = parser.parse_args()
+
+    paths = [os.path.join(base_dir, v) for v in build_image_index()]
+    images, report = ImageStage(quality=args.quality).process(paths)
+    if report["skipped"]:
+        print(f"SKIPPED: {report['skipped']}")
+        raise SystemExit(0)
+    for path, entry in sorted(images.items(), key=lambda v: -v[1]["bytes"]):
+        variants = ", ".join(f"{v['width']}px {v['bytes']:,}" for v in entry["variants"])
+        print(
+            f"IMAGE: {os.path.relpath(path, base_dir)} - {entry['width']}x{entry['height']} {entry['bytes']:,} bytes -> {variants or 'no smaller variant'}"
+        )
+    print(
+        f"{report['images']} images, {report['encoded']} encoded, {report['cached']} from the cache - "
+        + f"{report['original_bytes']:,} bytes as shipped, {report['smallest_bytes']:,} at full width in the best format"
+    )
@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from utilities import base_dir, cache_dir
+
+# stage -> {"count", "total", "max"} seconds, stage -> {item: seconds}, counter -> count - for this process
+_lock = threading.Lock()
+_stages = {}
+_items = {}
+_counters = {}
+profile_modes = ["cprofile", "tracemalloc"]
+default_profile_path = os.path.join(cache_dir, "profile.prof")
+
+
+def record(stage: str, seconds: float, item: str = None) -> None:
+    # add one timed run of a stage - item names what it ran on (a page, url, notebook) so the slowest can be listed
+    with _lock:
+        stats = _stages.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        if item is not None:
+            items = _items.setdefault(stage, {})
+            items[item] = items.get(item, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str, item: str = None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, item)
+
+
+def count(counter: str, n: int = 1) -> None:
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + n
+
+
+def item_name(path: str) -> str:
+    # paths are reported relative to the repo
+    return os.path.relpath(path, base_dir) if os.path.isabs(path) else path
+
+
+def snapshot() -> dict:
+    # everything recorded so far in this process, as plain json-able data
+    with _lock:
+        return {
+            "stages": {k: dict(v) for k, v in _stages.items()},
+            "items": {k: dict(v) for k, v in _items.items()},
+            "counters": dict(_counters),
+        }
+
+
+def merge(data: dict) -> None:
+    # fold in a snapshot taken in another process - e.g., a pytest-xdist worker
+    with _lock:
+        for stage, stats in data["stages"].items():
+            merged = _stages.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+            merged["count"] += stats["count"]
+            merged["total"] += stats["total"]
+            merged["max"] = max(merged["max"], stats["max"])
+        for stage, items in data["items"].items():
+            merged = _items.setdefault(stage, {})
+            for item, seconds in items.items():
+                merged[item] = merged.get(item, 0.0) + seconds
+        for counter, n in data["counters"].items():
+            _counters[counter] = _counters.get(counter, 0) + n
+
+
+def reset() -> None:
+    with _lock:
+        _stages.clear()
+        _items.clear()
+        _counters.clear()
+
+
+def slowest(data: dict, stage: str, top: int = 10) -> list:
+    # [{"item", "seconds"}] for a stage's slowest items
+    items = sorted(data["items"].get(stage, {}).items(), key=lambda v: -v[1])[:top]
+    return [{"item": k, "seconds": v} for k, v in items]
+
+
+def over_budget(data: dict, budgets: dict) -> list:
+    # stages whose total time went over their budget in seconds
+    problems = []
+    for stage, budget in budgets.items():
+        total = data["stages"].get(stage, {}).get("total", 0.0)
+        if total > budget:
+            problems.append({"stage": stage, "seconds": total, "budget": budget})
+    return problems
+
+
+class Capture:
+    """optional whole-run capture - cProfile (written to a .prof file for snakeviz / pstats) or tracemalloc
+
+    summary() gives the top functions by cumulative time, or the top allocation sites and the peak traced memory
+    """
+
+    def __init__(self, mode: str, top: int = 20, profile_path: str = default_profile_path):
+        if mode not in profile_modes:
+            raise ValueError(f"unknown capture mode {mode}")
+        self.mode = mode
+        self.top = top
+        self.profile_path = profile_path
+        self._profiler = None
+        self._summary = None
+
+    def start(self) -> "Capture":
+        if self.mode == "cprofile":
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            import tracemalloc
+
+            tracemalloc.start()
+        return self
+
+    def stop(self) -> dict:
+        if self.mode == "cprofile":
+            import pstats
+
+            self._profiler.disable()
+            os.makedirs(os.path.dirname(self.profile_path), exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+            stats = pstats.Stats(self._profiler).stats
+            rows = sorted(stats.items(), key=lambda v: -v[1][3])[: self.top]
+            functions = [{"function": f"{item_name(k[0])}:{k[1]}({k[2]})", "calls": v[1], "own": v[2], "cumulative": v[3]} for k, v in rows]
+            self._summary = {"mode": self.mode, "profile_path": item_name(self.profile_path), "functions": functions}
+        else:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics("lineno")[: self.top]
+            tracemalloc.stop()
+            sites = [{"site": f"{item_name(v.traceback[0].filename)}:{v.traceback[0].lineno}", "bytes": v.size, "blocks": v.count} for v in stats]
+            self._summary = {"mode": self.mode, "current_bytes": current, "peak_bytes": peak, "sites": sites}
+        return self._summary
+
+    def summary(self) -> dict:
+        return self._summary
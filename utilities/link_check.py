@@ -1,45 +1,65 @@
-import re
-import os
-import markdown
-import requests
 from utilities import base_dir
-from utilities.utilities import extract_headings_from_markdown, nono_chars
+from utilities.doc_index import get_doc_index
+from utilities.url_check import LinkChecker
+from utilities.utilities import nono_chars
 
-headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36"}
+_link_checker = None
 
 
-def extract_links_from_markdown(markdown_file: str) -> tuple:
-    with open(markdown_file, "r", encoding="utf-8") as file:
-        markdown_content = file.read()
-    html_content = markdown.markdown(markdown_content)
-    links = re.findall(r'<a\s+(?:[^>]*?\s+)?href="([^"]*)"', html_content)
+def configure_link_checker(**kwargs) -> LinkChecker:
+    # replace the shared checker - e.g., configure_link_checker(offline=True)
+    global _link_checker
+    _link_checker = LinkChecker(**kwargs)
+    return _link_checker
 
-    # split into intra, inter, and outer links
-    inter_links = []
-    intra_links = []
-    outer_links = []
-    for link in links:
-        if link[0] == "#":
-            intra_links.append(link)
-        elif link[:4] == "http":
-            outer_links.append(link)
-        else:
-            # convert to absolute link
-            absolute_link = os.path.abspath(os.path.join(os.path.dirname(markdown_file), link))
-            absolute_link = "docs/" + absolute_link.split("/docs/", 1)[-1]
-            inter_links.append(absolute_link)
 
-    return intra_links, inter_links, outer_links
+def get_link_checker() -> LinkChecker:
+    if _link_checker is None:
+        return configure_link_checker()
+    return _link_checker
+
+
+def collect_all_outer_links(index=None) -> list:
+    # every outer link in the toc pages and README, deduplicated
+    index = index or get_doc_index()
+    outer_links = []
+    for path in [f"{index.docs_dir}/" + v for v in index.toc] + [f"{index.root}/README.md"]:
+        try:
+            outer_links += index.file(path).outer_links
+        except OSError:
+            continue
+    return list(dict.fromkeys(outer_links))
+
+
+def check_outer_links(outer_links: list, index=None) -> list:
+    checker = get_link_checker()
+    if len(checker.results) == 0:
+        # first use - check the whole docs tree at once so later pages are lookups
+        checker.check(collect_all_outer_links(index))
+    results = checker.check(outer_links)
+    dead_links = []
+    for link in outer_links:
+        result = results[link]
+        if result["ok"] is None:
+            print(f"link {link} not checked: {result['error']}")
+        elif not result["ok"]:
+            print(
+                f"link {link} failed with response {result['status'] or result['error']}"
+            )  # very strange - this line seems necessary for tests to pass on github
+            dead_links.append(link)
+    return dead_links
 
 
-def check_file_links(filepath: str, toc_files: list) -> list:
+def check_file_links(filepath: str, toc_files: list = None, index=None) -> list:
+    index = index or get_doc_index()
     intra_links = []
     inter_links = []
     outer_links = []
     headings = []
     try:
-        intra_links, inter_links, outer_links = extract_links_from_markdown(f"{base_dir}/docs/" + filepath)
-        headings = extract_headings_from_markdown(f"{base_dir}/docs/" + filepath)
+        record = index.page(filepath)
+        intra_links, inter_links, outer_links = record.intra_links, record.inter_links, record.outer_links
+        headings = record.anchors
     except FileNotFoundError:
         print(f"FAILURE: check_file_links failed - file {filepath} does not exist")
     except Exception as e:
@@ -56,8 +76,8 @@ def check_file_links(filepath: str, toc_files: list) -> list:
         if link not in headings:
             dead_links.append(link)
 
-    # check inter_links for dead links
-    toc_files = ["docs/" + v for v in toc_files]
+    # check inter_links for dead links - against the index's toc set unless a toc is given
+    toc_files = index.toc_links if toc_files is None else {"docs/" + v for v in toc_files}
     for link in inter_links:
         for no in nono_chars:
             if no in link:
@@ -75,17 +95,12 @@ def check_file_links(filepath: str, toc_files: list) -> list:
             if page not in toc_files:
                 dead_links.append(link)
                 continue
-            headings = extract_headings_from_markdown(f"{base_dir}/" + page)
-            if "#" + specific_heading not in headings:
+            if "#" + specific_heading not in index.file(f"{index.root}/" + page).anchors:
                 dead_links.append(link)
         elif link not in toc_files:
             dead_links.append(link)
 
-    for link in outer_links:
-        response = requests.get(link, headers=headers, timeout=10)
-        if response.status_code not in [200, 403, 429]:
-            print(f"link {link} failed with response {response}")  # very strange - this line seems necessary for tests to pass on github
-            dead_links.append(link)
+    dead_links += check_outer_links(list(outer_links), index)
 
     dead_links = [v for v in dead_links if "info@krixik.com" not in v]
 
@@ -100,8 +115,9 @@ def check_readme_links() -> list:
     filepath = ""
     try:
         filepath = f"{base_dir}/" + "README.md"
-        intra_links, inter_links, outer_links = extract_links_from_markdown(filepath)
-        headings = extract_headings_from_markdown(filepath)
+        record = get_doc_index().file(filepath)
+        intra_links, inter_links, outer_links = record.intra_links, record.inter_links, record.outer_links
+        headings = record.anchors
     except FileNotFoundError:
         print(f"FAILURE: check_file_links failed - file {filepath} does not exist")
     except Exception as e:
@@ -118,11 +134,7 @@ def check_readme_links() -> list:
         if link not in headings:
             dead_links.append(link)
 
-    for link in outer_links:
-        response = requests.get(link, headers=headers, timeout=10)
-        if response.status_code not in [200, 403, 429]:
-            print(f"link {link} failed with response {response}")  # very strange - this line seems necessary for tests to pass on github
-            dead_links.append(link)
+    dead_links += check_outer_links(list(outer_links))
 
     dead_links = [v for v in dead_links if "info@krixik.com" not in v]
 
@@ -0,0 +1,144 @@
+import re
+from utilities.utilities import heading_to_anchor
+
+fence_pattern = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+heading_pattern = re.compile(r"^#+\s+(.+)$")
+reference_definition_pattern = re.compile(r"^ {0,3}\[([^\]]+)\]:\s*<?([^\s>]+)>?")
+code_span_pattern = re.compile(r"(`+)(.+?)\1")
+autolink_pattern = re.compile(r"<((?:https?|ftp)://[^\s>]+|mailto:[^\s>]+|[^\s@<>]+@[^\s@<>]+\.[^\s@<>]+)>")
+html_link_pattern = re.compile(r'<a\s+(?:[^>]*?\s+)?href="([^"]*)"')
+html_image_pattern = re.compile(r'<img\s+(?:[^>]*?\s+)?src="([^"]*)"')
+
+
+def normalize_label(label: str) -> str:
+    return " ".join(label.lower().split())
+
+
+def find_closing(text: str, start: int, opening: str, closing: str) -> int:
+    # index of the bracket closing the one at text[start], honoring nesting and backslash escapes
+    depth = 0
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return -1
+
+
+def link_destination(inner: str) -> str:
+    # [text](<url> "title") -> url
+    inner = inner.strip()
+    if inner.startswith("<"):
+        end = inner.find(">")
+        return inner[1:end] if end > 0 else inner[1:]
+    return inner.split()[0] if inner else ""
+
+
+def scan_inline(text: str, lineno: int, references: dict, pending: list):
+    # yield links and images found in one line of (non-code) markdown text
+    text = code_span_pattern.sub(lambda m: " " * len(m.group(0)), text)
+    for _, kind, url in sorted(find_inline(text, lineno, references, pending), key=lambda v: v[0]):
+        yield (kind, url, lineno)
+
+
+def find_inline(text: str, lineno: int, references: dict, pending: list) -> list:
+    # (position, kind, url) for each link and image in text - images inside a link's text (e.g., badges) included
+    found = []
+    i = 0
+    while True:
+        i = text.find("[", i)
+        if i < 0:
+            break
+        if i > 0 and text[i - 1] == "\\":
+            i += 1
+            continue
+        image = i > 0 and text[i - 1] == "!"
+        kind = "image" if image else "link"
+        close = find_closing(text, i, "[", "]")
+        if close < 0:
+            break
+        label = text[i + 1 : close]
+        after = text[close + 1 : close + 2]
+        if after in ["(", "["] and not image and "![" in label:
+            label_pending = []
+            found += [(i + 1 + v[0], v[1], v[2]) for v in find_inline(label, lineno, references, label_pending) if v[1] == "image"]
+            pending += [v for v in label_pending if v[3] == "image"]
+        if after == "(":
+            end = find_closing(text, close + 1, "(", ")")
+            if end < 0:
+                i = close + 1
+                continue
+            found.append((i, kind, link_destination(text[close + 2 : end])))
+            i = end + 1
+            continue
+        if after == "[":
+            end = text.find("]", close + 1)
+            if end < 0:
+                i = close + 1
+                continue
+            ref = text[close + 2 : end] or label
+            pending.append((normalize_label(ref), lineno, i, kind))
+            i = end + 1
+            continue
+        if normalize_label(label) in references:
+            found.append((i, kind, references[normalize_label(label)]))
+        elif "[" not in label:
+            # shortcut reference - may be defined further down the page
+            pending.append((normalize_label(label), lineno, i, kind))
+        i = close + 1 if image or "[" not in label else i + 1
+
+    for match in autolink_pattern.finditer(text):
+        url = match.group(1)
+        if "://" not in url and not url.startswith("mailto:"):
+            url = "mailto:" + url
+        found.append((match.start(), "link", url))
+    for match in html_link_pattern.finditer(text):
+        found.append((match.start(), "link", match.group(1)))
+    for match in html_image_pattern.finditer(text):
+        found.append((match.start(), "image", match.group(1)))
+    return found
+
+
+def iter_markdown_tokens(lines):
+    """stream ("heading", anchor, lineno), ("link", url, lineno) and ("image", url, lineno) tokens from an iterable of
+    markdown lines
+
+    fenced code is skipped, and heading anchors use the same slug rules as extract_headings_from_markdown
+    """
+    references = {}
+    pending = []
+    fence = None
+    for lineno, line in enumerate(lines, start=1):
+        line = line.rstrip("\n")
+        fence_match = fence_pattern.match(line)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+            continue
+        if fence_match:
+            fence = fence_match.group(1)
+            continue
+
+        definition = reference_definition_pattern.match(line)
+        if definition:
+            references.setdefault(normalize_label(definition.group(1)), definition.group(2))
+            continue
+
+        heading = heading_pattern.match(line)
+        if heading:
+            yield ("heading", heading_to_anchor(heading.group(1)), lineno)
+
+        yield from scan_inline(line, lineno, references, pending)
+
+    # references used before their definition
+    for label, lineno, _, kind in pending:
+        if label in references:
+            yield (kind, references[label], lineno)
@@ -1,63 +1,137 @@
-import re
-from utilities.converter import collect_mkdocks_toc
+import os
+from typing import NamedTuple
 from utilities import base_dir
-from utilities.utilities import load_md_doc, get_code_from_markdown
+from utilities.doc_index import get_doc_index
+from utilities.instrumentation import timed
+from utilities.code_analyzer import analyze_page
+
+config_examples_dir = os.path.join(base_dir, "pipeline_config_examples")
+config_extensions = (".yml", ".yaml")
+
+
+class NameSite(NamedTuple):
+    # where a pipeline name is used - block is None for config files
+    source: str
+    block: int
+    line: int
+    kind: str
 
 
 def gather_pipeline_names(md_filepath: str) -> list:
     try:
-        markdown_content = load_md_doc(md_filepath)
-        code_blocks = get_code_from_markdown([markdown_content])
-        create_pattern = r"\.create_pipeline\([^)]*\)"
-        name_pattern = r'name="([^"]*)"'
-        pipeline_names = []
-        for block in code_blocks:
-            create_matches = []
-            create_matches = re.findall(create_pattern, block)
-            if len(create_matches) > 0:
-                name_matches = []
-                for match in create_matches:
-                    name_matches = re.findall(name_pattern, match)
-                    for item in name_matches:
-                        pipeline_names.append(item)
-        if len(pipeline_names) > 0:
-            pipeline_names = list(set(pipeline_names))
-        return pipeline_names
+        return list(get_doc_index().file(md_filepath).pipeline_names)
     except Exception as e:
-        raise Exception(f"FAILURE: gather_pipeline_names failed on file {markdown_file} with exception {e}")
+        raise Exception(f"FAILURE: gather_pipeline_names failed on file {md_filepath} with exception {e}")
+
+
+def read_config_name(config_path: str) -> tuple:
+    # (pipeline:name, line of that name) from a pipeline config file
+    import yaml
+
+    with open(config_path, "r", encoding="utf-8") as file:
+        content = file.read()
+    name = (yaml.safe_load(content) or {}).get("pipeline", {}).get("name")
+    lines = content.splitlines()
+    start = next((i for i, v in enumerate(lines) if v.startswith("pipeline:")), 0)
+    line = next((i + 1 for i, v in enumerate(lines[start:], start) if v.strip().startswith("name:")), 1)
+    return name, line
+
+
+def resolve_config_path(config_path: str, page_path: str) -> str:
+    # load_pipeline paths are usually data_dir + "..." - try data/, the repo root, then the page's own directory
+    for directory in [os.path.join(base_dir, "data"), base_dir, os.path.dirname(page_path)]:
+        candidate = os.path.normpath(os.path.join(directory, config_path))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def config_example_paths(directory: str = config_examples_dir) -> list:
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths += [os.path.join(root, v) for v in files if v.endswith(config_extensions)]
+    return sorted(paths)
+
+
+def page_name_sites(index, page: str) -> tuple:
+    # (name -> [NameSite], unresolved load_pipeline calls) for one page - see build_name_index
+    page_path = os.path.join(index.docs_dir, page)
+    names = {}
+    unresolved = []
+    saved = set()
+    for call in analyze_page(index.page(page).code_blocks).calls:
+        site = NameSite(page, call.block, call.line, call.method)
+        argument = call.argument
+        if call.method == "save_pipeline":
+            saved.add(argument)
+            continue
+        if call.method == "load_pipeline":
+            if argument in saved:
+                continue
+            config_path = resolve_config_path(argument, page_path) if argument else None
+            if config_path is None:
+                unresolved.append(dict(site._asdict(), config_path=argument))
+                continue
+            argument, _ = read_config_name(config_path)
+        if argument is not None:
+            names.setdefault(argument, []).append(site)
+    return names, unresolved
+
+
+def config_name_sites(config_dir: str = config_examples_dir) -> dict:
+    names = {}
+    for config_path in config_example_paths(config_dir):
+        name, line = read_config_name(config_path)
+        if name is not None:
+            names.setdefault(name, []).append(NameSite(os.path.relpath(config_path, base_dir), None, line, "config_example"))
+    return names
+
+
+def merge_name_sites(names: dict, more: dict) -> dict:
+    for name, sites in more.items():
+        names.setdefault(name, []).extend(sites)
+    return names
+
+
+def build_name_index(index=None, config_dir: str = config_examples_dir) -> tuple:
+    """one pass over every page's code blocks and the config examples - returns (name -> [NameSite], unresolved)
+
+    names come from create_pipeline calls (however they are laid out over lines) and from the config file behind each
+    load_pipeline call; a config the page itself wrote with save_pipeline holds a pipeline the page already created,
+    and unresolved lists the remaining load_pipeline calls whose config file could not be found or read statically
+    """
+    index = index or get_doc_index()
+    names = {}
+    unresolved = []
+    for page in index.toc:
+        page_names, page_unresolved = page_name_sites(index, page)
+        merge_name_sites(names, page_names)
+        unresolved += page_unresolved
+    return merge_name_sites(names, config_name_sites(config_dir)), unresolved
+
+
+def duplicate_names(names: dict) -> dict:
+    # names used by more than one page / config example - several uses within one page are fine
+    return {name: [v._asdict() for v in sites] for name, sites in names.items() if len({v.source for v in sites}) > 1}
+
+
+def duplicate_name_report(index=None, config_dir: str = config_examples_dir) -> dict:
+    with timed("name_index"):
+        names, unresolved = build_name_index(index, config_dir)
+    return {
+        "names": len(names),
+        "sources": len({v.source for sites in names.values() for v in sites}),
+        "duplicates": duplicate_names(names),
+        "unresolved": unresolved,
+    }
 
 
 def duplicate_name_check():
     try:
-        # collect all paths to md docs
-        all_docs = collect_mkdocks_toc()
-
-        # collect all pipeline names
-        all_names = []
-        all_md_names = []
-        for i in range(len(all_docs)):
-            md_filepath = base_dir + "/docs/" + all_docs[i]
-            pipeline_names = gather_pipeline_names(md_filepath)
-            all_md_names.append(pipeline_names)
-            for name in pipeline_names:
-                all_names.append(name)
-
-        # determine duplicates
-        my_dict = {i: all_names.count(i) for i in all_names}
-        keys = list(my_dict.keys())
-        duplicates = [key for key in keys if my_dict[key] > 1]
-
-        if len(duplicates) > 0:
-            # gather all paths to mds containing duplicate pipeline names
-            duplicates_dict = {v: [] for v in duplicates}
-
-            for d in duplicates:
-                for i in range(len(all_docs)):
-                    docs_names = all_md_names[i]
-                    if d in docs_names:
-                        duplicates_dict[d].append(all_docs[i])
-
-            print(f"FAILURE: the following pipeline names are found in multiple markdown docs: {duplicates_dict}")
+        report = duplicate_name_report()
+        if len(report["duplicates"]) > 0:
+            duplicates_dict = {name: sorted({v["source"] for v in sites}) for name, sites in report["duplicates"].items()}
+            print(f"FAILURE: the following pipeline names are found in multiple markdown docs / config examples: {duplicates_dict}")
             return False
         return True
     except Exception as e:
@@ -0,0 +1,84 @@
+import re
+import json
+import itertools
+
+outputs_key_pattern = re.compile(r'"outputs"\s*:\s*\[')
+# the rest of a json string up to its closing quote (or the end of what has been read), and the characters that
+# matter inside a skipped payload
+string_body_pattern = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+structure_pattern = re.compile(r'["\[\]{}]')
+notebook_chunk_size = 1 << 16
+# unscanned characters kept at the end of a chunk, so an "outputs" key split across two chunks is still found
+key_tail = 32
+
+
+def iter_stripped(chunks):
+    """yield a notebook's json text with every "outputs": [...] payload replaced by an empty list, from chunks of it
+
+    a payload is dropped chunk by chunk as it is scanned, holding at most one chunk plus a few characters - however
+    large the outputs, only the text outside them is ever kept
+    """
+    buffer = ""
+    # bracket depth inside the payload being skipped - 0 outside one
+    depth = 0
+    in_string = False
+    for chunk in itertools.chain(chunks, [None]):
+        exhausted = chunk is None
+        buffer += chunk or ""
+        position = 0
+        while True:
+            if depth == 0:
+                match = outputs_key_pattern.search(buffer, position)
+                if match is None:
+                    keep = len(buffer) if exhausted else max(position, len(buffer) - key_tail)
+                    yield buffer[position:keep]
+                    buffer = buffer[keep:]
+                    break
+                yield buffer[position : match.end() - 1] + "[]"
+                position, depth = match.end(), 1
+            elif in_string:
+                # an escape cut off at the end of the chunk is kept for the next one
+                end = string_body_pattern.match(buffer, position).end()
+                if end == len(buffer) or buffer[end] != '"':
+                    buffer = buffer[end:]
+                    break
+                position, in_string = end + 1, False
+            else:
+                match = structure_pattern.search(buffer, position)
+                if match is None:
+                    buffer = ""
+                    break
+                position = match.end()
+                if match.group(0) == '"':
+                    in_string = True
+                elif match.group(0) in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+    if depth:
+        raise ValueError("unterminated json value")
+
+
+def strip_outputs(text: str, chunk_size: int = notebook_chunk_size) -> str:
+    return "".join(iter_stripped(text[i : i + chunk_size] for i in range(0, len(text), chunk_size)))
+
+
+def load_notebook_cells(notebook_path: str, remove: bool = False) -> list:
+    """(cell_type, source, tags) for each cell of a notebook, read straight from its json with outputs skipped
+
+    the file is read in chunks and outputs are dropped as they are scanned (see iter_stripped), so memory follows the
+    notebook's sources rather than its size. with remove=True cells tagged remove_cell are dropped, exactly as the
+    final markdown conversion drops them
+    """
+    with open(notebook_path, "r", encoding="utf-8") as file:
+        notebook = json.loads("".join(iter_stripped(iter(lambda: file.read(notebook_chunk_size), ""))))
+    cells = []
+    for cell in notebook.get("cells", []):
+        tags = tuple(cell.get("metadata", {}).get("tags", []))
+        if remove and "remove_cell" in tags:
+            continue
+        source = cell.get("source", "")
+        if isinstance(source, list):
+            source = "".join(source)
+        cells.append((cell["cell_type"], source, tags))
+    return cells
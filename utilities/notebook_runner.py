@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from importlib.metadata import version, PackageNotFoundError
+from utilities import base_dir, cache_dir
+from utilities.conversion_cache import cache_lock, relative_path
+from utilities.doc_index import parse_notebook_file
+from utilities.instrumentation import count, item_name, record
+
+execution_cache_path = os.path.join(cache_dir, "execution_cache.json")
+execution_cache_version = 1
+# packages whose upgrade can change what a notebook does
+environment_packages = ["krixik", "nbclient", "ipykernel"]
+# every variable the notebooks read - api endpoints and keys (only ever hashed into the key) and COLAB_RELEASE_TAG, which
+# switches the setup cells between colab and a local checkout. locally the setup cells load the first four from .env
+environment_variables = ["MY_API_URL", "MY_API_KEY", "DEMO_API_URL", "DEMO_API_KEY", "COLAB_RELEASE_TAG"]
+env_file_path = os.path.join(base_dir, ".env")
+default_timeout = 1000
+default_retries = 1
+ignore_tag = "ignore_test"
+
+
+def environment_key(data_dir: str = os.path.join(base_dir, "data", "input")) -> str:
+    # everything outside a notebook that changes its run - interpreter, packages, environment variables and input data
+    digest = hashlib.sha256(sys.version.encode())
+    for package in environment_packages:
+        try:
+            digest.update(f"|{package}={version(package)}".encode())
+        except PackageNotFoundError:
+            digest.update(f"|{package}=missing".encode())
+    for variable in environment_variables:
+        digest.update(f"|{variable}={os.getenv(variable)}".encode())
+    try:
+        with open(env_file_path, "rb") as file:
+            digest.update(b"|.env=" + hashlib.sha256(file.read()).digest())
+    except FileNotFoundError:
+        digest.update(b"|.env=missing")
+    for root, _, names in sorted(os.walk(data_dir)):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            digest.update(f"|{os.path.relpath(path, data_dir)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def notebook_hash(docpath: str) -> str:
+    with open(docpath, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def load_execution_cache() -> dict:
+    try:
+        with open(execution_cache_path, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache.get("entries", {}) if cache.get("version") == execution_cache_version else {}
+
+
+def update_execution_cache(updates: dict) -> None:
+    with cache_lock("execution"):
+        entries = load_execution_cache()
+        entries.update(updates)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{execution_cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": execution_cache_version, "entries": entries}, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, execution_cache_path)
+
+
+def failed_result(docpath: str, error: str) -> dict:
+    # the result of a notebook whose runner never returned one - it raised, or its worker process died
+    return {"docpath": docpath, "success": False, "error": error, "elapsed": 0.0, "attempts": 0, "cell_times": [], "cached": False}
+
+
+def execute_notebook(docpath: str, timeout: float = default_timeout, retries: int = default_retries) -> dict:
+    """execute one notebook on a fresh kernel, cell by cell, in the notebook's own directory
+
+    timeout bounds the whole notebook; a failing cell is retried up to retries times in the same kernel before the
+    notebook fails, and cells tagged ignore_test may fail without failing the notebook
+    """
+    result = {"docpath": docpath, "success": True, "error": None, "elapsed": 0.0, "attempts": 0, "cell_times": [], "cached": False}
+    start = time.perf_counter()
+    try:
+        import nbformat
+        from nbclient import NotebookClient
+        from nbclient.exceptions import CellExecutionError, CellTimeoutError
+
+        notebook = nbformat.read(docpath, as_version=4)
+        client = NotebookClient(notebook, timeout=timeout, resources={"metadata": {"path": os.path.dirname(docpath)}})
+        deadline = start + timeout
+        with client.setup_kernel():
+            for index, cell in enumerate(notebook.cells):
+                if cell.cell_type != "code":
+                    continue
+                ignored = ignore_tag in cell.metadata.get("tags", [])
+                cell_start = time.perf_counter()
+                for attempt in range(retries + 1):
+                    client.timeout = max(1, int(deadline - time.perf_counter()))
+                    result["attempts"] += 1
+                    try:
+                        client.execute_cell(cell, index)
+                        break
+                    except CellTimeoutError:
+                        raise
+                    except CellExecutionError:
+                        if ignored:
+                            break
+                        if attempt == retries:
+                            raise
+                        time.sleep(min(2**attempt, 10))
+                result["cell_times"].append([index, time.perf_counter() - cell_start])
+    except Exception as e:
+        result["success"] = False
+        result["error"] = f"{type(e).__name__}: {str(e)[:2000]}"
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def pipeline_names(docpath: str) -> frozenset:
+    # every pipeline a notebook creates - remove_cell cells included, they run too
+    return frozenset(parse_notebook_file(docpath).pipeline_names)
+
+
+def run_notebooks(
+    docpaths: list,
+    workers: int = None,
+    timeout: float = default_timeout,
+    retries: int = default_retries,
+    force: bool = False,
+    runner=execute_notebook,
+) -> list:
+    """execute notebooks across a pool of kernel processes and return a result per notebook, in input order
+
+    two notebooks creating a pipeline of the same name never run at the same time; notebooks whose content and
+    environment (see environment_key) match their last successful run are skipped, and the slowest known notebooks are
+    started first
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    environment = environment_key()
+    cache = load_execution_cache()
+    results = {}
+    pending = []
+    for docpath in docpaths:
+        entry = cache.get(relative_path(docpath))
+        key = notebook_hash(docpath)
+        if not force and entry is not None and entry["key"] == key and entry["environment"] == environment:
+            results[docpath] = dict(entry["result"], docpath=docpath, cached=True)
+            count("execute_skipped")
+        else:
+            pending.append((docpath, key))
+    # longest first, by the last recorded time
+    pending.sort(key=lambda v: -(cache.get(relative_path(v[0])) or {}).get("result", {}).get("elapsed", 0))
+    names = {docpath: pipeline_names(docpath) for docpath, _ in pending}
+
+    running = {}
+    busy = set()
+    updates = {}
+    # notebooks that passed keep their cache entries however the run ends
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as executor:
+            while pending or running:
+                for item in list(pending):
+                    if len(running) >= workers:
+                        break
+                    docpath, key = item
+                    if names[docpath] & busy:
+                        continue
+                    pending.remove(item)
+                    try:
+                        future = executor.submit(runner, docpath, timeout, retries)
+                    except BrokenProcessPool as e:
+                        # a worker died and took the pool with it - the notebooks not yet started fail unrun
+                        results[docpath] = dict(failed_result(docpath, repr(e)), pipelines=sorted(names[docpath]))
+                        continue
+                    busy |= names[docpath]
+                    running[future] = (docpath, key)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    docpath, key = running.pop(future)
+                    busy -= names[docpath]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = failed_result(docpath, repr(e))
+                    result = dict(result, pipelines=sorted(names[docpath]))
+                    results[docpath] = result
+                    record("execute", result["elapsed"], item_name(docpath))
+                    if result["success"]:
+                        updates[relative_path(docpath)] = {"key": key, "environment": environment, "result": result}
+    finally:
+        if updates:
+            update_execution_cache(updates)
+    return [results[v] for v in docpaths]
+
+
+def timing_report(results: list, wall_time: float) -> dict:
+    rows = sorted(results, key=lambda v: -v["elapsed"])
+    return {
+        "wall_time": wall_time,
+        "notebook_time": sum(v["elapsed"] for v in results if not v["cached"]),
+        "executed": sum(not v["cached"] for v in results),
+        "cached": sum(v["cached"] for v in results),
+        "failed": [relative_path(v["docpath"]) for v in results if not v["success"]],
+        "notebooks": [
+            {
+                "notebook": relative_path(v["docpath"]),
+                "success": v["success"],
+                "cached": v["cached"],
+                "elapsed": v["elapsed"],
+                "attempts": v["attempts"],
+                "slowest_cells": sorted(v["cell_times"], key=lambda c: -c[1])[:3],
+                "pipelines": v.get("pipelines", []),
+                "error": v["error"],
+            }
+            for v in rows
+        ],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from utilities.converter import toc_notebook_paths
+
+    parser = argparse.ArgumentParser(description="execute the docs notebooks in parallel, skipping those unchanged since their last successful run")
+    parser.add_argument("notebooks", nargs="*", help="notebooks to run (default: every notebook in the mkdocs toc)")
+    parser.add_argument("--workers", type=int, default=None, help="number of kernels run at once (default: cpu count)")
+    parser.add_argument("--timeout", type=float, default=default_timeout, help="seconds allowed per notebook")
+    parser.add_argument("--retries", type=int, default=default_retries, help="times a failing cell is re-run before the notebook fails")
+    parser.add_argument("--force", action="store_true", help="run every notebook, ignoring the execution cache")
+    parser.add_argument("--report", default=None, help="write the json timing report to this path")
+    args = parser.parse_args()
+
+    docpaths = [os.path.abspath(v) for v in args.notebooks] or toc_notebook_paths()
+    start = time.perf_counter()
+    results = run_notebooks(docpaths, workers=args.workers, timeout=args.timeout, retries=args.retries, force=args.force)
+    report = timing_report(results, time.perf_counter() - start)
+    for v in report["notebooks"][:10]:
+        print(f"{v['elapsed']:>8.1f}s  {'cached' if v['cached'] else 'ok' if v['success'] else 'FAILED'}  {v['notebook']}")
+    for v in results:
+        if not v["success"]:
+            print(f"FAILURE: {v['docpath']} - {v['error']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(
+        f"ran {report['executed']} notebooks ({report['cached']} unchanged) in {report['wall_time']:.1f}s - "
+        + f"{report['notebook_time']:.1f}s of notebook time, {len(report['failed'])} failed"
+    )
+    raise SystemExit(1 if report["failed"] else 0)
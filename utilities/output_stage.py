@@ -0,0 +1,186 @@
+import os
+import re
+import base64
+import hashlib
+from utilities import base_dir
+
+# content-addressed store shared by every page - identical outputs are kept once
+output_store_dir = os.path.join(base_dir, "docs", "img", "outputs")
+default_stage_options = {"max_output_lines": None, "max_output_chars": None, "externalize_images": False}
+media_extensions = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/svg+xml": ".svg",
+    "audio/mpeg": ".mp3",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+}
+data_uri_pattern = re.compile(r"data:(?P<mime>[\w.+-]+/[\w.+-]+);base64,(?P<payload>[A-Za-z0-9+/=\s]+)")
+markdown_image_pattern = re.compile(r"(!\[[^\]]*\]\()([^)\s]+)(\))")
+text_mimes = ["text/plain"]
+inline_mimes = ["text/html", "text/markdown"]
+
+
+def stage_options(options: dict = None) -> dict:
+    merged = dict(default_stage_options)
+    merged.update(options or {})
+    unknown = set(merged) - set(default_stage_options)
+    if len(unknown) > 0:
+        raise ValueError(f"unknown output stage options {sorted(unknown)}")
+    return merged
+
+
+def stage_enabled(options: dict) -> bool:
+    return any(v for v in stage_options(options).values())
+
+
+def stage_key(options: dict) -> str:
+    # part of the conversion manifest key - changing the stage reconverts
+    return ",".join(f"{k}={v}" for k, v in sorted(stage_options(options).items()) if v)
+
+
+def joined(value) -> str:
+    return "".join(value) if isinstance(value, list) else value
+
+
+def truncate_text(text: str, max_lines: int = None, max_chars: int = None) -> tuple:
+    # keep the head of an oversized output and mark what was cut
+    lines = text.splitlines(keepends=True)
+    kept = lines[:max_lines] if max_lines else lines
+    kept_text = "".join(kept)
+    if max_chars and len(kept_text) > max_chars:
+        kept_text = kept_text[:max_chars]
+    if len(kept_text) == len(text):
+        return text, False
+    hidden_lines = len(lines) - len(kept_text.splitlines())
+    hidden_chars = len(text) - len(kept_text)
+    if not kept_text.endswith("\n"):
+        kept_text += "\n"
+    marker = f"... [show more: {hidden_lines} more lines / {hidden_chars} more characters in the notebook]\n"
+    return kept_text + marker, True
+
+
+def iter_outputs(notebook):
+    for cell in notebook.cells:
+        for output in cell.get("outputs", []):
+            yield output
+
+
+def output_sizes(notebook) -> dict:
+    # bytes of text outputs, base64 media inlined in html outputs, and image outputs written to _files/
+    sizes = {"text_bytes": 0, "inline_bytes": 0, "image_bytes": 0}
+    for output in iter_outputs(notebook):
+        if output.get("output_type") == "stream":
+            sizes["text_bytes"] += len(joined(output.get("text", "")).encode())
+        data = output.get("data", {})
+        for mime, value in data.items():
+            if mime in text_mimes:
+                sizes["text_bytes"] += len(joined(value).encode())
+            elif mime in inline_mimes:
+                sizes["inline_bytes"] += sum(len(m.group("payload")) for m in data_uri_pattern.finditer(joined(value)))
+            elif mime.startswith("image/") and mime != "image/svg+xml":
+                sizes["image_bytes"] += len(base64.b64decode(joined(value)))
+    return sizes
+
+
+def trim_outputs(notebook, max_lines: int = None, max_chars: int = None) -> int:
+    # truncate oversized stream / text/plain outputs in place - returns the number truncated
+    truncated = 0
+    for output in iter_outputs(notebook):
+        if output.get("output_type") == "stream":
+            output["text"], was_truncated = truncate_text(joined(output.get("text", "")), max_lines, max_chars)
+            truncated += was_truncated
+        data = output.get("data", {})
+        for mime in text_mimes:
+            # text/plain is only rendered when no richer representation exists
+            if mime in data:
+                data[mime], was_truncated = truncate_text(joined(data[mime]), max_lines, max_chars)
+                truncated += was_truncated
+    return truncated
+
+
+def store_blob(data: bytes, extension: str, store_dir: str = output_store_dir) -> tuple:
+    # write data under its content hash unless an identical file is already stored
+    name = hashlib.sha256(data).hexdigest()[:20] + extension
+    path = os.path.join(store_dir, name)
+    if os.path.isfile(path):
+        return path, False
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return path, True
+
+
+def externalize_inline_media(notebook, markdown_path: str, store_dir: str = output_store_dir) -> tuple:
+    # swap base64 data uris inside html / markdown outputs (images, audio players) for stored files
+    stored = []
+    new_bytes = 0
+
+    def replace(match):
+        nonlocal new_bytes
+        extension = media_extensions.get(match.group("mime"))
+        if extension is None:
+            return match.group(0)
+        data = base64.b64decode(re.sub(r"\s+", "", match.group("payload")))
+        path, is_new = store_blob(data, extension, store_dir)
+        stored.append(path)
+        new_bytes += len(data) if is_new else 0
+        return os.path.relpath(path, os.path.dirname(markdown_path))
+
+    for output in iter_outputs(notebook):
+        data = output.get("data", {})
+        for mime in inline_mimes:
+            if mime in data:
+                data[mime] = data_uri_pattern.sub(replace, joined(data[mime]))
+    return stored, new_bytes
+
+
+def externalize_output_files(markdown: str, resources: dict, markdown_path: str, store_dir: str = output_store_dir) -> tuple:
+    # move image outputs nbconvert would write to <name>_files/ into the store and repoint the markdown at them
+    stored = []
+    new_bytes = 0
+    renamed = {}
+    for file_name, data in list(resources.get("outputs", {}).items()):
+        path, is_new = store_blob(data, os.path.splitext(file_name)[1], store_dir)
+        renamed[file_name] = os.path.relpath(path, os.path.dirname(markdown_path))
+        stored.append(path)
+        new_bytes += len(data) if is_new else 0
+        del resources["outputs"][file_name]
+    markdown = markdown_image_pattern.sub(lambda m: m.group(1) + renamed.get(m.group(2), m.group(2)) + m.group(3), markdown)
+    return markdown, stored, new_bytes
+
+
+def output_stage_preprocessor(notebook, resources: dict) -> tuple:
+    # registered on the exporter after nbconvert's own preprocessors, so remove tags are already applied
+    stage = resources.get("output_stage")
+    if stage is None:
+        return notebook, resources
+    options = stage_options(stage["options"])
+    stage["report"] = {"before": output_sizes(notebook), "truncated_outputs": 0, "stored_new_bytes": 0}
+    stage["stored"] = []
+    if options["max_output_lines"] or options["max_output_chars"]:
+        stage["report"]["truncated_outputs"] = trim_outputs(notebook, options["max_output_lines"], options["max_output_chars"])
+    if options["externalize_images"]:
+        stage["stored"], stage["report"]["stored_new_bytes"] = externalize_inline_media(notebook, stage["markdown_path"], stage["store_dir"])
+    stage["report"]["after"] = output_sizes(notebook)
+    return notebook, resources
+
+
+def finish_output_stage(markdown: str, resources: dict) -> str:
+    # post-export half: externalize extracted image files and fill in page weight before / after
+    stage = resources["output_stage"]
+    if stage_options(stage["options"])["externalize_images"]:
+        markdown, stored, new_bytes = externalize_output_files(markdown, resources, stage["markdown_path"], stage["store_dir"])
+        stage["stored"] += stored
+        stage["report"]["stored_new_bytes"] += new_bytes
+    before, after = stage["report"]["before"], stage["report"]["after"]
+    after["markdown_bytes"] = len(markdown.encode())
+    before["markdown_bytes"] = (
+        after["markdown_bytes"] + (before["text_bytes"] - after["text_bytes"]) + (before["inline_bytes"] - after["inline_bytes"])
+    )
+    for sizes in [before, after]:
+        sizes["page_bytes"] = sizes["markdown_bytes"] + sizes["image_bytes"]
+    return markdown
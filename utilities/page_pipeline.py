@@ -0,0 +1,216 @@
+import os
+import time
+import threading
+from utilities import base_dir
+from concurrent.futures import ThreadPoolExecutor, wait
+from utilities.doc_index import get_doc_index
+from utilities.converter import iter_conversions
+from utilities.data_check import build_data_index, iter_data_references, data_dir
+from utilities.header_check import check_file_headers
+from utilities.instrumentation import timed
+from utilities.link_check import check_file_links, check_readme_links, collect_all_outer_links, get_link_checker
+from utilities.name_check import config_examples_dir, config_name_sites, duplicate_names, merge_name_sites, page_name_sites
+from utilities.reset_check import check_reset_pipeline
+from utilities.toc_file_check import compare_toc_to_docs
+
+default_queue_size = 8
+
+
+def notebook_path(index, page: str) -> str:
+    return os.path.join(index.docs_dir, page[: -len(".md")] + ".ipynb")
+
+
+def anchored_link_targets(record, toc_links: frozenset) -> set:
+    # toc pages whose headings this page links to - its link check needs them converted first
+    targets = set()
+    for link in record.inter_links:
+        if "#" in link:
+            target = link.split("#", 1)[0]
+            if target in toc_links:
+                targets.add(target[len("docs/") :])
+    return targets
+
+
+class PagePipeline:
+    """run every docs check page by page while the notebooks are still converting
+
+    converted pages are admitted through a bounded queue (at most queue_size pages in flight) to a pool of check
+    threads; each page's header / reset / data / name checks run as soon as its own conversion lands, and its link
+    check as soon as every page it links to by heading has landed too. duplicate names, the toc diff and unused data
+    files need every page and run as reducers at the end. failures are reported as they are found
+    """
+
+    def __init__(
+        self,
+        index=None,
+        workers: int = None,
+        force: bool = False,
+        check_threads: int = None,
+        queue_size: int = default_queue_size,
+        directory: str = data_dir,
+        config_dir: str = config_examples_dir,
+        report=None,
+    ):
+        self.index = index or get_doc_index()
+        self.workers = workers
+        self.force = force
+        self.check_threads = check_threads or min(8, (os.cpu_count() or 1) + 4)
+        self.queue_size = queue_size
+        self.directory = directory
+        self.config_dir = config_dir
+        self.report = report or print_problem
+        self.failures = []
+        self.warnings = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._futures = []
+        self._landed = set()
+        self._waiting = {}
+        self._names = {}
+        self._referenced = set()
+        self._files = None
+        self._executor = None
+        self._prefetch = None
+
+    def problem(self, check: str, page: str, problem: str, warning: bool = False) -> None:
+        entry = {"check": check, "page": page, "problem": problem, "elapsed": time.perf_counter() - self._start}
+        with self._lock:
+            (self.warnings if warning else self.failures).append(entry)
+        self.report(entry, warning)
+
+    def submit(self, function, *args):
+        future = self._executor.submit(function, *args)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def run(self, conversions=None) -> dict:
+        """run every check - conversions yields conversion results (see iter_conversions) in the order they land;
+        None converts the toc notebooks without remove_cell tags unless the index reads notebooks directly
+        """
+        toc = self.index.toc
+        with_notebooks = {v for v in toc if os.path.isfile(notebook_path(self.index, v))}
+        if conversions is None:
+            converting = self.index.source == "markdown" and not self.index.remove
+            if converting:
+                docpaths = [notebook_path(self.index, v) for v in toc if v in with_notebooks]
+                conversions = iter_conversions(docpaths, remove=False, workers=self.workers, force=self.force)
+            else:
+                conversions = []
+                with_notebooks = set()
+        by_notebook = {notebook_path(self.index, v): v for v in toc}
+        with timed("data_index"):
+            self._files = build_data_index(self.directory)
+
+        with ThreadPoolExecutor(max_workers=self.check_threads) as executor:
+            self._executor = executor
+            # external links of the whole tree are checked in one batch, before any page's link check
+            self._prefetch = self.submit(lambda: get_link_checker().check(collect_all_outer_links(self.index)))
+            if self.index.root == base_dir:
+                self.submit(self.readme_task)
+            for page in toc:
+                if page not in with_notebooks:
+                    self.land(page)
+            for result in conversions:
+                page = by_notebook.get(result["docpath"])
+                if page is None:
+                    continue
+                if not result["success"]:
+                    self.problem("conversion", page, result["error"])
+                self.land(page)
+            # anything not converted (e.g., a notebook missing from the results) is checked as it is on disk
+            for page in toc:
+                self.land(page)
+            while True:
+                with self._lock:
+                    pending = [v for v in self._futures if not v.done()]
+                if len(pending) == 0:
+                    break
+                wait(pending)
+            for future in self._futures:
+                error = future.exception()
+                if error is not None:
+                    self.problem("pipeline", "-", f"{type(error).__name__}: {error}")
+
+        self.reduce()
+        return {
+            "pages": len(toc),
+            "failures": self.failures,
+            "warnings": self.warnings,
+            "wall_time": time.perf_counter() - self._start,
+        }
+
+    def land(self, page: str) -> None:
+        # a page's markdown is final - start its checks (waiting for a queue slot) and release link checks waiting on it
+        with self._lock:
+            if page in self._landed:
+                return
+            self._landed.add(page)
+            released = [v for v, targets in self._waiting.items() if targets <= self._landed]
+            for v in released:
+                del self._waiting[v]
+        for v in released:
+            self.submit(self.link_task, v)
+        self._slots.acquire()
+        self.submit(self.page_task, page)
+
+    def page_task(self, page: str) -> None:
+        try:
+            with timed("page_checks", page):
+                record = self.index.page(page)
+                for problem in dict.fromkeys(check_file_headers(page, self.index)):
+                    self.problem("headers", page, f"invalid header {problem}")
+                for problem in check_reset_pipeline(page, self.index):
+                    self.problem("reset", page, problem)
+                self.data_checks(page, record)
+                names, _ = page_name_sites(self.index, page)
+                with self._lock:
+                    merge_name_sites(self._names, names)
+            targets = anchored_link_targets(record, self.index.toc_links) - {page}
+            with self._lock:
+                ready = targets <= self._landed
+                if not ready:
+                    self._waiting[page] = targets
+            if ready:
+                self.submit(self.link_task, page)
+        finally:
+            self._slots.release()
+
+    def data_checks(self, page: str, record) -> None:
+        for block, line, area, path in iter_data_references(record.code_blocks):
+            with self._lock:
+                self._referenced.add(path)
+            if path in self._files:
+                continue
+            # output files are written by running the notebooks - missing ones are reported, not failed on
+            self.problem("data", page, f"code block {block}, line {line} references data/{path} - not found", warning=area == "output")
+
+    def link_task(self, page: str) -> None:
+        self._prefetch.result()
+        with timed("link_checks", page):
+            for link in dict.fromkeys(check_file_links(page, index=self.index)):
+                self.problem("links", page, f"dead link {link}")
+
+    def readme_task(self) -> None:
+        self._prefetch.result()
+        for link in check_readme_links():
+            self.problem("links", "README.md", f"dead link {link}")
+
+    def reduce(self) -> None:
+        # the cross-page checks - every page has been read by now
+        with timed("reducers"):
+            names = merge_name_sites(dict(self._names), config_name_sites(self.config_dir))
+            for name, sites in duplicate_names(names).items():
+                self.problem("names", ", ".join(sorted({v["source"] for v in sites})), f"pipeline name {name} is used in more than one place")
+            in_toc_no_docs, in_docs_no_toc = compare_toc_to_docs(self.index)
+            for page in sorted(in_toc_no_docs):
+                self.problem("toc", page, "in the mkdocs toc but not found in docs/")
+            for page in sorted(in_docs_no_toc):
+                self.problem("toc", page, "found in docs/ but not in the mkdocs toc")
+            for path in sorted(v for v in self._files if v.startswith("input/") and v not in self._referenced):
+                self.problem("data", path, "data/input file is not used by any page")
+
+
+def print_problem(entry: dict, warning: bool) -> None:
+    print(f"{'WARNING' if warning else 'FAILURE'}: [{entry['check']}] {entry['page']} - {entry['problem']} ({entry['elapsed']:.1f}s)", flush=True)
@@ -0,0 +1,266 @@
+import os
+import json
+import hashlib
+from typing import NamedTuple
+from utilities import base_dir, cache_dir
+
+config_examples_dir = os.path.join(base_dir, "pipeline_config_examples")
+default_cache_path = os.path.join(cache_dir, "config_cache.json")
+config_cache_version = 1
+# the file extension a module's output is written with - what the next module's permitted_extensions must accept
+type_extensions = {"json": ".json", "text": ".txt", "npy": ".npy", "faiss": ".faiss", "db": ".db"}
+# module names the docs' module_chain lists use -> the module name in the config examples
+docs_module_aliases = {"keyword-db": "keyword-search", "vector-db": "vector-search"}
+
+
+class ModuleSpec(NamedTuple):
+    name: str
+    models: tuple
+    default_model: str
+    input_type: str
+    permitted_extensions: frozenset
+    output_type: str
+
+
+class PipelineConfig(NamedTuple):
+    name: str
+    modules: tuple
+    problems: tuple
+
+
+def module_spec(module: dict) -> ModuleSpec:
+    return ModuleSpec(
+        name=module["name"],
+        models=tuple(v["name"] for v in module.get("models") or []),
+        default_model=(module.get("defaults") or {}).get("model"),
+        input_type=module["input"]["type"],
+        permitted_extensions=frozenset(module["input"].get("permitted_extensions") or []),
+        output_type=module["output"]["type"],
+    )
+
+
+def link_problem(previous: ModuleSpec, module: ModuleSpec) -> str:
+    # why module cannot consume previous' output - None when it can
+    if previous.output_type != module.input_type:
+        return f"{previous.name} outputs {previous.output_type} but {module.name} takes {module.input_type}"
+    extension = type_extensions.get(previous.output_type)
+    if extension is not None and extension not in module.permitted_extensions:
+        return f"{module.name} does not permit {extension} files output by {previous.name}"
+    return None
+
+
+def module_problems(module: ModuleSpec) -> list:
+    if module.default_model not in module.models:
+        return [f"{module.name} default model {module.default_model} is not one of its models {list(module.models)}"]
+    return []
+
+
+def compile_config(config: dict) -> PipelineConfig:
+    """parse a pipeline config (as loaded from yaml) into an immutable record carrying every problem found
+
+    problems cover malformed modules, defaults.model missing from models and adjacent modules whose output.type /
+    file extension the next module's input.type / permitted_extensions do not accept
+    """
+    pipeline = (config or {}).get("pipeline") or {}
+    modules = []
+    problems = []
+    for position, module in enumerate(pipeline.get("modules") or []):
+        try:
+            modules.append(module_spec(module))
+        except (KeyError, TypeError, AttributeError) as e:
+            problems.append(f"module {position} is malformed - missing {e}")
+    if len(modules) == 0 and len(problems) == 0:
+        problems.append("pipeline has no modules")
+    for module in modules:
+        problems += module_problems(module)
+    for previous, module in zip(modules, modules[1:]):
+        problem = link_problem(previous, module)
+        if problem is not None:
+            problems.append(problem)
+    return PipelineConfig(name=pipeline.get("name"), modules=tuple(modules), problems=tuple(problems))
+
+
+def record_to_json(record: PipelineConfig) -> dict:
+    modules = [dict(v._asdict(), permitted_extensions=sorted(v.permitted_extensions)) for v in record.modules]
+    return {"name": record.name, "modules": modules, "problems": list(record.problems)}
+
+
+def record_from_json(data: dict) -> PipelineConfig:
+    modules = [ModuleSpec(**dict(v, models=tuple(v["models"]), permitted_extensions=frozenset(v["permitted_extensions"]))) for v in data["modules"]]
+    return PipelineConfig(name=data["name"], modules=tuple(modules), problems=tuple(data["problems"]))
+
+
+class ConfigCatalog:
+    """every pipeline config under a directory compiled once - records are cached by file content hash, in memory and
+    in .docs_cache/, so only new or edited configs are ever re-parsed
+
+    modules are taken from the single-module configs; the compatibility matrix says which module can follow which, so
+    a module chain is validated with one set lookup per link
+    """
+
+    def __init__(self, directory: str = config_examples_dir, cache_path: str = default_cache_path):
+        self.directory = directory
+        self.cache_path = cache_path
+        self._records = {}
+        self._configs = None
+        self._modules = None
+        self._matrix = None
+
+    def load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return cache.get("records", {}) if cache.get("version") == config_cache_version else {}
+
+    def save_cache(self, records: dict) -> None:
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": config_cache_version, "records": records}, file, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    def compile_content(self, content: bytes, digest: str = None) -> PipelineConfig:
+        # the record for one config file's raw content
+        digest = digest or hashlib.sha256(content).hexdigest()
+        if digest not in self._records:
+            # yaml (and its C loader when built) is imported on first compile, not with the module
+            import yaml
+
+            try:
+                record = compile_config(yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)))
+            except yaml.YAMLError as e:
+                record = PipelineConfig(name=None, modules=(), problems=(f"invalid yaml - {e}",))
+            self._records[digest] = record
+        return self._records[digest]
+
+    @property
+    def configs(self) -> dict:
+        # relative path -> PipelineConfig for every .yml / .yaml file under the directory
+        if self._configs is None:
+            cached = self.load_cache()
+            for digest, data in cached.items():
+                self._records.setdefault(digest, record_from_json(data))
+            configs = {}
+            used = {}
+            for root, _, names in os.walk(self.directory):
+                for name in sorted(names):
+                    if not name.endswith((".yml", ".yaml")):
+                        continue
+                    path = os.path.join(root, name)
+                    with open(path, "rb") as file:
+                        content = file.read()
+                    digest = hashlib.sha256(content).hexdigest()
+                    used[digest] = configs[os.path.relpath(path, self.directory)] = self.compile_content(content, digest)
+            if set(used) != set(cached):
+                self.save_cache({k: record_to_json(v) for k, v in used.items()})
+            self._configs = dict(sorted(configs.items()))
+        return self._configs
+
+    @property
+    def modules(self) -> dict:
+        # module name -> ModuleSpec, from the single-module configs
+        if self._modules is None:
+            modules = {}
+            for record in self.configs.values():
+                if len(record.modules) == 1:
+                    modules.setdefault(record.modules[0].name, record.modules[0])
+            self._modules = modules
+        return self._modules
+
+    @property
+    def matrix(self) -> dict:
+        # module name -> frozenset of module names that may directly follow it
+        if self._matrix is None:
+            self._matrix = {a.name: frozenset(b.name for b in self.modules.values() if link_problem(a, b) is None) for a in self.modules.values()}
+        return self._matrix
+
+    def problems(self) -> dict:
+        # relative path -> problems, for every config with at least one
+        return {k: list(v.problems) for k, v in self.configs.items() if len(v.problems) > 0}
+
+    def validate_chain(self, module_chain: list, aliases: dict = None) -> list:
+        # problems with a chain of module names - unknown modules and links the matrix rules out. aliases maps names
+        # the chain uses to catalog names, e.g., docs_module_aliases for the docs' module_chain lists
+        module_chain = [(aliases or {}).get(v, v) for v in module_chain]
+        problems = [f"unknown module {v}" for v in module_chain if v not in self.modules]
+        if len(problems) > 0:
+            return problems
+        for previous, module in zip(module_chain, module_chain[1:]):
+            if module not in self.matrix[previous]:
+                problems.append(link_problem(self.modules[previous], self.modules[module]))
+        return problems
+
+    def validate(self, config: dict) -> list:
+        # problems with a config dict (e.g., a generated one) - its own modules are checked, not the catalog's
+        return list(compile_config(config).problems)
+
+    def valid_chains(self, length: int) -> list:
+        # every module chain of the given length the matrix allows - the search space for fuzzing
+        chains = [(v,) for v in sorted(self.modules)]
+        for _ in range(length - 1):
+            chains = [chain + (v,) for chain in chains for v in sorted(self.matrix[chain[-1]])]
+        return chains
+
+    def chain_config(self, module_chain: list, name: str = None) -> dict:
+        # a full config dict for a chain, built from the catalog's module specs
+        modules = []
+        for v in module_chain:
+            spec = self.modules[v]
+            modules.append(
+                {
+                    "name": spec.name,
+                    "models": [{"name": m} for m in spec.models],
+                    "defaults": {"model": spec.default_model},
+                    "input": {"type": spec.input_type, "permitted_extensions": sorted(spec.permitted_extensions)},
+                    "output": {"type": spec.output_type},
+                }
+            )
+        return {"pipeline": {"name": name or "-".join(module_chain), "modules": modules}}
+
+
+def page_config_problems(catalog: ConfigCatalog, index, page: str) -> list:
+    """problems with the pipelines one page builds - each create_pipeline module_chain (with docs_module_aliases) and
+    the config file each load_pipeline call reads, as resolved by the name check
+
+    a config the page itself wrote with save_pipeline holds a pipeline whose chain is checked where it was created
+    (e.g., data/pipeline_configs/, emptied between runs). returns {"block", "line", "source", "problems"} per call
+    """
+    from utilities.code_analyzer import analyze_page
+    from utilities.name_check import resolve_config_path
+
+    page_path = os.path.join(index.docs_dir, page)
+    found = []
+    saved = set()
+    for call in analyze_page(index.page(page).code_blocks).calls:
+        problems = []
+        if call.method == "create_pipeline" and call.module_chain is not None:
+            source = call.argument
+            problems = catalog.validate_chain(list(call.module_chain), docs_module_aliases)
+        elif call.method == "save_pipeline":
+            saved.add(call.argument)
+        elif call.method == "load_pipeline" and call.argument is not None and call.argument not in saved:
+            source = call.argument
+            config_path = resolve_config_path(call.argument, page_path)
+            if config_path is None:
+                problems = [f"config file {call.argument} not found"]
+            else:
+                with open(config_path, "rb") as file:
+                    record = catalog.compile_content(file.read())
+                problems = list(record.problems) or catalog.validate_chain([v.name for v in record.modules])
+        if len(problems) > 0:
+            found.append({"block": call.block, "line": call.line, "source": source, "problems": problems})
+    return found
+
+
+if __name__ == "__main__":
+    catalog = ConfigCatalog()
+    for path, problems in catalog.problems().items():
+        for problem in problems:
+            print(f"FAILURE: {path} - {problem}")
+    width = max(len(v) for v in catalog.modules)
+    print("can be followed by")
+    for name in sorted(catalog.matrix):
+        print(f"  {name:<{width}}  {', '.join(sorted(catalog.matrix[name])) or '-'}")
+    print(f"{len(catalog.configs)} configs, {len(catalog.problems())} with problems")
@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import posixpath
+from urllib.parse import unquote, urlsplit
+from utilities import base_dir, cache_dir
+
+render_cache_dir = os.path.join(cache_dir, "rendered")
+render_cache_version = 1
+overrides_dir = os.path.join(base_dir, "overrides")
+
+
+def context_hash(config_path: str, theme_dir: str = overrides_dir, extra: dict = None) -> str:
+    """hash of everything besides a page's own markdown that its rendered html depends on - mkdocs.yml (nav, theme and
+    markdown extensions), every file of the theme overrides, and extra (e.g., package versions, the docs file list)
+    """
+    digest = hashlib.sha256(f"render-v{render_cache_version}".encode())
+    with open(config_path, "rb") as file:
+        digest.update(file.read())
+    for root, dirs, names in os.walk(theme_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            with open(path, "rb") as file:
+                digest.update(os.path.relpath(path, theme_dir).encode() + b"\0" + hashlib.sha256(file.read()).digest())
+    digest.update(json.dumps(extra or {}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def page_key(page: str, markdown: str, context: str) -> str:
+    return hashlib.sha256(f"{context}\0{page}\0{markdown}".encode()).hexdigest()
+
+
+def linking_pages(index, pages: set) -> set:
+    # toc pages linking to a heading on any of pages (paths relative to docs/) - mkdocs checks those links against the
+    # linked page's anchors when it renders them
+    targets = {"docs/" + v for v in pages}
+    linking = set()
+    for page in index.toc:
+        try:
+            links = index.page(page).inter_links
+        except OSError:
+            continue
+        if any("#" in v and v.split("#", 1)[0] in targets for v in links):
+            linking.add(page)
+    return linking - set(pages)
+
+
+def link_problems(markdown: str, page: str, files: set, anchors: dict) -> list:
+    """(setting, message) for each link or image on a page that mkdocs would report while rendering it - setting is the
+    validation.links option it falls under: not_found for a target missing from files (paths relative to docs/), anchors
+    for a fragment missing from the target's anchors (page -> ids; a page without an entry is not checked)
+    """
+    from utilities.md_tokenizer import iter_markdown_tokens
+
+    problems = []
+    for kind, url, _ in iter_markdown_tokens(markdown.split("\n")):
+        parts = urlsplit(url)
+        if kind == "heading" or parts.scheme or parts.netloc or url.startswith("/") or parts.path.endswith("/"):
+            continue
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(page), unquote(parts.path))) if parts.path else page
+        if target not in files:
+            problems.append(
+                ("not_found", f"Doc file '{page}' contains a link '{url}', but the target '{target}' is not found among documentation files.")
+            )
+        elif parts.fragment and target in anchors and parts.fragment not in anchors[target]:
+            problems.append(
+                ("anchors", f"Doc file '{page}' contains a link '{url}', but the doc '{target}' does not contain an anchor '#{parts.fragment}'.")
+            )
+    return problems
+
+
+class RenderCache:
+    """rendered page html (and the page's toc) on disk, one file per page key - see page_key
+
+    entries are never invalidated in place: a changed page, theme or config gives a new key, and prune drops what a
+    build no longer used
+    """
+
+    def __init__(self, directory: str = render_cache_dir):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> dict:
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, html: str, toc: list) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"html": html, "toc": toc}, file)
+        os.replace(tmp_path, self.path(key))
+
+    def prune(self, keep: set) -> int:
+        # remove every entry not in keep - returns how many were removed
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and name[: -len(".json")] not in keep:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
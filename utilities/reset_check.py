@@ -0,0 +1,18 @@
+from utilities.doc_index import get_doc_index
+from utilities.code_analyzer import analyze_page
+
+
+def check_reset_pipeline(markdown_file: str, index=None) -> list:
+    # a page that creates pipelines must reset each of them in its final code block - the index page is exempt
+    if "index.md" in markdown_file:
+        return []
+    code_blocks = (index or get_doc_index()).page(markdown_file).code_blocks
+    facts = analyze_page(code_blocks)
+    created = [v for v in facts.calls if v.method == "create_pipeline"]
+    if len(created) == 0:
+        return []
+    reset = {v.target for v in facts.resets if v.block == len(code_blocks) - 1}
+    if len(reset) == 0:
+        return ["no reset_pipeline call found in final code block"]
+    missing = {v.target: v for v in created if v.target is not None and v.target not in reset}
+    return [f"pipeline {k} (created in code block {v.block}, line {v.line}) is not reset in final code block" for k, v in missing.items()]
@@ -0,0 +1,229 @@
+import os
+import re
+import json
+from typing import NamedTuple
+from utilities import base_dir
+from utilities.utilities import get_all_values, heading_to_anchor
+from utilities.notebook_reader import load_notebook_cells
+
+search_index_version = 1
+docs_dir = os.path.join(base_dir, "docs")
+# words (any script) joined by underscores, e.g., create_pipeline - the client gets its own spelling of the pattern and
+# the stop words from the manifest, so a query is tokenized exactly like the pages were
+token_pattern = r"[^\W_]+(?:_[^\W_]+)*"
+client_token_pattern = r"[\p{L}\p{N}]+(?:_[\p{L}\p{N}]+)*"
+stop_words = sorted("a an and are as at be by can for from has have if in is it its of on or that the this to was we will with you".split())
+# a term in a section title counts this many times over
+title_weight = 5
+# markdown syntax that is not text - link / image targets, html tags, inline code ticks and emphasis
+markup_pattern = re.compile(r"\]\([^)]*\)|<[^>]+>|`|(?<!\w)[*_]{1,3}(?=\S)|(?<=\S)[*_]{1,3}(?!\w)")
+heading_pattern = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+# (path, size, mtime) -> sections, for the life of the process - mkdocs serve rebuilds only re-read edited pages
+_page_sections = {}
+
+
+class SearchSection(NamedTuple):
+    # location is the page url plus the heading anchor ("" for the text above the first subheading)
+    location: str
+    title: str
+    text: str
+
+
+def page_url(page: str, directory_urls: bool = True) -> str:
+    # site url of a page relative to docs/, as mkdocs builds it
+    if not directory_urls:
+        return page[: -len(".md")] + ".html"
+    if page == "index.md" or page.endswith("/index.md"):
+        return page[: -len("index.md")]
+    return page[: -len(".md")] + "/"
+
+
+def nav_sections(nav: list) -> dict:
+    # page -> the top level nav entry it sits under - a top level page is a section of its own
+    sections = {}
+    for item in nav:
+        title, value = next(iter(item.items())) if isinstance(item, dict) else (item, item)
+        for page in get_all_values(value) if isinstance(value, (dict, list)) else [value]:
+            sections[page] = title
+    return sections
+
+
+def read_nav(config_path: str) -> list:
+    import yaml
+
+    with open(config_path, "r") as file:
+        return yaml.safe_load(file)["nav"]
+
+
+def page_blocks(page_path: str) -> list:
+    """(kind, text) for what a page shows besides code outputs - "markdown" or "code"
+
+    read from the page's notebook when there is one: cells tagged remove_cell (never shown) or remove_output (setup
+    cells whose output is hidden) are left out, and outputs are never loaded
+    """
+    notebook_path = page_path[: -len(".md")] + ".ipynb"
+    if not os.path.isfile(notebook_path):
+        with open(page_path, "r", encoding="utf-8") as file:
+            return [("markdown", file.read())]
+    blocks = []
+    for cell_type, source, tags in load_notebook_cells(notebook_path, remove=True):
+        if "remove_output" in tags or cell_type not in ["markdown", "code"]:
+            continue
+        blocks.append((cell_type, source))
+    return blocks
+
+
+def split_sections(blocks: list, url: str) -> list:
+    # one section per heading, as mkdocs-material splits its own search index - the first heading titles the page, and
+    # text above it (e.g., a banner cell) belongs to the page's first section. anchors are made like the markdown toc
+    # extension mkdocs renders headings with: its slugify, and a _1, _2... suffix for a repeated heading
+    from markdown.extensions.toc import slugify, unique
+
+    sections = []
+    ids = set()
+    title, anchor, lines = None, "", []
+
+    def close():
+        if title is not None or lines:
+            sections.append(SearchSection(url + anchor, title or "", " ".join(lines)))
+
+    for kind, text in blocks:
+        if kind == "code":
+            lines.append(text)
+            continue
+        fenced = False
+        for line in text.split("\n"):
+            if line.lstrip().startswith("```"):
+                fenced = not fenced
+            heading = None if fenced else heading_pattern.match(line)
+            if heading is None:
+                lines.append(line if fenced else markup_pattern.sub("", line))
+                continue
+            text = markup_pattern.sub("", heading.group(2))
+            heading_id = unique(slugify(text, "-"), ids)
+            if title is not None:
+                close()
+                anchor = "#" + heading_id
+                lines = []
+            title = text
+    close()
+    return sections
+
+
+def read_page_sections(page: str, directory: str = docs_dir, directory_urls: bool = True) -> list:
+    page_path = os.path.join(directory, page)
+    source_path = page_path[: -len(".md")] + ".ipynb"
+    if not os.path.isfile(source_path):
+        source_path = page_path
+    stat = os.stat(source_path)
+    key = (source_path, stat.st_size, stat.st_mtime_ns, directory_urls)
+    sections = _page_sections.get(key)
+    if sections is None:
+        sections = split_sections(page_blocks(page_path), page_url(page, directory_urls))
+        _page_sections[key] = sections
+    return sections
+
+
+def tokenize(text: str) -> list:
+    return [v for v in re.findall(token_pattern, text.lower()) if len(v) > 1 and v not in stop_words]
+
+
+def term_counts(section: SearchSection) -> dict:
+    counts = {}
+    for token in tokenize(section.text):
+        counts[token] = counts.get(token, 0) + 1
+    for token in tokenize(section.title):
+        counts[token] = counts.get(token, 0) + title_weight
+    return counts
+
+
+def build_shard(pages: dict) -> tuple:
+    """one section's index - pages maps page -> (page title, [SearchSection]); returns (shard, bytes per page)
+
+    docs rows are [location, section title, page title] and each term maps to flat [doc, count, doc, count, ...]
+    postings; a page's bytes are what its rows and postings add to the uncompressed shard
+    """
+    docs = []
+    terms = {}
+    page_bytes = {}
+    for page, (page_title, sections) in pages.items():
+        size = 0
+        for section in sections:
+            doc = len(docs)
+            docs.append([section.location, section.title, page_title])
+            size += len(json.dumps(docs[-1], ensure_ascii=False).encode()) + 1
+            for term, count in term_counts(section).items():
+                postings = terms.setdefault(term, [])
+                size += len(f"{doc},{count},") + (len(json.dumps(term, ensure_ascii=False).encode()) + 4 if len(postings) == 0 else 0)
+                postings += [doc, count]
+        page_bytes[page] = size
+    return {"version": search_index_version, "docs": docs, "terms": terms}, page_bytes
+
+
+def build_search_index(nav: list, output_dir: str, directory: str = docs_dir, directory_urls: bool = True) -> dict:
+    """write a gzipped index shard per top level nav section, plus manifest.json, into output_dir
+
+    code outputs are never indexed - see page_blocks. returns the report: shards with their raw / compressed sizes,
+    and per page its section count and the uncompressed bytes it adds to its shard, largest first
+    """
+    import gzip
+
+    by_section = {}
+    for page, section in nav_sections(nav).items():
+        if not page.endswith(".md") or not os.path.isfile(os.path.join(directory, page)):
+            continue
+        sections = read_page_sections(page, directory, directory_urls)
+        page_title = sections[0].title if sections else page
+        by_section.setdefault(section, {})[page] = (page_title, sections)
+
+    os.makedirs(os.path.join(output_dir, "shards"), exist_ok=True)
+    shards = []
+    pages = []
+    for section, section_pages in by_section.items():
+        shard, page_bytes = build_shard(section_pages)
+        raw = json.dumps(shard, separators=(",", ":"), ensure_ascii=False).encode()
+        compressed = gzip.compress(raw, compresslevel=9, mtime=0)
+        file_name = f"shards/{heading_to_anchor(section).lstrip('#') or 'home'}.json.gz"
+        with open(os.path.join(output_dir, file_name), "wb") as file:
+            file.write(compressed)
+        shards.append(
+            {
+                "section": section,
+                "file": file_name,
+                "pages": [page_url(v, directory_urls) for v in section_pages],
+                "raw_bytes": len(raw),
+                "bytes": len(compressed),
+            }
+        )
+        pages += [{"page": k, "section": section, "sections": len(v[1]), "bytes": page_bytes[k]} for k, v in section_pages.items()]
+
+    manifest = {"version": search_index_version, "token_pattern": client_token_pattern, "stop_words": stop_words, "shards": shards}
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, separators=(",", ":"))
+    return {"shards": shards, "pages": sorted(pages, key=lambda v: (-v["bytes"], v["page"]))}
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="build the sharded search index and report its size per page")
+    parser.add_argument("--output-dir", default=None, help="where to write the index (default: a temporary directory)")
+    parser.add_argument("--top", type=int, default=10, help="largest pages to list")
+    parser.add_argument("--json", default=None, help="also write the full report as json to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        report = build_search_index(read_nav(os.path.join(base_dir, "mkdocs.yml")), args.output_dir or temporary_dir)
+    for v in report["shards"]:
+        print(f"SHARD: {v['file']} ({v['section']}) - {len(v['pages'])} pages, {v['raw_bytes']:,} bytes, {v['bytes']:,} gzipped")
+    for v in report["pages"][: args.top]:
+        print(f"PAGE: {v['page']} - {v['sections']} sections, {v['bytes']:,} bytes")
+    print(
+        f"{len(report['pages'])} pages in {len(report['shards'])} shards - {sum(v['raw_bytes'] for v in report['shards']):,} bytes, "
+        + f"{sum(v['bytes'] for v in report['shards']):,} gzipped"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
@@ -0,0 +1,113 @@
+import json
+import time
+import pytest
+from utilities import instrumentation
+
+# report stage -> instrumentation stage whose slowest items are summarized
+summarized_stages = {"pages": "page", "links": "link", "notebooks": "convert", "executed_notebooks": "execute", "tests": "test"}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("timing", "docs check timing")
+    group.addoption("--timing-report", default=None, help="write per-stage / per-page timings and counters as json to this path")
+    group.addoption("--timing-top", type=int, default=10, help="number of slowest pages / links / notebooks / tests summarized")
+    group.addoption("--timing-budgets", default=None, help="json file of stage -> seconds - the session fails when a stage goes over")
+    group.addoption(
+        "--timing-profile", default=None, choices=instrumentation.profile_modes, help="capture the whole run with cProfile or tracemalloc"
+    )
+
+
+def enabled(config) -> bool:
+    return any(config.getoption(v) for v in ["timing_report", "timing_budgets", "timing_profile"])
+
+
+def is_worker(config) -> bool:
+    return hasattr(config, "workerinput")
+
+
+def pytest_configure(config):
+    config._timing_start = time.perf_counter()
+    config._timing_capture = None
+    if config.getoption("timing_profile") and (is_worker(config) or not getattr(config.option, "numprocesses", None)):
+        # with pytest-xdist the controller only schedules - each worker captures its own run
+        config._timing_capture = instrumentation.Capture(config.getoption("timing_profile")).start()
+
+
+def pytest_runtest_logreport(report):
+    # test time, and page time for tests parametrized by a page - setup (e.g. conversion fixtures) included
+    if hasattr(report, "node"):
+        # relayed by a pytest-xdist worker, which recorded it already
+        return
+    instrumentation.record("test", report.duration, report.nodeid)
+    parameter = report.nodeid.split("[", 1)[1][:-1] if report.nodeid.endswith("]") else ""
+    if parameter.endswith((".md", ".ipynb")):
+        instrumentation.record("page", report.duration, parameter)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # pytest-xdist: fold each worker's timings into the controller's
+    output = getattr(node, "workeroutput", {})
+    if "timings" in output:
+        instrumentation.merge(json.loads(output["timings"]))
+    if "capture" in output:
+        node.config._timing_worker_captures = getattr(node.config, "_timing_worker_captures", []) + [json.loads(output["capture"])]
+
+
+def timing_report(config) -> dict:
+    data = instrumentation.snapshot()
+    top = config.getoption("timing_top")
+    report = {
+        "wall_time": time.perf_counter() - config._timing_start,
+        "stages": dict(sorted(data["stages"].items(), key=lambda v: -v[1]["total"])),
+        "counters": data["counters"],
+        "slowest": {k: instrumentation.slowest(data, v, top) for k, v in summarized_stages.items()},
+        "budgets": {},
+        "over_budget": [],
+        "profile": None,
+    }
+    if config.getoption("timing_budgets"):
+        with open(config.getoption("timing_budgets"), "r", encoding="utf-8") as file:
+            report["budgets"] = json.load(file)
+        report["over_budget"] = instrumentation.over_budget(data, report["budgets"])
+    if config._timing_capture is not None:
+        report["profile"] = config._timing_capture.summary()
+    elif hasattr(config, "_timing_worker_captures"):
+        report["profile"] = config._timing_worker_captures
+    return report
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if config._timing_capture is not None:
+        config._timing_capture.stop()
+    if not enabled(config):
+        return
+    if is_worker(config):
+        config.workeroutput["timings"] = json.dumps(instrumentation.snapshot())
+        if config._timing_capture is not None:
+            config.workeroutput["capture"] = json.dumps(config._timing_capture.summary())
+        return
+    report = timing_report(config)
+    config._timing_report = report
+    if config.getoption("timing_report"):
+        with open(config.getoption("timing_report"), "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if len(report["over_budget"]) > 0 and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    report = getattr(config, "_timing_report", None)
+    if report is None:
+        return
+    terminalreporter.section("timing")
+    for stage, stats in list(report["stages"].items())[:10]:
+        terminalreporter.write_line(f"{stage:<20} {stats['count']:>7} runs {stats['total']:>9.2f}s total {stats['max']:>8.2f}s max")
+    for kind, rows in report["slowest"].items():
+        if rows:
+            terminalreporter.write_line(f"slowest {kind}:")
+            for v in rows:
+                terminalreporter.write_line(f"  {v['seconds']:>8.2f}s  {v['item']}")
+    for v in report["over_budget"]:
+        terminalreporter.write_line(f"OVER BUDGET: {v['stage']} took {v['seconds']:.2f}s - budget {v['budget']:.2f}s", red=True)
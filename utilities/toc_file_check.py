@@ -1,10 +1,9 @@
 import os
 import fnmatch
-from utilities import base_dir
-from utilities.converter import collect_mkdocks_toc
+from utilities.doc_index import get_doc_index
 
 
-def list_files_recursively(directory, exclude_list=None):
+def list_files_recursively(directory, exclude_list=None, extension=".md"):
     if exclude_list is None:
         exclude_list = []
 
@@ -13,7 +12,7 @@ def list_files_recursively(directory, exclude_list=None):
     for root, dirs, files in os.walk(directory):
         for file_name in files:
             file_path = os.path.join(root, file_name)
-            if file_path.endswith(".md"):
+            if file_path.endswith(extension) and ".ipynb_checkpoints" not in file_path:
                 if not any(fnmatch.fnmatch(file_path, pattern) for pattern in exclude_list):
                     keeper_path = file_path.split("/docs/")[-1]
                     file_list.append(keeper_path)
@@ -21,10 +20,15 @@ def list_files_recursively(directory, exclude_list=None):
     return file_list
 
 
-def compare_toc_to_docs():
-    mkdocks_toc = collect_mkdocks_toc()
-    test_dir = base_dir + "/docs/"
+def compare_toc_to_docs(index=None):
+    index = index or get_doc_index()
+    mkdocks_toc = index.toc
+    test_dir = index.docs_dir + "/"
     actual_md_files = list_files_recursively(test_dir)
+    if index.source == "notebook":
+        # pages may not be converted yet - a notebook stands in for its markdown
+        actual_notebooks = list_files_recursively(test_dir, extension=".ipynb")
+        actual_md_files = list(set(actual_md_files + [v[: -len(".ipynb")] + ".md" for v in actual_notebooks]))
     in_toc_no_docs = list(set(mkdocks_toc) - set(actual_md_files))
     in_docs_no_toc = list(set(actual_md_files) - set(mkdocks_toc))
     return in_toc_no_docs, in_docs_no_toc
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+from utilities import cache_dir
+from utilities.instrumentation import count, record
+
+ok_status_codes = [200, 403, 429]
+default_cache_path = os.path.join(cache_dir, "link_cache.json")
+default_ttl = 24 * 60 * 60
+headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36"}
+
+
+def load_link_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_link_cache(cache_path: str, results: dict) -> None:
+    # merge with what is on disk now, then write atomically
+    cache = load_link_cache(cache_path)
+    cache.update(results)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(cache, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+class LinkChecker:
+    """check external urls concurrently - deduplicated, HEAD before GET, pooled connections, TTL'd on-disk cache of verified links
+
+    in offline mode no requests are made; urls without a fresh cached result come back with ok=None
+    """
+
+    def __init__(
+        self,
+        workers: int = 16,
+        per_host: int = 4,
+        timeout: float = 10,
+        ttl: float = default_ttl,
+        cache_path: str = default_cache_path,
+        offline: bool = False,
+    ):
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.offline = offline
+        self.results = {}
+        self._session = None
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.per_host)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(headers)
+            self._session = session
+        return self._session
+
+    def host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url: str) -> dict:
+        # HEAD first - only fall back to a (streamed, body-less) GET when HEAD is refused or fails
+        start = time.time()
+        result = {"url": url, "ok": False, "status": None, "method": None, "error": None, "checked_at": start, "cached": False}
+        with self.host_limit(url):
+            for method in ["HEAD", "GET"]:
+                result["method"] = method
+                try:
+                    response = self.session.request(method, url, timeout=self.timeout, allow_redirects=True, stream=True)
+                    response.close()
+                    result["status"] = response.status_code
+                    result["error"] = None
+                    if response.status_code in ok_status_codes:
+                        result["ok"] = True
+                        break
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+        result["checked_at"] = time.time()
+        record("link", result["checked_at"] - start, url)
+        return result
+
+    def check(self, urls: list) -> dict:
+        # return a result per unique url, fetching only those with no fresh verified result on disk
+        pending = []
+        cache = None
+        now = time.time()
+        for url in dict.fromkeys(urls):
+            if url in self.results:
+                continue
+            if cache is None:
+                # only read from disk when some url is not already known - pages mostly repeat known links
+                cache = load_link_cache(self.cache_path)
+            cached = cache.get(url)
+            if cached is not None and cached.get("ok") and now - cached.get("checked_at", 0) < self.ttl:
+                self.results[url] = dict(cached, cached=True)
+                count("link_cache_hits")
+            elif self.offline:
+                self.results[url] = {
+                    "url": url,
+                    "ok": None,
+                    "status": None,
+                    "method": None,
+                    "error": "not cached (offline)",
+                    "checked_at": None,
+                    "cached": False,
+                }
+            else:
+                pending.append(url)
+
+        if len(pending) > 0:
+            # only a cold cache needs the pool - warm and offline runs never import it
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as executor:
+                fetched = list(executor.map(self.fetch, pending))
+            for result in fetched:
+                self.results[result["url"]] = result
+            save_link_cache(self.cache_path, {v["url"]: v for v in fetched if v["ok"]})
+
+        return {url: self.results[url] for url in urls}
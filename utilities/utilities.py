@@ -1,26 +1,74 @@
+import os
 import re
-from pathlib import Path
 
 nono_chars = ["{", "}"]
 
 
+def get_all_values(nested_dict: dict) -> list:
+    values = []
+
+    def extract_values(d):
+        if isinstance(d, dict):
+            for key, value in d.items():
+                if isinstance(value, dict):
+                    extract_values(value)
+                elif isinstance(value, list):
+                    for item in value:
+                        extract_values(item)
+                else:
+                    values.append(value)
+        elif isinstance(d, list):
+            for item in d:
+                extract_values(item)
+        else:
+            values.append(d)
+
+    extract_values(nested_dict)
+    return values
+
+
+def heading_to_anchor(heading: str) -> str:
+    anchor = "#" + "-".join(heading.lower().replace("`", "").split(" "))
+    return anchor.replace("?", "")
+
+
+def extract_headings_from_content(markdown_content: str) -> list:
+    headings = re.findall(r"^#+\s+(.+)$", markdown_content, flags=re.MULTILINE)
+    del headings[0]
+    return [heading_to_anchor(h) for h in headings]
+
+
 def extract_headings_from_markdown(markdown_file) -> list:
     with open(markdown_file, "r", encoding="utf-8") as file:
         markdown_content = file.read()
-    headings = re.findall(r"^#+\s+(.+)$", markdown_content, flags=re.MULTILINE)
-    del headings[0]
-    toc_headings = []
-    for h in headings:
-        ht = "#" + "-".join(h.lower().replace("`", "").split(" "))
-        ht = ht.replace("?", "")
-        toc_headings.append(ht)
-    return toc_headings
+    return extract_headings_from_content(markdown_content)
+
+
+def extract_links_from_content(markdown_content: str, markdown_file: str) -> tuple:
+    import markdown
+
+    html_content = markdown.markdown(markdown_content)
+    links = re.findall(r'<a\s+(?:[^>]*?\s+)?href="([^"]*)"', html_content)
+    return split_links(links, markdown_file)
 
 
-def list_files_in_directory(directory: str) -> list:
-    path = Path(directory)
-    files = [str(file) for file in path.iterdir() if file.is_file()]
-    return files
+def split_links(links: list, markdown_file: str) -> tuple:
+    # split into intra, inter, and outer links
+    inter_links = []
+    intra_links = []
+    outer_links = []
+    for link in links:
+        if link[0] == "#":
+            intra_links.append(link)
+        elif link[:4] == "http":
+            outer_links.append(link)
+        else:
+            # convert to absolute link
+            absolute_link = os.path.abspath(os.path.join(os.path.dirname(markdown_file), link))
+            absolute_link = "docs/" + absolute_link.split("/docs/", 1)[-1]
+            inter_links.append(absolute_link)
+
+    return intra_links, inter_links, outer_links
 
 
 def get_code_from_markdown(lines: list[str], *, language: str = "python") -> list[str]:
@@ -32,9 +80,3 @@ def get_code_from_markdown(lines: list[str], *, language: str = "python") -> lis
     )
     blocks = [(match.group("block_language"), match.group("code")) for match in regex.finditer("".join(lines))]
     return [block for block_language, block in blocks if block_language == language]
-
-
-def load_md_doc(md_filepath: str) -> str:
-    with open(md_filepath, "r", encoding="utf-8") as file:
-        markdown_content = file.read()
-    return markdown_content